@@ -1,9 +1,6 @@
 from flask import Flask, request, jsonify
 import os
 import sys
-import threading
-import time
-from queue import Queue
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
@@ -18,6 +15,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Imports dos novos módulos
 from src.handlers.message_handler import MessageHandler
 from src.utils.config import ConfigManager
+from src.services.phone_queue_service import PhoneQueueService
 
 # Configuração de logging melhorado
 logging.basicConfig(
@@ -41,11 +39,6 @@ if not config_manager.validate_config():
 
 print("=== AVANTTI AI - ELIANE V4 MODULAR ===")
 
-# Sistema de filas melhorado
-message_queues = {}
-processing_lock = threading.Lock()
-active_processors = set()
-
 # Handler principal
 message_handler = MessageHandler()
 
@@ -57,84 +50,46 @@ metrics = {
     'uptime_start': datetime.now()
 }
 
-def get_queue_for_phone(phone):
-    """Obtém fila do telefone"""
-    if phone not in message_queues:
-        message_queues[phone] = Queue()
-    return message_queues[phone]
-
-def process_message_queue(phone):
-    """Processa fila de mensagens usando o novo handler"""
-    queue = get_queue_for_phone(phone)
-    
-    logger.info(f"Iniciando processamento para {phone} - {queue.qsize()} mensagens")
-    
-    while not queue.empty():
-        try:
-            message_data = queue.get(timeout=5)
-            message_text = message_data.get('message', '')
-            message_type = message_data.get('type', 'text')
-            
-            logger.info(f"Processando {message_type}: '{message_text[:50]}...' de {phone}")
-            
-            if message_text:
-                metrics['messages_processed'] += 1
-                
-                # Cria dados para o handler
-                if message_type == 'audio':
-                    metrics['audio_transcriptions'] += 1
-                    # Para áudio, usa handler específico
-                    handler_data = {
-                        'phone': phone,
-                        'message': {'audioUrl': message_text}  # URL do áudio
-                    }
-                    message_handler.processar_mensagem_audio(handler_data)
-                else:
-                    # Para texto, imagem, vídeo
-                    handler_data = {
-                        'phone': phone,
-                        'message': {'text': message_text}
-                    }
-                    message_handler.processar_mensagem_texto(handler_data)
-            
-            queue.task_done()
-            time.sleep(1)  # Evita spam
-            
-        except Exception as e:
-            logger.error(f"Erro no processamento: {e}")
-            metrics['errors'] += 1
-            try:
-                queue.task_done()
-            except:
-                pass
+def process_message(message_data):
+    """Processa uma mensagem da fila usando o novo handler"""
+    phone = message_data.get('phone')
+    message_text = message_data.get('message', '')
+    message_type = message_data.get('type', 'text')
     
-    logger.info(f"Processamento concluído para {phone}")
-
-def start_queue_processor(phone):
-    """Inicia processador da fila com melhor controle"""
-    global active_processors
+    logger.info(f"Processando {message_type}: '{message_text[:50]}...' de {phone}")
     
-    with processing_lock:
-        if phone in active_processors:
-            logger.info(f"Processador já ativo para {phone}")
-            return
-        
-        active_processors.add(phone)
-        logger.info(f"Iniciando processador para {phone}")
+    if not message_text:
+        return
     
-    def worker():
-        try:
-            process_message_queue(phone)
-        except Exception as e:
-            logger.error(f"Erro no worker: {e}")
-        finally:
-            with processing_lock:
-                active_processors.discard(phone)
-                logger.info(f"Processador finalizado para {phone}")
+    metrics['messages_processed'] += 1
     
-    thread = threading.Thread(target=worker, name=f"queue-{phone}")
-    thread.daemon = True
-    thread.start()
+    try:
+        # Cria dados para o handler
+        if message_type == 'audio':
+            metrics['audio_transcriptions'] += 1
+            # Para áudio, usa handler específico
+            handler_data = {
+                'phone': phone,
+                'message': {'audioUrl': message_text}  # URL do áudio
+            }
+            message_handler.processar_mensagem_audio(handler_data)
+        else:
+            # Para texto, imagem, vídeo
+            handler_data = {
+                'phone': phone,
+                'message': {'text': message_text}
+            }
+            message_handler.processar_mensagem_texto(handler_data)
+    except Exception:
+        metrics['errors'] += 1
+        raise
+
+# Sistema de filas: pool fixo de workers com filas particionadas por telefone
+phone_queue = PhoneQueueService(
+    processor=process_message,
+    pool_size=config_manager.get_int_config('QUEUE_POOL_SIZE', 8),
+    max_pending_per_phone=config_manager.get_int_config('QUEUE_MAX_PENDING_PER_PHONE', 10)
+)
 
 def extract_message_content(payload):
     """Extrai conteúdo da mensagem dependendo do tipo"""
@@ -191,16 +146,15 @@ def extract_message_content(payload):
 
 @app.route("/", methods=["GET"])
 def health_check():
-    active_count = len(active_processors)
-    queue_count = sum(q.qsize() for q in message_queues.values())
+    queue_metrics = phone_queue.get_metrics()
     uptime = datetime.now() - metrics['uptime_start']
     
     return jsonify({
         "status": "ok", 
         "message": "Avantti AI - Eliane V2 funcionando!",
-        "active_processors": active_count,
-        "queued_messages": queue_count,
-        "total_phones": len(message_queues),
+        "active_processors": queue_metrics['active_processors'],
+        "queued_messages": queue_metrics['queued_messages'],
+        "total_phones": queue_metrics['total_phones'],
         "metrics": {
             "messages_processed": metrics['messages_processed'],
             "audio_transcriptions": metrics['audio_transcriptions'],
@@ -215,19 +169,31 @@ def health_check():
 def metrics_endpoint():
     """Endpoint dedicado para métricas detalhadas"""
     uptime = datetime.now() - metrics['uptime_start']
+    queue_metrics = phone_queue.get_metrics(include_details=True)
     
     return jsonify({
         "uptime_seconds": int(uptime.total_seconds()),
         "messages_processed": metrics['messages_processed'],
         "audio_transcriptions": metrics['audio_transcriptions'],
         "errors": metrics['errors'],
-        "active_processors": len(active_processors),
-        "total_queues": len(message_queues),
-        "queued_messages": sum(q.qsize() for q in message_queues.values()),
-        "queue_details": {
-            phone: queue.qsize() 
-            for phone, queue in message_queues.items()
-        }
+        "active_processors": queue_metrics['active_processors'],
+        "total_queues": queue_metrics['total_phones'],
+        "queued_messages": queue_metrics['queued_messages'],
+        "queue_details": queue_metrics['queue_details'],
+        "queue_pool": {
+            "pool_size": queue_metrics['pool_size'],
+            "shard_sizes": queue_metrics['shard_sizes'],
+            "enqueued": queue_metrics['enqueued'],
+            "processed": queue_metrics['processed'],
+            "failed": queue_metrics['failed'],
+            "rejected": queue_metrics['rejected']
+        },
+        "delivery": message_handler.delivery_scheduler.get_metrics(),
+        "followup": message_handler.followup_scheduler.get_metrics(),
+        "c2s_updates": message_handler.c2s_updates.get_metrics(),
+        "lead_data": message_handler.lead_data_service.get_metrics(),
+        "transcription_cache": message_handler.whisper_service.cache.get_metrics(),
+        "context_cache": message_handler.context_cache.get_metrics()
     }), 200
 
 @app.route("/health", methods=["GET"])
@@ -364,14 +330,6 @@ def message_receive():
         if payload.get('fromMe', False):
             return jsonify({"status": "ignored", "reason": "from_bot"}), 200
         
-        # Rate limiting simples por telefone
-        current_time = time.time()
-        if phone in message_queues:
-            queue = message_queues[phone]
-            if queue.qsize() > 10:  # Máximo 10 mensagens na fila
-                logger.warning(f"Rate limit atingido para {phone}")
-                return jsonify({"status": "rate_limited"}), 429
-        
         # Extrai conteúdo baseado no tipo
         message_text, message_type = extract_message_content(payload)
         
@@ -380,9 +338,8 @@ def message_receive():
         
         logger.info(f"Webhook recebido: {message_type} de {phone}")
         
-        # Adiciona à fila
-        queue = get_queue_for_phone(phone)
-        queue.put({
+        # Adiciona à fila do shard do telefone (rate limiting simples por telefone)
+        queued = phone_queue.enqueue(phone, {
             'message': message_text,
             'type': message_type,
             'timestamp': datetime.now().isoformat(),
@@ -390,8 +347,9 @@ def message_receive():
             'ip': request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
         })
         
-        # Inicia processador
-        start_queue_processor(phone)
+        if not queued:
+            logger.warning(f"Rate limit atingido para {phone}")
+            return jsonify({"status": "rate_limited"}), 429
         
         return jsonify({
             "status": "queued", 
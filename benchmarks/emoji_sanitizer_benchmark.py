@@ -0,0 +1,91 @@
+"""
+Micro-benchmark da remoção de emojis: implementação antiga do MessageHandler
+(oito re.sub + ~150 str.replace por chamada) x utils.emoji_sanitizer.
+
+Também confere que as duas produzem o mesmo texto no corpus, exceto pelos
+modificadores (ZWJ, seletores de variação, keycap, tags) que a versão antiga
+deixava soltos no texto.
+
+    python benchmarks/emoji_sanitizer_benchmark.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.emoji_sanitizer import remove_emojis
+
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 2000))
+
+LEGACY_SYMBOLS = ['😊', '😀', '😁', '😂', '🤣', '😃', '😄', '😅', '😆', '😉', '😊',
+                  '😋', '😎', '😍', '😘', '🥰', '😗', '😙', '😚', '🤪', '😜', '😝',
+                  '🤑', '🤗', '🤭', '🤫', '🤔', '🤐', '🤨', '😐', '😑', '😶', '😏',
+                  '😒', '🙄', '😬', '🤥', '😔', '😪', '🤤', '😴', '😷', '🤒', '🤕',
+                  '🤢', '🤮', '🤧', '🥵', '🥶', '🥴', '😵', '🤯', '🤠', '🥳', '😎',
+                  '🧐', '😕', '😟', '🙁', '☹️', '😮', '😯', '😲', '😳', '🥺', '😦',
+                  '😧', '😨', '😰', '😥', '😢', '😭', '😱', '😖', '😣', '😞', '😓',
+                  '😩', '😫', '🥱', '😤', '😡', '😠', '🤬', '😈', '👿', '💀', '☠️',
+                  '💩', '🤡', '👹', '👺', '👻', '👽', '👾', '🤖', '🎃', '😺', '😸',
+                  '🏢', '💰', '📍', '📞', '📌', '❌', '✅', '⚠️', '📝', '💬', '🚀',
+                  '🎯', '🔥', '👨‍💻', '🏡', '💪', '🙌', '👏', '🎉', '💸', '💵', '💴',
+                  '📈', '📊', '🏠', '🏗️', '🌟', '⭐', '💯', '👍', '👎', '❤️', '💙',
+                  '💚', '🎁', '🎊', '🔔', '🔕', '📢', '📣', '📺', '📻', '📷', '📹',
+                  '🎵', '🎶', '🟢', '🟡', '🔴', '🟠', '⚡', '💡', '🔒', '🔓', '🔑',
+                  '🔐', '👥', '🔄', '▶️', '🧪', '🧹', '📱', '🤖']
+
+
+def legacy_remove_emojis(texto):
+    """Cópia da implementação anterior de MessageHandler._remover_emojis"""
+    texto = re.sub(r'[\U0001F600-\U0001F64F]', '', texto)
+    texto = re.sub(r'[\U0001F300-\U0001F5FF]', '', texto)
+    texto = re.sub(r'[\U0001F680-\U0001F6FF]', '', texto)
+    texto = re.sub(r'[\U0001F1E0-\U0001F1FF]', '', texto)
+    texto = re.sub(r'[\U00002702-\U000027B0]', '', texto)
+    texto = re.sub(r'[\U000024C2-\U0001F251]', '', texto)
+    texto = re.sub(r'[\U0001F900-\U0001F9FF]', '', texto)
+    texto = re.sub(r'[\U0001FA70-\U0001FAFF]', '', texto)
+
+    for symbol in LEGACY_SYMBOLS:
+        texto = texto.replace(symbol, '')
+
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto
+
+
+MODIFIERS = re.compile("[\u200d\u20e3\ufe0e\ufe0f\U000e0020-\U000e007f]")
+
+CORPUS = [
+    "Olá, João! Aqui é a Eliane, da Evex Imóveis. Vi que você se interessou pelo anúncio do Moradas do Lago.",
+    "Perfeito! 😊 Nossos empreendimentos têm apartamentos de 2 e 3 quartos, a partir de R$ 300 mil. 🏠",
+    "Ótimo! ✅ Trabalhamos com financiamento facilitado e entrada parcelada 💰💸. Você pensa em morar ou investir?",
+    "Equipe de vendas 👨‍💻 pronta para te atender 👍🏽 ⚠️ vagas limitadas!",
+    "1️⃣ Reserva Garibaldi\n2️⃣ Ecolife\n3️⃣ Life Garden 🌳🏡",
+    "Sem emojis aqui, só texto comum com acentuação: ção, ã, é, ü, € e números 12345.",
+    "🎉🎉🎉 Parabéns pela escolha! 🥳 🏴󠁧󠁢󠁳󠁣󠁴󠁿 🇧🇷",
+] * 20
+
+
+def main():
+    mismatches = [
+        text for text in CORPUS
+        if remove_emojis(text) != re.sub(r"\s+", " ", MODIFIERS.sub("", legacy_remove_emojis(text))).strip()
+    ]
+
+    legacy = timeit.timeit(lambda: [legacy_remove_emojis(t) for t in CORPUS], number=ITERATIONS // 100)
+    current = timeit.timeit(lambda: [remove_emojis(t) for t in CORPUS], number=ITERATIONS // 100)
+    calls = len(CORPUS) * (ITERATIONS // 100)
+
+    print(f"Chamadas: {calls}")
+    print(f"Implementação antiga: {legacy / calls * 1e6:.2f} µs/chamada")
+    print(f"utils.emoji_sanitizer: {current / calls * 1e6:.2f} µs/chamada")
+    print(f"Ganho: {legacy / current:.1f}x")
+    print(f"Divergências no corpus: {len(mismatches)}")
+
+    for text in dict.fromkeys(mismatches):
+        print(f"  {text!r}\n    antiga: {legacy_remove_emojis(text)!r}\n    nova:   {remove_emojis(text)!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark da latência por envio: requests.post direto x sessão compartilhada.
+
+Por padrão sobe um servidor HTTP local com keep-alive e mede N POSTs em cada
+modo. Para medir contra um host real (onde o handshake TLS pesa mais), passe a
+URL: python benchmarks/http_session_benchmark.py https://exemplo.com/endpoint
+"""
+import os
+import sys
+import json
+import time
+import statistics
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from utils.http_session import get_session
+
+REQUESTS = int(os.getenv("BENCHMARK_REQUESTS", 200))
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeçalho e corpo saem em writes separados; sem TCP_NODELAY o delayed ACK
+    # adicionaria ~40ms a cada resposta na conexão keep-alive
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(send, url: str) -> list[float]:
+    payload = {"phone": "5541999999999", "message": "Mensagem de teste do benchmark"}
+    latencies = []
+
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        send(url, json=payload, timeout=10).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return latencies
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.mean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def main():
+    server = None
+
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/send-text"
+
+    results = {
+        "url": url,
+        "requests": REQUESTS,
+        "requests.post (antes)": summarize(measure(requests.post, url)),
+        "get_session().post (depois)": summarize(measure(get_session().post, url)),
+    }
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
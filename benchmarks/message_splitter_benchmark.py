@@ -0,0 +1,193 @@
+"""
+Regressão e benchmark do pipeline de quebra de respostas (utils.message_splitter).
+
+- Confere split_message contra o corpus golden em
+  benchmarks/data/message_splitter_golden.json (gerado a partir do pipeline
+  antigo do ZAPIClient).
+- Mede o caminho antigo de uma resposta no app.py (quebra de 200 caracteres do
+  ResponseProcessorService + __resolve_message do ZAPIClientService em cada
+  pedaço, com regex sem pré-compilação) contra uma única passada do pipeline novo.
+
+    python benchmarks/message_splitter_benchmark.py
+    python benchmarks/message_splitter_benchmark.py --update   # regrava o golden
+"""
+import os
+import re
+import sys
+import json
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.emoji_sanitizer import remove_emojis
+from utils.message_splitter import split_message
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "message_splitter_golden.json")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 200))
+
+
+# === Pipeline antigo (cópia de ZAPIClient/ResponseProcessorService) ===
+
+def legacy_is_question(sentence):
+    if sentence.strip().endswith('?'):
+        return True
+
+    question_words = [
+        'como', 'quando', 'onde', 'qual', 'quais', 'quanto', 'quantos', 'quantas',
+        'você', 'vocês', 'gostaria', 'gostam', 'pretende', 'pretendem',
+        'tem ', 'têm', 'possui', 'possuem', 'aceita', 'aceitam',
+        'quer', 'querem', 'deseja', 'desejam', 'pode', 'podem',
+        'seria', 'teria', 'haveria', 'estaria', 'gostaria'
+    ]
+
+    sentence_lower = sentence.lower()
+
+    return any(
+        sentence_lower.startswith(word + ' ') or
+        ' ' + word + ' ' in sentence_lower or
+        sentence_lower.startswith(word + ',') or
+        ' ' + word + ',' in sentence_lower
+        for word in question_words
+    )
+
+
+def legacy_clean_common_confirmations(message):
+    patterns_to_remove = [
+        r'Perfeito!\s*', r'Excelente!\s*', r'Ótimo!\s*', r'Entendi[,.]?\s*',
+        r'Certo[,.]?\s*', r'Tudo bem[,.]?\s*', r'Obrigad[ao] pela informação[,.]?\s*',
+        r'Vou te passar\s*', r'Deixe-me\s*', r'Vamos\s+verificar\s*', r'perfeitamente!\s*',
+    ]
+
+    cleaned = message
+    for pattern in patterns_to_remove:
+        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = re.sub(r'^[,.\s]+', '', cleaned)
+    return cleaned
+
+
+def legacy_smart_sentence_split(message):
+    parts = re.split(r'\.(?:\s+|$)', message)
+    sentences = []
+
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+
+        if '?' in part:
+            for subpart in re.split(r'\?(?:\s+|$)', part):
+                subpart = subpart.strip()
+                if subpart:
+                    sentences.append(subpart + '?' if legacy_is_question(subpart) else subpart)
+        else:
+            if part and not part.endswith(('.', '!', '?')):
+                part += '.'
+            sentences.append(part)
+
+    return [s for s in sentences if s.strip()]
+
+
+def legacy_group_sentences_smartly(sentences):
+    messages, current_group, current_length = [], [], 0
+
+    for sentence in sentences:
+        if legacy_is_question(sentence):
+            if current_group:
+                messages.append(' '.join(current_group))
+                current_group, current_length = [], 0
+            messages.append(sentence)
+        elif current_length + len(sentence) > 180 and current_group:
+            messages.append(' '.join(current_group))
+            current_group, current_length = [sentence], len(sentence)
+        else:
+            current_group.append(sentence)
+            current_length += len(sentence)
+
+    if current_group:
+        messages.append(' '.join(current_group))
+
+    return messages
+
+
+def legacy_resolve_message(message):
+    message = legacy_clean_common_confirmations(message)
+
+    if not message.strip():
+        return ["Olá! Como posso ajudar você?"]
+
+    messages = legacy_group_sentences_smartly(legacy_smart_sentence_split(message))
+    messages = [remove_emojis(msg) for msg in messages]
+    return [msg for msg in messages if msg.strip()]
+
+
+def legacy_quebrar_em_mensagens(texto):
+    texto = re.sub(r'\s+', ' ', texto.strip())
+    sentences = re.split(r'([.!?]+\s+)', texto)
+    mensagens, mensagem_atual = [], ""
+
+    for i in range(0, len(sentences), 2):
+        frase_completa = sentences[i] + (sentences[i + 1] if i + 1 < len(sentences) else "")
+
+        if len(mensagem_atual + frase_completa) > 200 and mensagem_atual:
+            mensagens.append(mensagem_atual.strip())
+            mensagem_atual = frase_completa
+        else:
+            mensagem_atual += frase_completa
+
+    if mensagem_atual.strip():
+        mensagens.append(mensagem_atual.strip())
+
+    return mensagens if mensagens else [texto]
+
+
+def legacy_reply_path(reply):
+    parts = []
+    for mensagem in legacy_quebrar_em_mensagens(reply):
+        parts.extend(legacy_resolve_message(remove_emojis(mensagem)))
+    return parts
+
+
+# === Execução ===
+
+def load_golden():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    golden = load_golden()
+
+    if "--update" in sys.argv:
+        for case in golden:
+            case["expected"] = split_message(case["input"])
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Golden atualizado: {len(golden)} casos")
+        return
+
+    failures = [case for case in golden if split_message(case["input"]) != case["expected"]]
+    legacy_mismatches = [case for case in golden if legacy_resolve_message(case["input"]) != case["expected"]]
+
+    inputs = [case["input"] for case in golden]
+    legacy = timeit.timeit(lambda: [legacy_reply_path(t) for t in inputs], number=ITERATIONS)
+    current = timeit.timeit(lambda: [split_message(t) for t in inputs], number=ITERATIONS)
+    calls = len(inputs) * ITERATIONS
+
+    print(f"Casos no golden: {len(golden)}")
+    print(f"Falhas do pipeline novo: {len(failures)}")
+    print(f"Divergências do ZAPIClient antigo: {len(legacy_mismatches)}")
+    print(f"Caminho antigo (200 chars + ZAPIClient): {legacy / calls * 1e6:.1f} µs/resposta")
+    print(f"utils.message_splitter (uma passada): {current / calls * 1e6:.1f} µs/resposta")
+    print(f"Ganho: {legacy / current:.1f}x")
+
+    for case in failures:
+        print(f"\n  {case['input']!r}\n    esperado: {case['expected']!r}\n    obtido:   {split_message(case['input'])!r}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
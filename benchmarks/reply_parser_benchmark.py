@@ -0,0 +1,222 @@
+"""
+Regressão, fuzzing e benchmark da leitura das respostas em JSON (utils.reply_parser).
+
+- Confere parse_reply contra o corpus em benchmarks/data/reply_parser_corpus.json
+  (saídas representativas do modelo: JSON válido, bloco ```json, texto antes do
+  JSON, aspas e quebras escapadas ou cruas, emojis em pares \\uXXXX, vírgulas
+  sobrando, saída cortada).
+- Mede o caminho antigo do ResponseProcessorService (_detectar_json +
+  _extrair_reply_json com json.loads + fallbacks por regex) contra uma passada
+  do parser novo.
+- Com --fuzz, corta cada resposta em todas as posições e aplica mutações
+  aleatórias, conferindo que o parser nunca lança exceção, que o JSON completo
+  volta igual ao original e que o reply de uma saída cortada é prefixo do reply
+  original, sem metade de par surrogate solta.
+
+    python benchmarks/reply_parser_benchmark.py
+    python benchmarks/reply_parser_benchmark.py --fuzz
+"""
+import os
+import re
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reply_parser import parse_reply
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "reply_parser_corpus.json")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 500))
+FUZZ_MUTATIONS = int(os.getenv("FUZZ_MUTATIONS", 20000))
+FUZZ_SEED = int(os.getenv("FUZZ_SEED", 42))
+
+
+# === Caminho antigo (cópia do ResponseProcessorService) ===
+
+def legacy_detectar_json(texto):
+    indicadores_json = ['{ "reply"', '{"reply"', '"reply":', '"c2s":', '"schedule":', '}",']
+    texto_lower = texto.lower()
+    return any(indicador.lower() in texto_lower for indicador in indicadores_json)
+
+
+def legacy_extrair_reply_json(texto):
+    try:
+        texto_limpo = re.sub(r'\s+', ' ', texto.strip())
+
+        start_pos = -1
+        for pattern in ['{ "reply"', '{"reply"']:
+            pos = texto_limpo.find(pattern)
+            if pos != -1:
+                start_pos = pos
+                break
+
+        if start_pos == -1:
+            return None
+
+        bracket_count = 0
+        end_pos = start_pos
+
+        for i, char in enumerate(texto_limpo[start_pos:], start_pos):
+            if char == '{':
+                bracket_count += 1
+            elif char == '}':
+                bracket_count -= 1
+                if bracket_count == 0:
+                    end_pos = i + 1
+                    break
+
+        json_obj = json.loads(texto_limpo[start_pos:end_pos])
+        reply = json_obj.get('reply', '').strip()
+        return reply if reply else None
+
+    except Exception:
+        return None
+
+
+def legacy_tentar_fallbacks(texto):
+    patterns = [
+        r'"reply":\s*"([^"]+)"',
+        r'"reply"\s*:\s*"([^"]+)"',
+        r'reply":\s*"([^"]+)"',
+        r'"reply":\s*\'([^\']+)\'',
+        r'"reply":\s*"([^"]*)"'
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, texto, re.IGNORECASE | re.DOTALL)
+        if match:
+            reply = match.group(1).strip()
+            if reply and len(reply) > 3:
+                return reply
+
+    if '"c2s"' in texto:
+        match = re.search(r'"([^"]{10,})"', texto.split('"c2s"')[0])
+        if match:
+            possivel_reply = match.group(1).strip()
+            if not possivel_reply.startswith('{') and len(possivel_reply) > 5:
+                return possivel_reply
+
+    for linha in texto.split('\n'):
+        linha = linha.strip().strip('"').strip("'")
+        if (len(linha) > 10 and not linha.startswith('{') and not linha.startswith('[')
+                and 'reply' not in linha.lower() and 'json' not in linha.lower()):
+            return linha
+
+    return None
+
+
+def legacy_reply(texto):
+    texto = texto.strip()
+
+    if not legacy_detectar_json(texto):
+        return texto
+
+    return legacy_extrair_reply_json(texto) or legacy_tentar_fallbacks(texto)
+
+
+# === Fuzzing ===
+
+FUZZ_ALPHABET = '{}[]",:\\ \nu0'
+
+
+def fuzz(corpus):
+    rng = random.Random(FUZZ_SEED)
+    checks = 0
+    errors = []
+
+    for case in corpus:
+        text = case["input"]
+
+        try:
+            original = json.loads(text)
+        except ValueError:
+            original = None
+
+        # JSON válido volta igual; cada corte devolve um prefixo do reply original
+        if isinstance(original, dict) and "reply" in original:
+            checks += 1
+            if parse_reply(text).fields != original:
+                errors.append((case["name"], "round-trip", text))
+
+            for end in range(len(text) + 1):
+                checks += 1
+                parsed = parse_reply(text[:end])
+                partial = parsed.fields.get("reply")
+                if parsed.is_json and isinstance(partial, str) and not original["reply"].startswith(partial):
+                    errors.append((case["name"], f"prefixo em {end}", text[:end]))
+
+                # Emojis escapados em par (\ud83d\ude00) não podem sair em metades soltas
+                if isinstance(partial, str):
+                    try:
+                        partial.encode("utf-8")
+                    except UnicodeEncodeError:
+                        errors.append((case["name"], f"surrogate solto em {end}", text[:end]))
+
+        # Mutações aleatórias: o parser nunca pode lançar exceção
+        for _ in range(FUZZ_MUTATIONS // len(corpus)):
+            chars = list(text)
+            for _ in range(rng.randint(1, 5)):
+                position = rng.randint(0, len(chars))
+                operation = rng.random()
+                if operation < 0.4 and chars:
+                    del chars[min(position, len(chars) - 1)]
+                elif operation < 0.8:
+                    chars.insert(position, rng.choice(FUZZ_ALPHABET))
+                else:
+                    chars = chars[:position]
+
+            mutated = "".join(chars)
+            checks += 1
+            try:
+                parse_reply(mutated)
+            except Exception as e:
+                errors.append((case["name"], f"exceção {e!r}", mutated))
+
+    print(f"Verificações de fuzzing: {checks}")
+    print(f"Falhas: {len(errors)}")
+
+    for name, reason, text in errors[:20]:
+        print(f"\n  [{name}] {reason}\n    {text!r}")
+
+    sys.exit(1 if errors else 0)
+
+
+# === Execução ===
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    corpus = load_corpus()
+
+    if "--fuzz" in sys.argv:
+        fuzz(corpus)
+        return
+
+    failures = [case for case in corpus if parse_reply(case["input"]).reply != case["expected_reply"]]
+    legacy_mismatches = [case for case in corpus if legacy_reply(case["input"]) != case["expected_reply"]]
+
+    inputs = [case["input"] for case in corpus]
+    legacy = timeit.timeit(lambda: [legacy_reply(t) for t in inputs], number=ITERATIONS)
+    current = timeit.timeit(lambda: [parse_reply(t) for t in inputs], number=ITERATIONS)
+    calls = len(inputs) * ITERATIONS
+
+    print(f"Casos no corpus: {len(corpus)}")
+    print(f"Falhas do parser novo: {len(failures)}")
+    print(f"Divergências do caminho antigo: {len(legacy_mismatches)} ({', '.join(c['name'] for c in legacy_mismatches)})")
+    print(f"Caminho antigo (detecção + json.loads + regex): {legacy / calls * 1e6:.1f} µs/resposta")
+    print(f"utils.reply_parser (uma passada): {current / calls * 1e6:.1f} µs/resposta")
+    print(f"Ganho: {legacy / current:.1f}x")
+
+    for case in failures:
+        print(f"\n  [{case['name']}]\n    esperado: {case['expected_reply']!r}\n    obtido:   {parse_reply(case['input']).reply!r}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Regressão e benchmark da entrega em streaming das respostas (utils.reply_stream).
+
+- Casos fixos de streams retidos ou cortados (JSON truncado, hold(), gatilho de
+  agente #N com a resposta do agente no lugar, JSON no meio de texto puro): o
+  que foi entregue durante o streaming mais o restante calculado no final deve
+  cobrir todas as sentenças do reply final, sem repetir nem perder nenhuma.
+- Cada resposta do corpus golden (benchmarks/data/message_splitter_golden.json)
+  é enviada em texto puro e em JSON, em pedaços aleatórios e cortada em pontos
+  aleatórios, com a mesma conferência. O descarte antigo (as len(delivered)
+  primeiras partes de split_message) é contado para comparação.
+- Mede o custo de um stream completo por resposta.
+
+    python benchmarks/reply_stream_benchmark.py
+"""
+import os
+import re
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.message_splitter import iter_sentences, split_message
+from utils.reply_parser import parse_reply
+from utils.reply_stream import ReplyStream
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "message_splitter_golden.json")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 200))
+FUZZ_ROUNDS = int(os.getenv("FUZZ_ROUNDS", 50))
+FUZZ_SEED = int(os.getenv("FUZZ_SEED", 42))
+
+# Mesmo padrão do services.response_orchestrator_service (lá com dependências do container)
+AGENT_TRIGGER_PATTERN = re.compile(r"#\d+")
+
+CASES = [
+    {
+        "name": "json_cortado_depois_da_primeira_parte",
+        "raw": '{"reply": "Oi João, aqui é a Eliane da Evex. Temos apartamentos de dois quartos no centro. Os valores começam em 300 mil',
+    },
+    {
+        "name": "hold_depois_da_primeira_parte",
+        "raw": '{"reply": "Oi! Sou a Eliane. O Moradas do Lago tem unidades de 2 e 3 quartos. A entrada é facilitada. Qual a sua faixa de valor?", "c2s": null}',
+        "hold_at": 60,
+    },
+    {
+        "name": "gatilho_de_agente",
+        "raw": "Oi! Vou te passar para um especialista. #2",
+        "final": "Olá, aqui é o especialista financeiro. Posso simular o seu financiamento agora. Qual a sua renda mensal?",
+    },
+    {
+        "name": "json_no_meio_de_texto",
+        "raw": 'Claro. Segue a resposta. {"reply": "Temos unidades disponíveis. Quer agendar uma visita?"}',
+    },
+]
+
+
+def sentences(parts):
+    # A pontuação final de uma frase cortada pode variar ("E qual o." x "E qual o?"): só o texto conta
+    return [" ".join(s.split()).rstrip(".?!") for part in parts for s in iter_sentences(part)]
+
+
+def run_stream(raw, hold_at=None, chunk_sizes=(7,), rng=None):
+    stream = ReplyStream(on_parts=lambda parts: None, hold_pattern=AGENT_TRIGGER_PATTERN)
+    pos = 0
+
+    while pos < len(raw):
+        size = rng.randint(1, 12) if rng else chunk_sizes[0]
+
+        if hold_at is not None and pos <= hold_at < pos + size:
+            stream.feed(raw[pos:hold_at])
+            stream.hold()
+            pos, hold_at = hold_at, None
+            continue
+
+        stream.feed(raw[pos:pos + size])
+        pos += size
+
+    return stream
+
+
+def final_reply(raw):
+    parsed = parse_reply(raw)
+    return parsed.reply if parsed.is_json and parsed.reply else raw
+
+
+def covers(delivered, rest, expected):
+    # Sem perder nem repetir sentenças; o que já saiu e não faz parte do reply
+    # final (ex.: texto antes do gatilho de agente) não tem como ser desfeito
+    total = sentences(delivered + rest)
+
+    if total == expected:
+        return True
+
+    sent = sentences(delivered)
+    return expected[:len(sent)] != sent and sentences(rest) == expected
+
+
+def check(stream, reply):
+    """(ok, ok_antigo): a entrega cobre as sentenças de split_message(reply)?"""
+    expected = sentences(split_message(reply))
+    rest = stream.finish()
+
+    if rest is None:
+        legacy_rest = split_message(reply)[len(stream.delivered):]
+        rest = stream.undelivered_parts(reply) if stream.delivered else split_message(reply)
+    else:
+        legacy_rest = rest
+
+    return (
+        covers(stream.delivered, rest, expected),
+        covers(stream.delivered, legacy_rest, expected),
+    )
+
+
+def load_golden():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        return [case["input"] for case in json.load(f)]
+
+
+def main():
+    failures = []
+    legacy_losses = 0
+
+    for case in CASES:
+        stream = run_stream(case["raw"], hold_at=case.get("hold_at"))
+        reply = case.get("final") or final_reply(case["raw"])
+        ok, legacy_ok = check(stream, reply)
+        legacy_losses += not legacy_ok
+
+        if not ok:
+            failures.append(case["name"])
+
+    rng = random.Random(FUZZ_SEED)
+    checks = 0
+
+    for text in load_golden():
+        if not text.strip():
+            continue
+
+        for raw in (text, json.dumps({"reply": text, "c2s": None}, ensure_ascii=False)):
+            for _ in range(FUZZ_ROUNDS):
+                cut = raw[:rng.randint(len(raw) // 2, len(raw))]
+                hold_at = rng.randint(0, len(cut)) if rng.random() < 0.3 else None
+                stream = run_stream(cut, hold_at=hold_at, rng=rng)
+                ok, legacy_ok = check(stream, final_reply(cut))
+                checks += 1
+                legacy_losses += not legacy_ok
+
+                if not ok:
+                    failures.append(f"golden: {cut[:40]!r} (hold_at={hold_at})")
+
+    inputs = [json.dumps({"reply": text}, ensure_ascii=False) for text in load_golden()]
+    elapsed = timeit.timeit(lambda: [run_stream(raw).finish() for raw in inputs], number=ITERATIONS)
+
+    print(f"Casos fixos: {len(CASES)}, streams aleatórios: {checks}")
+    print(f"Falhas: {len(failures)}")
+    print(f"Perdas/repetições com o descarte antigo por contagem: {legacy_losses}")
+    print(f"Stream completo (pedaços de 7 caracteres): {elapsed / (len(inputs) * ITERATIONS) * 1e6:.1f} µs/resposta")
+
+    for name in failures[:20]:
+        print(f"  {name}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import os
+import io
+import json
+from typing import Callable
+from openai import AsyncOpenAI, OpenAIError
+from openai.types.audio import Transcription
+from utils.logger import logger, to_json_dump
+from interfaces.clients.async_ai_interface import IAsyncAI
+
+
+class AsyncOpenIAClient(IAsyncAI):
+    """
+    Cliente assíncrono da OpenAI usado pelo orquestrador, agentes e tools.
+
+    Um único AsyncOpenAI (e seu pool HTTP) por processo, usado no loop do
+    worker: as chamadas de agentes e tools disparadas com asyncio.gather se
+    sobrepõem de fato, e uma resposta lenta não trava as outras conversas.
+    Como o pool fica preso ao loop em que foi usado pela primeira vez, o
+    cliente não deve ser compartilhado entre loops diferentes.
+    """
+
+    MAX_AUDIO_TRANSCRIBE_MB = int(os.getenv("OPENAI_MAX_AUDIO_TRANSCRIBE_MB", "25"))
+
+    def __init__(self):
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+        )
+        self.store_responses = os.getenv("OPENAI_STORE_RESPONSES", "true").lower() == "true"
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def _request(
+        self,
+        model: str,
+        input: str | list,
+        tools: list,
+        instructions: str | None,
+        prompt_cache_key: str | None,
+    ) -> dict:
+        return dict(
+            model=model,
+            instructions=instructions,
+            input=input,
+            tools=tools,
+            temperature=0.5,
+            top_p=1.0,
+            store=self.store_responses,
+            # Enviado via extra_body para funcionar em versões do SDK sem o parâmetro
+            extra_body=(
+                {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+            ),
+        )
+
+    async def create_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> dict:
+        try:
+            logger.info(
+                f"[OPENAI ASYNC] Criando resposta: modelo: {model}, input: \n{to_json_dump(input)}"
+            )
+
+            response = await self.client.responses.create(
+                **self._request(model, input, tools, instructions, prompt_cache_key)
+            )
+
+            return response.to_dict()
+        except OpenAIError as e:
+            logger.exception(
+                f"[OPENAI ASYNC] ❌ Erro ao criar resposta do modelo: \n{to_json_dump(e)}"
+            )
+            raise e
+
+    async def stream_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> dict:
+        try:
+            logger.info(
+                f"[OPENAI ASYNC] Criando resposta em streaming: modelo: {model}, input: \n{to_json_dump(input)}"
+            )
+
+            stream = await self.client.responses.create(
+                **self._request(model, input, tools, instructions, prompt_cache_key),
+                stream=True,
+            )
+
+            response = None
+            tool_call_started = False
+
+            async for event in stream:
+                if event.type == "response.output_item.added":
+                    # A partir de uma chamada de tool o texto não é mais repassado
+                    if event.item.type == "function_call":
+                        tool_call_started = True
+
+                elif event.type == "response.output_text.delta":
+                    if on_text_delta and not tool_call_started:
+                        on_text_delta(event.delta)
+
+                elif event.type in ("response.completed", "response.incomplete"):
+                    response = event.response
+
+                elif event.type in ("response.failed", "error"):
+                    raise OpenAIError(
+                        f"Streaming da resposta falhou: {to_json_dump(event.to_dict())}"
+                    )
+
+            if response is None:
+                raise OpenAIError("Streaming encerrado sem a resposta completa")
+
+            return response.to_dict()
+        except OpenAIError as e:
+            logger.exception(
+                f"[OPENAI ASYNC] ❌ Erro ao criar resposta do modelo em streaming: \n{to_json_dump(e)}"
+            )
+            raise e
+
+    async def function_call_output(
+        self,
+        function_call_id: str,
+        call_id: str,
+        call_name: str,
+        output: str,
+        arguments: dict,
+        model: str = "gpt-4.1-nano",
+    ) -> tuple[list, dict]:
+        logger.info(
+            f"[OPENAI ASYNC] Function call output. function_call_id: {function_call_id}, call_id: {call_id}, output: {output}"
+        )
+
+        try:
+            input = [
+                {
+                    "type": "function_call",
+                    "id": function_call_id,
+                    "call_id": call_id,
+                    "name": call_name,
+                    "arguments": json.dumps(arguments),
+                },
+                {
+                    "type": "function_call_output",
+                    "call_id": call_id,
+                    "output": output,
+                },
+            ]
+
+            response = await self.client.responses.create(
+                model=model,
+                instructions="",
+                input=input,
+                temperature=0.5,
+            )
+
+            logger.info(
+                f"[OPENAI ASYNC] Resposta do Function call output com o function_call_id {function_call_id}, call_id: {call_id}: \n{to_json_dump(response.to_dict())}"
+            )
+
+            return (input, response.to_dict())
+        except Exception as e:
+            logger.exception(
+                f"[OPENAI ASYNC] ❌ Erro ao fazer o function call output: \n{to_json_dump(e)}"
+            )
+            raise e
+
+    async def transcribe_audio(self, audio_bytes: bytes) -> str:
+        try:
+            logger.info("[OPENAI ASYNC] Transcrevendo audio...")
+
+            if len(audio_bytes) > (self.MAX_AUDIO_TRANSCRIBE_MB * 1024 * 1024):
+                raise Exception(
+                    f"[OPENAI ASYNC] O tamanho do audio é maior que {self.MAX_AUDIO_TRANSCRIBE_MB}MB"
+                )
+
+            buf = io.BytesIO(audio_bytes)
+            buf.name = "voice.ogg"
+
+            result: Transcription = await self.client.audio.transcriptions.create(
+                model="whisper-1", file=buf, language="pt"
+            )
+
+            logger.info(f"[OPENAI ASYNC] Resultado da transcrição: \n{to_json_dump(result)}")
+
+            return result.text
+        except OpenAIError as e:
+            logger.exception(
+                f"[OPENAI ASYNC] ❌ Erro ao transcrever audio: \n{to_json_dump(e)}"
+            )
+            raise e
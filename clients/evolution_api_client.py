@@ -1,9 +1,10 @@
-import requests
 import os
 import re
 import time
 import random
 import base64
+from utils.http_session import get_session
+from utils.emoji_sanitizer import remove_emojis
 from utils.logger import logger, to_json_dump
 from interfaces.clients.chat_interface import IChat
 
@@ -85,7 +86,9 @@ class EvolutionAPIClient(IChat):
         # Padrão mais sofisticado que evita dividir enumerações e algumas abreviações comuns
         sentences = re.split(r"(?<!\d|\.)\.(?:\s+|$)", message)
 
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Remove emojis mantendo as quebras de linha das listas
+        sentences = [remove_emojis(s, collapse_whitespace=False) for s in sentences]
+        sentences = [s for s in sentences if s]
 
         # Adiciona ponto final onde apropriado
         for i in range(len(sentences) - 1):
@@ -140,7 +143,7 @@ class EvolutionAPIClient(IChat):
         }
 
         try:
-            response = requests.post(url=endpoint, json=payload, headers=self._headers)
+            response = get_session().post(url=endpoint, json=payload, headers=self._headers)
             response.raise_for_status()
 
             logger.info(
@@ -175,18 +178,19 @@ class EvolutionAPIClient(IChat):
         ):
             return False
 
+        return self.send_parts(phone, self.__resolve_message(message))
+
+    def send_parts(self, phone: str, parts: list[str]) -> bool:
         url: str = self._resolve_url()
         payload: dict = {"number": self._resolve_phone(phone), "delay": 3000}
 
         try:
-            messages: str = self.__resolve_message(message)
-
-            for message in messages:
+            for message in parts:
                 if not message:
                     continue
 
                 payload["text"] = message
-                response = requests.post(url, json=payload, headers=self._headers)
+                response = get_session().post(url, json=payload, headers=self._headers)
 
                 logger.info(
                     f"[EVOLUTION] Enviando mensagem para o número {phone}: {message!r}"
@@ -2,6 +2,7 @@ import os
 import time
 import io
 import json
+from typing import Callable
 from openai import OpenAI, OpenAIError, NotGiven, NOT_GIVEN
 from enums.openai_run_status_enum import OpenaiRunStatus
 from utils.logger import logger, to_json_dump
@@ -14,8 +15,16 @@ class OpenIAClient(IAI):
 
     def __init__(self):
         self.assistant_id = os.getenv("OPENAI_ASSISTANT_ID")
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+        )
         self.max_output_tokens = int(os.getenv("OPENAI_MAX_OUTPUT_TOKENS", "1000"))
+        self.store_responses = os.getenv("OPENAI_STORE_RESPONSES", "true").lower() == "true"
+
+    def close(self) -> None:
+        self.client.close()
 
     def create_thread(self, messages: list | NotGiven = NOT_GIVEN) -> dict:
         try:
@@ -226,6 +235,7 @@ class OpenIAClient(IAI):
         input: str | list,
         tools: list = [],
         instructions: str | None = None,
+        prompt_cache_key: str | None = None,
     ) -> dict:
         try:
             logger.info(
@@ -239,7 +249,11 @@ class OpenIAClient(IAI):
                 tools=tools,
                 temperature=0.5,
                 top_p=1.0,
-                store=True,
+                store=self.store_responses,
+                # Enviado via extra_body para funcionar em versões do SDK sem o parâmetro
+                extra_body=(
+                    {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+                ),
             )
 
             return response.to_dict()
@@ -248,3 +262,62 @@ class OpenIAClient(IAI):
                 f"[OPENAI] ❌ Erro ao criar resposta do modelo: \n{to_json_dump(e)}"
             )
             raise e
+
+    def stream_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> dict:
+        try:
+            logger.info(
+                f"[OPENAI] Criando resposta em streaming: modelo: {model}, input: \n{to_json_dump(input)}"
+            )
+
+            stream = self.client.responses.create(
+                model=model,
+                instructions=instructions,
+                input=input,
+                tools=tools,
+                temperature=0.5,
+                top_p=1.0,
+                store=self.store_responses,
+                stream=True,
+                extra_body=(
+                    {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+                ),
+            )
+
+            response = None
+            tool_call_started = False
+
+            for event in stream:
+                if event.type == "response.output_item.added":
+                    # A partir de uma chamada de tool o texto não é mais repassado
+                    if event.item.type == "function_call":
+                        tool_call_started = True
+
+                elif event.type == "response.output_text.delta":
+                    if on_text_delta and not tool_call_started:
+                        on_text_delta(event.delta)
+
+                elif event.type in ("response.completed", "response.incomplete"):
+                    response = event.response
+
+                elif event.type in ("response.failed", "error"):
+                    raise OpenAIError(
+                        f"Streaming da resposta falhou: {to_json_dump(event.to_dict())}"
+                    )
+
+            if response is None:
+                raise OpenAIError("Streaming encerrado sem a resposta completa")
+
+            return response.to_dict()
+        except OpenAIError as e:
+            logger.exception(
+                f"[OPENAI] ❌ Erro ao criar resposta do modelo em streaming: \n{to_json_dump(e)}"
+            )
+            raise e
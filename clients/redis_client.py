@@ -9,41 +9,306 @@ class RedisClient(ICache):
     debounce_seconds: int = int(os.getenv("DEBOUNCE_SECONDS", 5))
     queue_key = "message_queue"
 
+    # Faz o append e empurra o expired_at em um único round trip, lendo apenas o
+    # campo do telefone (HGET) em vez do hash inteiro. Por rodar dentro do Redis,
+    # dois webhooks simultâneos do mesmo telefone não sobrescrevem um ao outro.
+    # O prazo também é gravado no sorted set de deadlines e, quando o telefone é
+    # novo na fila, o worker é acordado pela lista de sinal.
+    _ENQUEUE_SCRIPT = """
+    local current = redis.call('HGET', KEYS[1], ARGV[1])
+    local value = ARGV[2]
+
+    if current and ARGV[4] == '1' then
+        value = cjson.decode(current)['value'] .. ' ' .. value
+    end
+
+    redis.call('HSET', KEYS[1], ARGV[1], cjson.encode({value = value, expired_at = tonumber(ARGV[3])}))
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+
+    if not current then
+        redis.call('LPUSH', KEYS[3], '1')
+        redis.call('LTRIM', KEYS[3], 0, 0)
+    end
+
+    return value
+    """
+
+    # Reivindica, de forma atômica, os telefones cujo prazo já venceu. Cada
+    # telefone reivindicado fica com um lease (sorted set de leases + hash de
+    # claims com o dono). Leases vencidos, de workers que morreram ou pararam de
+    # renovar, voltam para a fila antes das mensagens novas do mesmo telefone.
+    # Um telefone com lease ativo nunca é reivindicado por outro worker, o que
+    # mantém a ordem das mensagens por telefone.
+    _CLAIM_DUE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, 100)
+    for _, phone in ipairs(expired) do
+        local claimed = redis.call('HGET', KEYS[4], phone)
+
+        if claimed then
+            local value = cjson.decode(claimed)['value']
+            local pending = redis.call('HGET', KEYS[1], phone)
+
+            if pending then
+                value = value .. ' ' .. cjson.decode(pending)['value']
+            end
+
+            redis.call('HSET', KEYS[1], phone, cjson.encode({value = value, expired_at = now}))
+            redis.call('ZADD', KEYS[2], now, phone)
+            redis.call('HDEL', KEYS[4], phone)
+        end
+
+        redis.call('ZREM', KEYS[3], phone)
+    end
+
+    local phones = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, tonumber(ARGV[2]))
+    local result = {}
+
+    for _, phone in ipairs(phones) do
+        local lease = redis.call('ZSCORE', KEYS[3], phone)
+        local raw = redis.call('HGET', KEYS[1], phone)
+
+        if lease then
+            redis.call('ZADD', KEYS[2], lease, phone)
+        elseif raw then
+            local value = cjson.decode(raw)['value']
+
+            redis.call('HDEL', KEYS[1], phone)
+            redis.call('ZREM', KEYS[2], phone)
+            redis.call('HSET', KEYS[4], phone, cjson.encode({value = value, owner = ARGV[3]}))
+            redis.call('ZADD', KEYS[3], ARGV[4], phone)
+
+            table.insert(result, phone)
+            table.insert(result, value)
+        else
+            redis.call('ZREM', KEYS[2], phone)
+        end
+    end
+
+    return result
+    """
+
+    _EXTEND_CLAIM_SCRIPT = """
+    local claimed = redis.call('HGET', KEYS[2], ARGV[1])
+
+    if not claimed or cjson.decode(claimed)['owner'] ~= ARGV[2] then
+        return 0
+    end
+
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+    """
+
+    # Libera o telefone e, se chegaram mensagens durante o processamento,
+    # devolve o prazo original delas e acorda os workers
+    _RELEASE_CLAIM_SCRIPT = """
+    local claimed = redis.call('HGET', KEYS[4], ARGV[1])
+
+    if not claimed or cjson.decode(claimed)['owner'] ~= ARGV[2] then
+        return 0
+    end
+
+    redis.call('HDEL', KEYS[4], ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[1])
+
+    local pending = redis.call('HGET', KEYS[1], ARGV[1])
+    if pending then
+        redis.call('ZADD', KEYS[2], cjson.decode(pending)['expired_at'], ARGV[1])
+        redis.call('LPUSH', KEYS[5], '1')
+        redis.call('LTRIM', KEYS[5], 0, 0)
+    end
+
+    return 1
+    """
+
     def __init__(self):
-        self._redis = redis.Redis(
+        self._pool = redis.ConnectionPool(
             host=os.getenv("REDIS_HOST", "localhost"),
             port=int(os.getenv("REDIS_PORT", "6379")),
             password=os.getenv("REDIS_PASSWORD", ""),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 20)),
             decode_responses=True,
         )
+        self._redis = redis.Redis(connection_pool=self._pool)
+        self._enqueue = self._redis.register_script(self._ENQUEUE_SCRIPT)
+        self._claim_due = self._redis.register_script(self._CLAIM_DUE_SCRIPT)
+        self._extend_claim = self._redis.register_script(self._EXTEND_CLAIM_SCRIPT)
+        self._release_claim = self._redis.register_script(self._RELEASE_CLAIM_SCRIPT)
+        self._subscribers = []
+
+    def _deadlines_key(self, queue_key: str) -> str:
+        return f"{queue_key}:deadlines"
+
+    def _signal_key(self, queue_key: str) -> str:
+        return f"{queue_key}:signal"
+
+    def _leases_key(self, queue_key: str) -> str:
+        return f"{queue_key}:leases"
+
+    def _claims_key(self, queue_key: str) -> str:
+        return f"{queue_key}:claims"
+
+    def get(self, key: str) -> str | None:
+        return self._redis.get(key)
+
+    def set(self, key: str, value: str, ttl_seconds: int | None = None) -> None:
+        self._redis.set(key, value, ex=ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(key)
+
+    def list_range(self, key: str) -> list[str] | None:
+        # EXISTS e LRANGE na mesma ida ao Redis: lista vazia e chave ausente são diferentes
+        exists, values = self._redis.pipeline().exists(key).lrange(key, 0, -1).execute()
+        return values if exists else None
+
+    def list_replace(self, key: str, values: list[str], ttl_seconds: int) -> None:
+        pipe = self._redis.pipeline()
+        pipe.delete(key)
+        if values:
+            pipe.rpush(key, *values)
+            pipe.expire(key, ttl_seconds)
+        pipe.execute()
+
+    def list_append(
+        self, key: str, values: list[str], max_len: int, ttl_seconds: int
+    ) -> bool:
+        if not values:
+            return bool(self._redis.exists(key))
+
+        # RPUSHX só grava em lista existente: uma janela incompleta nunca é criada aqui
+        pushed, _, _ = (
+            self._redis.pipeline()
+            .rpushx(key, *values)
+            .ltrim(key, -max_len, -1)
+            .expire(key, ttl_seconds)
+            .execute()
+        )
+        return bool(pushed)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._redis.publish(channel, message)
+
+    def subscribe(self, channel: str, callback) -> None:
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: callback(message["data"])})
+        self._subscribers.append(pubsub.run_in_thread(sleep_time=1, daemon=True))
 
     def add_to_queue(
         self, queue_key: str, key: str, value: str, append: bool = False
     ) -> int:
-        queue = self.get_queue(queue_key) or {}
         now = datetime.now(timezone.utc).timestamp()
         expired_at = now + self.debounce_seconds
 
-        if key in queue:
-            data = json.loads(queue[key])
-            data["expired_at"] = expired_at
-            data["value"] = f"{data['value']} {value}" if append else value
+        self._enqueue(
+            keys=[
+                queue_key,
+                self._deadlines_key(queue_key),
+                self._signal_key(queue_key),
+            ],
+            args=[key, value, expired_at, "1" if append else "0"],
+        )
 
-            self._redis.hset(queue_key, key, json.dumps(data))
-            return data["expired_at"] - now
+        return self.debounce_seconds
 
-        self._redis.hset(
-            queue_key,
-            key,
-            json.dumps({"value": value, "expired_at": expired_at}),
+    def claim_due(
+        self,
+        queue_key: str,
+        now: float,
+        owner: str,
+        lease_seconds: float,
+        limit: int = 100,
+    ) -> dict[str, str]:
+        result = self._claim_due(
+            keys=[
+                queue_key,
+                self._deadlines_key(queue_key),
+                self._leases_key(queue_key),
+                self._claims_key(queue_key),
+            ],
+            args=[now, limit, owner, now + lease_seconds],
+        )
+
+        return dict(zip(result[::2], result[1::2]))
+
+    def extend_claim(
+        self, queue_key: str, key: str, owner: str, lease_seconds: float
+    ) -> bool:
+        expires_at = datetime.now(timezone.utc).timestamp() + lease_seconds
+
+        return bool(
+            self._extend_claim(
+                keys=[self._leases_key(queue_key), self._claims_key(queue_key)],
+                args=[key, owner, expires_at],
+            )
         )
-        return self.debounce_seconds
+
+    def release_claim(self, queue_key: str, key: str, owner: str) -> bool:
+        return bool(
+            self._release_claim(
+                keys=[
+                    queue_key,
+                    self._deadlines_key(queue_key),
+                    self._leases_key(queue_key),
+                    self._claims_key(queue_key),
+                    self._signal_key(queue_key),
+                ],
+                args=[key, owner],
+            )
+        )
+
+    def get_next_deadline(self, queue_key: str) -> float | None:
+        next_item = self._redis.zrange(
+            self._deadlines_key(queue_key), 0, 0, withscores=True
+        )
+
+        return next_item[0][1] if next_item else None
+
+    def queue_size(self, queue_key: str) -> int:
+        return self._redis.zcard(self._deadlines_key(queue_key))
+
+    def count_due(self, queue_key: str, now: float) -> int:
+        return self._redis.zcount(self._deadlines_key(queue_key), "-inf", now)
+
+    def wait_for_queue(self, queue_key: str, timeout: float) -> bool:
+        # BLPOP com timeout 0 bloqueia para sempre, por isso o mínimo de 10ms
+        return bool(
+            self._redis.blpop(self._signal_key(queue_key), timeout=max(timeout, 0.01))
+        )
+
+    def sync_deadlines(self, queue_key: str) -> int:
+        """Indexa no sorted set os itens gravados no hash antes dos deadlines existirem"""
+        queue = self.get_queue(queue_key)
+        indexed = set(self._redis.zrange(self._deadlines_key(queue_key), 0, -1))
+        missing = {
+            phone: json.loads(raw)["expired_at"]
+            for phone, raw in queue.items()
+            if phone not in indexed
+        }
+
+        if missing:
+            self._redis.zadd(self._deadlines_key(queue_key), missing)
+
+        return len(missing)
 
     def get_queue(self, queue_key: str):
         return self._redis.hgetall(queue_key)
 
     def delete_queue(self, queue_key: str, keys_to_delete: list[str]):
+        self._redis.zrem(self._deadlines_key(queue_key), *keys_to_delete)
         return self._redis.hdel(queue_key, *keys_to_delete)
 
     def clear_queue(self, queue_key: str):
-        return self._redis.delete(queue_key)
+        return self._redis.delete(
+            queue_key,
+            self._deadlines_key(queue_key),
+            self._signal_key(queue_key),
+            self._leases_key(queue_key),
+            self._claims_key(queue_key),
+        )
+
+    def close(self) -> None:
+        for subscriber in self._subscribers:
+            subscriber.stop()
+        self._pool.disconnect()
@@ -1,8 +1,10 @@
-import requests
 import os
 import re
 import time
 import random
+from utils.http_session import get_session
+from utils.emoji_sanitizer import remove_emojis
+from utils.message_splitter import split_message
 from utils.logger import logger, to_json_dump
 from interfaces.clients.chat_interface import IChat
 
@@ -67,197 +69,6 @@ class ZAPIClient(IChat):
 
         return phone
 
-    def __resolve_message(self, message: str) -> list[str]:
-        """
-        Quebra mensagens de forma inteligente:
-        - Máximo 3 linhas por mensagem
-        - Remove confirmações corriqueiras  
-        - Separa perguntas em mensagens diferentes
-        - Cria fluxo mais natural e dinâmico
-        """
-        
-        # Remove confirmações corriqueiras e palavras desnecessárias
-        message = self._clean_common_confirmations(message)
-        
-        if not message.strip():
-            return ["Olá! Como posso ajudar você?"]
-        
-        # Quebra inicial por pontos e interrogações, mantendo contexto
-        sentences = self._smart_sentence_split(message)
-        
-        # Agrupa sentenças em mensagens inteligentes
-        messages = self._group_sentences_smartly(sentences)
-        
-        # Remove emojis de todas as mensagens
-        messages = [self._remove_emojis(msg) for msg in messages]
-        
-        return [msg for msg in messages if msg.strip()]
-    
-    def _smart_sentence_split(self, message: str) -> list[str]:
-        """Quebra texto de forma mais inteligente"""
-        
-        # Quebra por pontos finais, mas preserva contexto
-        parts = re.split(r'\.(?:\s+|$)', message)
-        sentences = []
-        
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
-                
-            # Se contém interrogação, quebra também por ela
-            if '?' in part:
-                subparts = re.split(r'\?(?:\s+|$)', part)
-                for subpart in subparts:
-                    subpart = subpart.strip()
-                    if subpart:
-                        # Adiciona ? se é pergunta
-                        if self._is_question(subpart):
-                            sentences.append(subpart + '?')
-                        else:
-                            sentences.append(subpart)
-            else:
-                # Adiciona ponto se necessário
-                if part and not part.endswith(('.', '!', '?')):
-                    part += '.'
-                sentences.append(part)
-        
-        return [s for s in sentences if s.strip()]
-    
-    def _group_sentences_smartly(self, sentences: list) -> list[str]:
-        """Agrupa sentenças de forma inteligente"""
-        
-        if not sentences:
-            return []
-        
-        messages = []
-        current_group = []
-        current_length = 0
-        
-        for sentence in sentences:
-            is_question = self._is_question(sentence)
-            sentence_length = len(sentence)
-            
-            # Perguntas sempre ficam sozinhas ou iniciam novo grupo
-            if is_question:
-                # Finaliza grupo atual se existe
-                if current_group:
-                    messages.append(' '.join(current_group))
-                    current_group = []
-                    current_length = 0
-                
-                # Pergunta vai sozinha
-                messages.append(sentence)
-            else:
-                # Se adicionar esta sentença vai ultrapassar ~180 chars (3 linhas), quebra
-                if current_length + sentence_length > 180 and current_group:
-                    messages.append(' '.join(current_group))
-                    current_group = [sentence]
-                    current_length = sentence_length
-                else:
-                    current_group.append(sentence)
-                    current_length += sentence_length
-        
-        # Adiciona último grupo se existe
-        if current_group:
-            messages.append(' '.join(current_group))
-        
-        return messages
-    
-    def _clean_common_confirmations(self, message: str) -> str:
-        """Remove confirmações corriqueiras e palavras desnecessárias"""
-        
-        # Padrões de confirmações corriqueiras para remover
-        patterns_to_remove = [
-            r'Perfeito!\s*',
-            r'Excelente!\s*', 
-            r'Ótimo!\s*',
-            r'Entendi[,.]?\s*',
-            r'Certo[,.]?\s*',
-            r'Tudo bem[,.]?\s*',
-            r'Obrigad[ao] pela informação[,.]?\s*',
-            r'Vou te passar\s*',
-            r'Deixe-me\s*',
-            r'Vamos\s+verificar\s*',
-            r'perfeitamente!\s*',
-        ]
-        
-        cleaned = message
-        for pattern in patterns_to_remove:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Remove espaços extras e caracteres órfãos
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        cleaned = re.sub(r'^[,.\s]+', '', cleaned)  # Remove pontuação no início
-        
-        return cleaned
-    
-    def _remove_emojis(self, message: str) -> str:
-        """Remove todos os emojis da mensagem"""
-        
-        # Padrão para detectar e remover emojis
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "😊🏢💰📍📞📌❌✅🤖⚠️📝💬🚀🎯🔥👨‍💻🏡💪🙌👏🎉💸💵💴📈📊🏠🏗️🌟⭐💯👍👎❤️💙💚🎁🎊🔔🔕📢📣📺📻📷📹🎵🎶🟢🟡🔴🟠⚡💡🔒🔓🔑🔐👥🔄"
-            "]+", flags=re.UNICODE)
-        
-        # Remove emojis e limpa espaços extras
-        cleaned = emoji_pattern.sub('', message)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        return cleaned
-    
-    def _is_question(self, sentence: str) -> bool:
-        """Identifica se uma sentença é uma pergunta"""
-        
-        # Se termina com ? é pergunta
-        if sentence.strip().endswith('?'):
-            return True
-        
-        # Palavras que indicam pergunta
-        question_words = [
-            'como', 'quando', 'onde', 'qual', 'quais', 'quanto', 'quantos', 'quantas',
-            'você', 'vocês', 'gostaria', 'gostam', 'pretende', 'pretendem', 
-            'tem ', 'têm', 'possui', 'possuem', 'aceita', 'aceitam',
-            'quer', 'querem', 'deseja', 'desejam', 'pode', 'podem',
-            'seria', 'teria', 'haveria', 'estaria', 'gostaria'
-        ]
-        
-        sentence_lower = sentence.lower()
-        
-        # Se contém palavras de pergunta no início ou meio da frase
-        return any(
-            sentence_lower.startswith(word + ' ') or 
-            ' ' + word + ' ' in sentence_lower or
-            sentence_lower.startswith(word + ',') or
-            ' ' + word + ',' in sentence_lower
-            for word in question_words
-        )
-    
-    def _finalize_message(self, sentences: list) -> str:
-        """Finaliza uma mensagem juntando as sentenças"""
-        
-        if not sentences:
-            return ""
-            
-        # Junta sentenças
-        message = ' '.join(sentences)
-        
-        # Adiciona pontuação final se necessário
-        if not re.search(r'[.!?]$', message.strip()):
-            if self._is_question(message):
-                message += '?'
-            else:
-                message += '.'
-        
-        return message.strip()
-
     def set_instance(self, instance: str, instance_key: str) -> None:
         self._instance_id = instance
         self._instance_token = instance_key
@@ -306,7 +117,7 @@ class ZAPIClient(IChat):
 
     def get_audio_bytes(self, **kwargs) -> str:
         url = self._get_audio_url(**kwargs)
-        return requests.get(url, timeout=15).content
+        return get_session().get(url, timeout=15).content
 
     def get_image_url(self, **kwargs) -> str:
         return kwargs.get("image", {}).get("imageUrl", "")
@@ -337,6 +148,10 @@ class ZAPIClient(IChat):
             )
             return False
 
+        return self.send_parts(phone, split_message(message))
+
+    def send_parts(self, phone: str, parts: list[str]) -> bool:
+        """Envia partes já quebradas pelo utils.message_splitter, sem quebrá-las de novo"""
         url = self._resolve_url() + "/send-text"
 
         headers = {**self._headers, "Client-Token": self._client_token}
@@ -344,15 +159,13 @@ class ZAPIClient(IChat):
         payload = {"phone": self._resolve_phone(phone), "delayTyping": 3}
 
         try:
-            messages = self.__resolve_message(message)
-
-            for message in messages:
+            for message in parts:
                 if not message:
                     continue
 
                 msg = message[:-1] if message.endswith(".") else message
                 payload["message"] = msg
-                response = requests.post(url, json=payload, headers=headers)
+                response = get_session().post(url, json=payload, headers=headers)
 
                 logger.info(
                     f"[Z-API] Enviando mensagem para {phone}: {msg!r} payload:\n{to_json_dump(payload)} \nresponse:{to_json_dump(response.json())}"
@@ -376,7 +189,7 @@ class ZAPIClient(IChat):
         headers = {**self._headers, "Client-Token": self._client_token}
 
         # Remove emojis da mensagem dos botões
-        clean_message = self._remove_emojis(message)
+        clean_message = remove_emojis(message)
 
         payload = {
             "phone": self._resolve_phone(phone),
@@ -392,7 +205,7 @@ class ZAPIClient(IChat):
                 logger.error(f"[Z-API] Lista de botões vazia: {phone}")
                 return
 
-            response = requests.post(url, json=payload, headers=headers)
+            response = get_session().post(url, json=payload, headers=headers)
             response.raise_for_status()
 
             logger.info(
@@ -38,6 +38,11 @@ class AgentContainer:
                         agents_id.append(agent.id)
                         self._agents.append(agent)
 
+    def reload(self) -> None:
+        """Registra novamente os agentes, para refletir mudanças de prompt ou de agentes."""
+        self._agents = []
+        self._register_agents()
+
     def get(self, id: str) -> IAgent | None:
         return next((agent for agent in self._agents if agent.id == id), None)
 
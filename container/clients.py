@@ -1,37 +1,85 @@
 import os
+import threading
+from typing import Any, Callable
 from clients.zapi_client import ZAPIClient
 from clients.evolution_api_client import EvolutionAPIClient
 from clients.openai_client import OpenIAClient
+from clients.async_openai_client import AsyncOpenIAClient
 from clients.supabase_client import SupabaseClient
 from clients.redis_client import RedisClient
 from clients.pipedrive_client import PipeDriveClient
 
 
 class ClientContainer:
+    """
+    Os clientes são singletons do processo: cada backend abre um único pool de
+    conexões (HTTP da OpenAI, pool do Redis, cliente do Supabase), compartilhado
+    por todas as instâncias do container. Após um fork os clientes são recriados
+    no processo filho, e close() libera os pools ao encerrar o worker.
+    """
+
+    _instances: dict[str, Any] = {}
+    _pid: int | None = None
+    _lock = threading.RLock()
+
+    def _singleton(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if ClientContainer._pid != os.getpid():
+                ClientContainer._instances = {}
+                ClientContainer._pid = os.getpid()
+
+            if name not in self._instances:
+                self._instances[name] = factory()
+
+            return self._instances[name]
+
     @property
     def chat(self) -> ZAPIClient:
         if os.getenv("APP_ENV") == "stage":
-            return EvolutionAPIClient()
+            return self.evolution
 
-        return ZAPIClient()
+        return self._singleton("chat", ZAPIClient)
 
     @property
     def ai(self) -> OpenIAClient:
-        return OpenIAClient()
+        return self._singleton("ai", OpenIAClient)
+
+    @property
+    def async_ai(self) -> AsyncOpenIAClient:
+        # Usado só no loop do queue worker (o pool HTTP assíncrono fica preso a um loop)
+        return self._singleton("async_ai", AsyncOpenIAClient)
 
     @property
     def database(self) -> SupabaseClient:
-        return SupabaseClient(ai_client=self.ai)
+        return self._singleton("database", lambda: SupabaseClient(ai_client=self.ai))
 
     @property
     def cache(self) -> RedisClient:
-        return RedisClient()
+        return self._singleton("cache", RedisClient)
 
     @property
     def crm(self) -> PipeDriveClient:
         # Mantido para compatibilidade, mas desabilitado
-        return PipeDriveClient()
+        return self._singleton("crm", PipeDriveClient)
 
     @property
     def evolution(self) -> EvolutionAPIClient:
-        return EvolutionAPIClient()
+        return self._singleton("evolution", EvolutionAPIClient)
+
+    async def aclose(self) -> None:
+        """Fecha os clientes assíncronos; deve rodar no loop em que eles foram usados."""
+        with self._lock:
+            clients = [
+                client for client in self._instances.values() if hasattr(client, "aclose")
+            ]
+
+        for client in clients:
+            await client.aclose()
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._instances.values():
+                if hasattr(client, "close"):
+                    client.close()
+
+            ClientContainer._instances = {}
@@ -4,6 +4,7 @@ from container.controllers import ControllerContainer
 from container.repositories import RepositoryContainer
 from container.agents import AgentContainer
 from container.tools import ToolContainer
+from utils.http_session import close_sessions
 
 
 class Container:
@@ -21,3 +22,19 @@ class Container:
             tools=self.tools,
         )
         self.controllers = ControllerContainer(services=self.services)
+
+    def reload(self) -> None:
+        """
+        Descarta os serviços e repositórios em cache e registra novamente agentes
+        e tools. Usado quando prompts ou agentes mudam com o processo no ar.
+        """
+        self.repositories.invalidate()
+        self.agents.reload()
+        self.tools.reload()
+        self.services.invalidate()
+
+    def close(self) -> None:
+        # Grava as mensagens pendentes antes de fechar o banco
+        self.repositories.close()
+        self.clients.close()
+        close_sessions()
@@ -1,19 +1,80 @@
+import os
+import threading
+from typing import Any, Callable
 from container.clients import ClientContainer
 from repositories.message_repository import MessageRepository
 from repositories.abandoned_conversation_repository import (
     AbandonedConversationRepository,
 )
+from repositories.conversation_summary_repository import (
+    ConversationSummaryRepository,
+)
+from utils.batch_writer import BatchWriter
 
 
 class RepositoryContainer:
 
     def __init__(self, clients: ClientContainer):
         self._clients = clients
+        self._instances: dict[str, Any] = {}
+        self._message_writer: BatchWriter | None = None
+        self._lock = threading.RLock()
+
+    def _cached(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+
+            return self._instances[name]
+
+    def invalidate(self) -> None:
+        # O write-behind não é descartado: as linhas pendentes e o spool seguem com ele
+        with self._lock:
+            self._instances = {}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._message_writer:
+                self._message_writer.close()
+                self._message_writer = None
 
     @property
-    def message(self):
-        return MessageRepository(database_client=self._clients.database)
+    def message(self) -> MessageRepository:
+        return self._cached(
+            "message",
+            lambda: MessageRepository(database_client=self._clients.database),
+        )
 
     @property
-    def abandoned_conversation(self):
-        return AbandonedConversationRepository(database_client=self._clients.database)
+    def abandoned_conversation(self) -> AbandonedConversationRepository:
+        return self._cached(
+            "abandoned_conversation",
+            lambda: AbandonedConversationRepository(
+                database_client=self._clients.database
+            ),
+        )
+
+    @property
+    def conversation_summary(self) -> ConversationSummaryRepository:
+        return self._cached(
+            "conversation_summary",
+            lambda: ConversationSummaryRepository(
+                database_client=self._clients.database
+            ),
+        )
+
+    @property
+    def message_writer(self) -> BatchWriter | None:
+        """Write-behind das mensagens, quando MESSAGE_WRITE_BEHIND=true."""
+        if os.getenv("MESSAGE_WRITE_BEHIND", "false").lower() != "true":
+            return None
+
+        with self._lock:
+            if self._message_writer is None:
+                self._message_writer = BatchWriter(
+                    flush_fn=self.message.create_many,
+                    name="messages",
+                    spool_dir=os.getenv("MESSAGE_SPOOL_DIR", "spool"),
+                )
+
+            return self._message_writer
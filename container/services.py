@@ -1,4 +1,7 @@
+import threading
+from typing import Any, Callable
 from services.generate_response_service import GenerateResponseService
+from services.response_dispatcher_service import ResponseDispatcherService
 from services.message_queue_service import MessageQueueService
 from container.clients import ClientContainer
 from container.repositories import RepositoryContainer
@@ -7,9 +10,17 @@ from services.unsupported_media_handler_service import UnsupportedMediaHandlerSe
 from services.response_orchestrator_service import ResponseOrchestratorService
 from container.agents import AgentContainer
 from container.tools import ToolContainer
+from utils.transcription_cache import TranscriptionCache
+from utils.context_cache import ConversationContextCache
 
 
 class ServiceContainer:
+    """
+    Os serviços são construídos uma única vez e reaproveitados entre as
+    mensagens, já que não guardam estado por telefone. Quando prompts, agentes
+    ou tools mudarem, invalidate() descarta o grafo e ele é reconstruído no
+    próximo acesso.
+    """
 
     def __init__(
         self,
@@ -22,45 +33,100 @@ class ServiceContainer:
         self._repositories = repositories
         self.agents = agents
         self.tools = tools
+        self._instances: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _cached(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+
+            return self._instances[name]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._instances = {}
 
     @property
     def generate_response_service(self) -> GenerateResponseService:
-        return GenerateResponseService(
-            chat_client=self._clients.chat,
-            message_repository=self._repositories.message,
-            response_orchestrator=self.response_orchestrator_service,
+        return self._cached(
+            "generate_response_service",
+            lambda: GenerateResponseService(
+                chat_client=self._clients.chat,
+                message_repository=self._repositories.message,
+                response_orchestrator=self.response_orchestrator_service,
+                conversation_summary_repository=self._repositories.conversation_summary,
+                message_writer=self._repositories.message_writer,
+                context_cache=self.context_cache,
+            ),
         )
 
     @property
-    def message_queue_service(self) -> MessageQueueService:
-        return MessageQueueService(
+    def context_cache(self) -> ConversationContextCache:
+        return self._cached(
+            "context_cache",
+            lambda: ConversationContextCache(cache_client=self._clients.cache),
+        )
+
+    @property
+    def response_dispatcher_service(self) -> ResponseDispatcherService:
+        # O dispatcher é do worker (pool de threads próprio) e não entra no cache;
+        # ele busca o serviço a cada mensagem, então enxerga o grafo após invalidate()
+        return ResponseDispatcherService(
+            generate_response_service_factory=lambda: self.generate_response_service,
             cache_client=self._clients.cache,
-            chat_client=self._clients.chat,
-            unsupported_media_handler=self.unsupported_media_handler_service,
-            audio_transcription_service=self.audio_transcription_service,
-            abandoned_message_repository=self._repositories.abandoned_conversation,
+        )
+
+    @property
+    def message_queue_service(self) -> MessageQueueService:
+        return self._cached(
+            "message_queue_service",
+            lambda: MessageQueueService(
+                cache_client=self._clients.cache,
+                chat_client=self._clients.chat,
+                unsupported_media_handler=self.unsupported_media_handler_service,
+                audio_transcription_service=self.audio_transcription_service,
+                abandoned_message_repository=self._repositories.abandoned_conversation,
+            ),
         )
 
     @property
     def audio_transcription_service(self) -> AudioTranscriptionService:
-        return AudioTranscriptionService(
-            chat_client=self._clients.chat,
-            ai_client=self._clients.ai,
+        return self._cached(
+            "audio_transcription_service",
+            lambda: AudioTranscriptionService(
+                chat_client=self._clients.chat,
+                ai_client=self._clients.ai,
+                transcription_cache=self.transcription_cache,
+            ),
+        )
+
+    @property
+    def transcription_cache(self) -> TranscriptionCache:
+        return self._cached(
+            "transcription_cache",
+            lambda: TranscriptionCache(cache_client=self._clients.cache),
         )
 
     @property
     def unsupported_media_handler_service(self) -> UnsupportedMediaHandlerService:
-        return UnsupportedMediaHandlerService(
-            chat_client=self._clients.chat,
-            database_client=self._clients.database,
+        return self._cached(
+            "unsupported_media_handler_service",
+            lambda: UnsupportedMediaHandlerService(
+                chat_client=self._clients.chat,
+                database_client=self._clients.database,
+            ),
         )
 
     @property
-    def response_orchestrator_service(self):
-        return ResponseOrchestratorService(
-            agent_container=self.agents,
-            tool_container=self.tools,
-            chat_client=self._clients.chat,
-            message_repository=self._repositories.message,
-            ai_client=self._clients.ai,
+    def response_orchestrator_service(self) -> ResponseOrchestratorService:
+        return self._cached(
+            "response_orchestrator_service",
+            lambda: ResponseOrchestratorService(
+                agent_container=self.agents,
+                tool_container=self.tools,
+                chat_client=self._clients.chat,
+                message_repository=self._repositories.message,
+                ai_client=self._clients.async_ai,
+            ),
         )
@@ -15,18 +15,25 @@ class ToolContainer:
     def _register_tools(self):
         self._tools = {
             "crm": CRMTool(
-                ai_client=self._clients.ai,
+                ai_client=self._clients.async_ai,
                 database_client=self._clients.database,
                 chat_client=self._clients.evolution,
             ),
             "notificar_novo_lead": NotificarNovoLeadTool(
-                ai_client=self._clients.ai,
+                ai_client=self._clients.async_ai,
                 chat_client=self._clients.evolution,
             ),
         }
 
+    def reload(self) -> None:
+        self._register_tools()
+
     def get(self, name: str) -> ITool:
         return self._tools[name]
 
     def all(self) -> list[ITool]:
         return list(self._tools.values())
+
+    async def drain(self) -> None:
+        """Conclui o trabalho agendado pelas tools; deve rodar no loop do worker."""
+        await CRMTool.drain()
@@ -6,8 +6,10 @@ from datetime import datetime, timedelta
 from container.container import Container
 from os import getenv
 from utils.logger import logger, to_json_dump
+from utils.context_window import ContextWindowBuilder
 
 container = Container()
+context_window = ContextWindowBuilder()
 
 
 def get_abandoned_conversations() -> list:
@@ -62,7 +64,7 @@ def get_context(phone: str) -> list[dict]:
         }
     ),
 
-    return context
+    return context_window.build(context)
 
 
 def save_messages_to_database(phone: str, input: dict, output: list[dict]) -> None:
@@ -70,25 +72,20 @@ def save_messages_to_database(phone: str, input: dict, output: list[dict]) -> No
         f"[GENERATE RESPONSE SERVICE] Salvando mensagens no banco de dados para o telefone: {phone} \nInput: {to_json_dump(input)} Output: \n{to_json_dump(output)}"
     )
 
-    # Salva a nova mensagem do usuário
-    container.repositories.message.create(
-        phone=phone,
-        role=input.get("role"),
-        content=input.get("content"),
-    )
+    rows = [{"phone": phone, "role": input.get("role"), "content": input.get("content")}]
 
     if not output:
         logger.warning(
             f"[GENERATE RESPONSE SERVICE] A resposta gerada está vazia para o telefone {phone}. Input: \n{to_json_dump(input)}"
         )
-        return
+    else:
+        rows.append({"phone": phone, "role": output.get("role"), "content": output.get("content")})
 
-    # Salva a resposta gerada pela IA
-    container.repositories.message.create(
-        phone=phone,
-        role=output.get("role"),
-        content=output.get("content"),
-    )
+    # Pedido e mensagem de abandono em uma única transação
+    container.repositories.message.create_many(rows)
+
+    # Gravação fora do worker: a janela em cache do telefone não vê essas linhas
+    container.services.context_cache.invalidate(phone)
 
     logger.info(
         f"[GENERATE RESPONSE SERVICE] Mensagens salvas no banco de dados para o telefone: {phone}. Input: \n{to_json_dump(input)}, output: \n{to_json_dump(output)}"
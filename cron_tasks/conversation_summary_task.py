@@ -0,0 +1,139 @@
+import json
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+from container.container import Container
+from os import getenv
+from utils.logger import logger, to_json_dump
+
+container = Container()
+
+# A cada CONVERSATION_SUMMARY_EVERY_N_MESSAGES mensagens novas fora do resumo,
+# as mais antigas são incorporadas ao resumo do telefone, mantendo sempre as
+# CONVERSATION_SUMMARY_KEEP_RECENT mais recentes fora dele. Roda fora do fluxo
+# de resposta, então a latência não cresce com o tamanho da conversa.
+KEEP_RECENT = int(getenv("CONVERSATION_SUMMARY_KEEP_RECENT", 20))
+EVERY_N_MESSAGES = int(getenv("CONVERSATION_SUMMARY_EVERY_N_MESSAGES", 20))
+BATCH_SIZE = int(getenv("CONVERSATION_SUMMARY_BATCH_SIZE", 200))
+MODEL = getenv("CONVERSATION_SUMMARY_MODEL", "gpt-4.1-mini")
+# Só conversas com mensagem nesse intervalo são conferidas; as paradas já foram
+# resumidas nas execuções anteriores e voltam quando recebem mensagem nova
+ACTIVE_HOURS = int(getenv("CONVERSATION_SUMMARY_ACTIVE_HOURS", 24))
+TOOL_OUTPUT_MAX_CHARS = 300
+
+INSTRUCTIONS = (
+    "Você mantém o resumo de um atendimento de pré-vendas de imóveis via WhatsApp. "
+    "Atualize o resumo anterior com as novas mensagens. Preserve dados do lead "
+    "(nome, interesse, faixa de valor, finalidade, forma de pagamento, prazos), "
+    "perguntas já feitas e respondidas, compromissos assumidos e o estado atual "
+    "da conversa. Responda somente com o texto do resumo, em tópicos curtos."
+)
+
+
+def format_message(message: dict) -> str:
+    role = message.get("role", "")
+    content = message.get("content", "")
+
+    if role in ["user", "assistant"]:
+        if isinstance(content, list):
+            content = " ".join(
+                part.get("text", "") for part in content if isinstance(part, dict)
+            )
+        return f"{'Lead' if role == 'user' else 'Atendente'}: {content}"
+
+    # Chamadas e saídas de tools entram resumidas
+    if isinstance(content, dict) and content.get("type") == "function_call":
+        return f"[tool {content.get('name')}({content.get('arguments', '')})]"
+
+    if isinstance(content, dict) and content.get("type") == "function_call_output":
+        output = str(content.get("output", ""))[:TOOL_OUTPUT_MAX_CHARS]
+        return f"[resultado da tool: {output}]"
+
+    return f"[{role}: {json.dumps(content, ensure_ascii=False, default=str)[:TOOL_OUTPUT_MAX_CHARS]}]"
+
+
+def summarize(previous_summary: str | None, messages: list[dict]) -> str:
+    transcript = "\n".join(format_message(message) for message in messages)
+
+    response = container.clients.ai.create_model_response(
+        model=MODEL,
+        input=[
+            {
+                "role": "user",
+                "content": (
+                    f"Resumo anterior:\n{previous_summary or '(nenhum)'}\n\n"
+                    f"Novas mensagens:\n{transcript}"
+                ),
+            }
+        ],
+        instructions=INSTRUCTIONS,
+    )
+
+    return "\n".join(
+        o.get("text", "")
+        for message in response.get("output", [])
+        if message.get("status", "") == "completed"
+        for o in message.get("content", [])
+        if o.get("type") == "output_text"
+    ).strip()
+
+
+def summarize_phone(phone: str) -> None:
+    summary = container.repositories.conversation_summary.find(phone)
+    after_id = summary.get("last_message_id") if summary else None
+    previous_summary = summary.get("summary") if summary else None
+
+    messages = container.repositories.message.get_messages_to_summarize(
+        phone=phone,
+        after_id=after_id,
+        keep_recent=KEEP_RECENT,
+        limit=BATCH_SIZE,
+    )
+
+    if not messages:
+        return
+
+    new_summary = summarize(previous_summary, messages)
+
+    if not new_summary:
+        logger.warning(
+            f"[CONVERSATION SUMMARY TASK] Resumo vazio para o telefone {phone}, mantendo o anterior"
+        )
+        return
+
+    container.repositories.conversation_summary.upsert(
+        phone=phone,
+        summary=new_summary,
+        last_message_id=messages[-1]["id"],
+    )
+
+    # O próximo turno remonta a janela a partir do novo last_message_id
+    container.services.context_cache.invalidate(phone)
+
+    logger.info(
+        f"[CONVERSATION SUMMARY TASK] {len(messages)} mensagens incorporadas ao resumo do telefone {phone}: {to_json_dump(new_summary)}"
+    )
+
+
+def main():
+    phones = container.repositories.message.get_summarization_candidates(
+        min_pending_messages=KEEP_RECENT + EVERY_N_MESSAGES,
+        active_since=datetime.now() - timedelta(hours=ACTIVE_HOURS),
+    )
+
+    if not phones:
+        logger.info("[CONVERSATION SUMMARY TASK] Nenhuma conversa para resumir.")
+        return
+
+    for phone in phones:
+        try:
+            summarize_phone(phone)
+        except Exception as e:
+            logger.exception(
+                f"[CONVERSATION SUMMARY TASK] ❌ Erro ao resumir a conversa do telefone {phone}: {to_json_dump(e)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+-- Resumo incremental por telefone, mantido pelo cron_tasks/conversation_summary_task.py.
+-- As mensagens com id <= last_message_id já estão no resumo e não são mais
+-- enviadas ao modelo; o contexto vira resumo + cauda recente.
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    id SERIAL PRIMARY KEY,
+    phone VARCHAR NOT NULL UNIQUE,
+    summary TEXT NOT NULL,
+    last_message_id INTEGER NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,11 @@
+-- Dados do lead usados no prompt (Supabase), mantidos pelo src/services/lead_data_service.py.
+-- As gravações chegam em lote pelo write-behind, como upsert por telefone.
+CREATE TABLE IF NOT EXISTS lead_data (
+    phone VARCHAR PRIMARY KEY,
+    nome VARCHAR,
+    email VARCHAR,
+    empreendimento VARCHAR,
+    faixa_valor VARCHAR,
+    id_anuncio VARCHAR,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,68 @@
+-- Busca de conversas abandonadas (cron_tasks/abandoned_conversation_task.py) sem
+-- varrer a tabela messages: em vez de max(created_at) por telefone e de um
+-- ILIKE '%function_call%' sobre todo o conteúdo, o cron lê conversation_activity,
+-- uma linha por telefone mantida pelo trigger a cada INSERT em messages.
+
+-- Marca gravada pelo MessageRepository junto com a mensagem
+ALTER TABLE messages
+    ADD COLUMN IF NOT EXISTS has_function_call BOOLEAN NOT NULL DEFAULT false;
+
+-- Histórico por telefone e papel (contexto, resumo e conferências pontuais)
+CREATE INDEX IF NOT EXISTS ix_messages_phone_role_created_at
+    ON messages (phone, role, created_at);
+
+CREATE TABLE IF NOT EXISTS conversation_activity (
+    phone VARCHAR PRIMARY KEY,
+    last_assistant_at TIMESTAMP,
+    has_function_call BOOLEAN NOT NULL DEFAULT false
+);
+
+-- Só conversas sem function_call entram na busca do cron
+CREATE INDEX IF NOT EXISTS ix_conversation_activity_last_assistant_at
+    ON conversation_activity (last_assistant_at)
+    WHERE NOT has_function_call;
+
+CREATE OR REPLACE FUNCTION track_conversation_activity() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO conversation_activity (phone, last_assistant_at, has_function_call)
+    VALUES (
+        NEW.phone,
+        CASE WHEN NEW.role = 'assistant' THEN NEW.created_at END,
+        NEW.has_function_call
+    )
+    ON CONFLICT (phone) DO UPDATE SET
+        -- GREATEST ignora NULL: mensagens que não são do assistente não mexem no horário
+        last_assistant_at = GREATEST(
+            conversation_activity.last_assistant_at, EXCLUDED.last_assistant_at
+        ),
+        has_function_call = conversation_activity.has_function_call
+            OR EXCLUDED.has_function_call;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS messages_track_conversation_activity ON messages;
+CREATE TRIGGER messages_track_conversation_activity
+    AFTER INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION track_conversation_activity();
+
+-- Carga inicial, uma única vez, a partir do histórico existente
+UPDATE messages
+SET has_function_call = true
+WHERE NOT has_function_call
+  AND (role IN ('function_call', 'function_call_output') OR content ILIKE '%function_call%');
+
+INSERT INTO conversation_activity (phone, last_assistant_at, has_function_call)
+SELECT
+    phone,
+    max(created_at) FILTER (WHERE role = 'assistant'),
+    bool_or(has_function_call)
+FROM messages
+GROUP BY phone
+ON CONFLICT (phone) DO UPDATE SET
+    last_assistant_at = GREATEST(
+        conversation_activity.last_assistant_at, EXCLUDED.last_assistant_at
+    ),
+    has_function_call = conversation_activity.has_function_call
+        OR EXCLUDED.has_function_call;
@@ -0,0 +1,56 @@
+-- Busca de conversas para resumir (cron_tasks/conversation_summary_task.py) sem
+-- agrupar a tabela messages inteira: o cron parte de conversation_activity,
+-- só dos telefones com mensagem recente e com mensagens depois do resumo, e
+-- conta as pendentes de cada um pelo índice (phone, id).
+
+ALTER TABLE conversation_activity
+    ADD COLUMN IF NOT EXISTS last_message_id INTEGER,
+    ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_conversation_activity_last_message_at
+    ON conversation_activity (last_message_at);
+
+-- Mensagens de um telefone depois de um id (resumo, contexto e contagem de pendentes)
+CREATE INDEX IF NOT EXISTS ix_messages_phone_id
+    ON messages (phone, id);
+
+CREATE OR REPLACE FUNCTION track_conversation_activity() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO conversation_activity (
+        phone, last_assistant_at, has_function_call, last_message_id, last_message_at
+    )
+    VALUES (
+        NEW.phone,
+        CASE WHEN NEW.role = 'assistant' THEN NEW.created_at END,
+        NEW.has_function_call,
+        NEW.id,
+        NEW.created_at
+    )
+    ON CONFLICT (phone) DO UPDATE SET
+        -- GREATEST ignora NULL: mensagens que não são do assistente não mexem no horário
+        last_assistant_at = GREATEST(
+            conversation_activity.last_assistant_at, EXCLUDED.last_assistant_at
+        ),
+        has_function_call = conversation_activity.has_function_call
+            OR EXCLUDED.has_function_call,
+        last_message_id = GREATEST(
+            conversation_activity.last_message_id, EXCLUDED.last_message_id
+        ),
+        last_message_at = GREATEST(
+            conversation_activity.last_message_at, EXCLUDED.last_message_at
+        );
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carga inicial, uma única vez, a partir do histórico existente
+UPDATE conversation_activity
+SET last_message_id = latest.last_message_id,
+    last_message_at = latest.last_message_at
+FROM (
+    SELECT phone, max(id) AS last_message_id, max(created_at) AS last_message_at
+    FROM messages
+    GROUP BY phone
+) AS latest
+WHERE conversation_activity.phone = latest.phone;
@@ -1 +1,3 @@
 from .message_model import Message
+from .conversation_summary_model import ConversationSummary
+from .conversation_activity_model import ConversationActivity
@@ -0,0 +1,28 @@
+from database.config import Base
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, false
+from database.mixins.serializable_mixin import SerializableMixin
+
+
+class ConversationActivity(Base, SerializableMixin):
+    # Uma linha por telefone, mantida pelo trigger de INSERT em messages
+    # (database/migrations/003_index_abandoned_conversations.sql e 004)
+    __tablename__ = "conversation_activity"
+
+    phone = Column(String, primary_key=True)
+    last_assistant_at = Column(DateTime, nullable=True)
+    has_function_call = Column(
+        Boolean, server_default=false(), nullable=False
+    )
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime, nullable=True, index=True)
+
+    def to_dict(self) -> dict:
+        data = {
+            "phone": self.phone,
+            "last_assistant_at": self.last_assistant_at,
+            "has_function_call": self.has_function_call,
+            "last_message_id": self.last_message_id,
+            "last_message_at": self.last_message_at,
+        }
+
+        return data
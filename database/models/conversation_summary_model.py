@@ -0,0 +1,28 @@
+from database.config import Base
+from sqlalchemy import Column, Integer, Text, String
+from sqlalchemy import DateTime, func
+from database.mixins.serializable_mixin import SerializableMixin
+
+
+class ConversationSummary(Base, SerializableMixin):
+    __tablename__ = "conversation_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    phone = Column(String, nullable=False, unique=True)
+    summary = Column(Text, nullable=False)
+    # Última mensagem (messages.id) já incorporada ao resumo
+    last_message_id = Column(Integer, nullable=False)
+    updated_at = Column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    def to_dict(self) -> dict:
+        data = {
+            "id": self.id,
+            "phone": self.phone,
+            "summary": self.summary,
+            "last_message_id": self.last_message_id,
+            "updated_at": self.updated_at,
+        }
+
+        return data
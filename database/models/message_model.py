@@ -1,19 +1,25 @@
 import json
 from database.config import Base
-from sqlalchemy import Column, Integer, Text, String
-from sqlalchemy import DateTime, func
+from sqlalchemy import Column, Integer, Text, String, Boolean, Index
+from sqlalchemy import DateTime, func, false
 from sqlalchemy.orm import relationship
 from database.mixins.serializable_mixin import SerializableMixin
 
 
 class Message(Base, SerializableMixin):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_phone_role_created_at", "phone", "role", "created_at"),
+        Index("ix_messages_phone_id", "phone", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     phone = Column(String, nullable=False)
     role = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Gravado na inserção para o cron de abandono não precisar varrer o conteúdo
+    has_function_call = Column(Boolean, server_default=false(), nullable=False)
 
     def to_dict(self) -> dict:
         data = {
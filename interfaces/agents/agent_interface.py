@@ -47,6 +47,7 @@ class IAgent(ABC):
     @abstractmethod
     def factory(client_container, repository_container) -> "IAgent": ...
 
+    # Roda no loop do queue worker: chamadas à OpenAI devem usar client_container.async_ai
     @abstractmethod
     async def execute(self, phone: str, context: list) -> list[dict]: ...
 
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Callable
 
 
 class IAI(ABC):
@@ -48,5 +49,22 @@ class IAI(ABC):
         input: str | list,
         tools: list = [],
         instructions: str | None = None,
+        prompt_cache_key: str | None = None,
     ) -> dict:
         pass
+
+    @abstractmethod
+    def stream_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> dict:
+        """
+        Same as create_model_response, streaming the output text to on_text_delta
+        as it is generated. Returns the completed response.
+        """
+        pass
@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+
+class IAsyncAI(ABC):
+    """Async counterpart of IAI for code running on the worker event loop."""
+
+    @abstractmethod
+    async def create_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+    ) -> dict:
+        pass
+
+    @abstractmethod
+    async def stream_model_response(
+        self,
+        model: str,
+        input: str | list,
+        tools: list = [],
+        instructions: str | None = None,
+        prompt_cache_key: str | None = None,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> dict:
+        pass
+
+    @abstractmethod
+    async def function_call_output(
+        self,
+        function_call_id: str,
+        call_id: str,
+        call_name: str,
+        output: str,
+        arguments: dict,
+        model: str = "gpt-4.1-nano",
+    ) -> tuple[list, dict]:
+        pass
+
+    @abstractmethod
+    async def transcribe_audio(self, audio_bytes: bytes) -> str:
+        pass
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        pass
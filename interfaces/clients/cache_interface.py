@@ -3,6 +3,51 @@ from abc import ABC, abstractmethod
 
 class ICache(ABC):
 
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        """Lê um valor simples do cache, ou None se não existir/expirou."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: int | None = None) -> None:
+        """Grava um valor simples no cache, expirando após ttl_seconds."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove um valor simples do cache."""
+        pass
+
+    @abstractmethod
+    def list_range(self, key: str) -> list[str] | None:
+        """Lê a lista inteira, ou None se a chave não existir."""
+        pass
+
+    @abstractmethod
+    def list_replace(self, key: str, values: list[str], ttl_seconds: int) -> None:
+        """Substitui a lista pelos valores, expirando após ttl_seconds."""
+        pass
+
+    @abstractmethod
+    def list_append(
+        self, key: str, values: list[str], max_len: int, ttl_seconds: int
+    ) -> bool:
+        """
+        Acrescenta os valores ao fim da lista, mantendo só os max_len últimos.
+        Só grava se a lista já existir; retorna False quando não existe.
+        """
+        pass
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Publica uma mensagem para todos os processos inscritos no canal."""
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback) -> None:
+        """Chama callback(message) em segundo plano a cada mensagem publicada no canal."""
+        pass
+
     @abstractmethod
     def get_queue(self, queue_key: str):
         pass
@@ -16,3 +61,50 @@ class ICache(ABC):
     @abstractmethod
     def delete_queue(self, queue_key: str, keys_to_delete: list[str]):
         pass
+
+    @abstractmethod
+    def claim_due(
+        self,
+        queue_key: str,
+        now: float,
+        owner: str,
+        lease_seconds: float,
+        limit: int = 100,
+    ) -> dict[str, str]:
+        """
+        Reivindica os itens da fila cujo prazo de debounce já venceu, com um lease
+        de lease_seconds em nome de owner. Itens com lease vencido voltam para a fila.
+        """
+        pass
+
+    @abstractmethod
+    def extend_claim(
+        self, queue_key: str, key: str, owner: str, lease_seconds: float
+    ) -> bool:
+        """Renova o lease de um item reivindicado. Retorna False se o lease foi perdido."""
+        pass
+
+    @abstractmethod
+    def release_claim(self, queue_key: str, key: str, owner: str) -> bool:
+        """Finaliza o processamento de um item reivindicado."""
+        pass
+
+    @abstractmethod
+    def get_next_deadline(self, queue_key: str) -> float | None:
+        """Retorna o timestamp do próximo prazo da fila, ou None se estiver vazia."""
+        pass
+
+    @abstractmethod
+    def wait_for_queue(self, queue_key: str, timeout: float) -> bool:
+        """Bloqueia até um novo item entrar na fila ou o timeout expirar."""
+        pass
+
+    @abstractmethod
+    def queue_size(self, queue_key: str) -> int:
+        """Quantidade de telefones aguardando na fila."""
+        pass
+
+    @abstractmethod
+    def count_due(self, queue_key: str, now: float) -> int:
+        """Quantidade de telefones com prazo vencido aguardando na fila."""
+        pass
@@ -11,6 +11,11 @@ class IChat(ABC):
     def send_message(self, phone: str, message: str) -> bool:
         pass
 
+    @abstractmethod
+    def send_parts(self, phone: str, parts: list[str]) -> bool:
+        """Envia partes de mensagem já quebradas, na ordem, sem quebrá-las de novo."""
+        pass
+
     @abstractmethod
     def get_message(self, **kwargs) -> str:
         pass
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Callable
 
 
 class IResponseOrchestrator(ABC):
@@ -19,4 +20,9 @@ class IResponseOrchestrator(ABC):
     def system_prompt(self) -> dict: ...
 
     @abstractmethod
-    def execute(self, context: list, phone: str) -> list[dict]: ...
+    def execute(
+        self,
+        context: list,
+        phone: str,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> list[dict]: ...
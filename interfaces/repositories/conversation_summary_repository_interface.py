@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+
+
+class IConversationSummaryRepository(ABC):
+    @abstractmethod
+    def find(self, phone: str) -> dict | None:
+        """Retrieve the rolling summary for a given phone number."""
+        pass
+
+    @abstractmethod
+    def upsert(self, phone: str, summary: str, last_message_id: int) -> dict:
+        """Create or replace the summary, recording the last message folded into it."""
+        pass
@@ -10,11 +10,25 @@ class IMessageRepository(ABC):
 
     @abstractmethod
     def get_latest_customer_messages(
-        self, phone: int | None = None, limit: int = 20
+        self, phone: int | None = None, limit: int = 20, after_id: int | None = None
     ) -> list:
         """Retrieve the latest message for a given phone number."""
         pass
 
+    @abstractmethod
+    def get_messages_to_summarize(
+        self, phone: str, after_id: int | None, keep_recent: int, limit: int
+    ) -> list:
+        """Retrieve, oldest first, the messages after after_id that are not in the recent tail."""
+        pass
+
+    @abstractmethod
+    def get_summarization_candidates(
+        self, min_pending_messages: int, active_since: datetime
+    ) -> list:
+        """Retrieve the phone numbers active since active_since with at least min_pending_messages outside the summary."""
+        pass
+
     @abstractmethod
     def get_abandoned_conversation_numbers(
         self,
@@ -27,3 +41,8 @@ class IMessageRepository(ABC):
     def create(self, phone: str, role: str, content: str | list) -> dict:
         """Create a new message."""
         pass
+
+    @abstractmethod
+    def create_many(self, messages: list[dict]) -> list[dict]:
+        """Create several messages ({phone, role, content}) in a single transaction."""
+        pass
@@ -0,0 +1,35 @@
+from interfaces.repositories.conversation_summary_repository_interface import (
+    IConversationSummaryRepository,
+)
+from database.models.conversation_summary_model import ConversationSummary
+from interfaces.clients.database_interface import IDatabase
+
+
+class ConversationSummaryRepository(IConversationSummaryRepository):
+    def __init__(self, database_client: IDatabase):
+        self.db = database_client
+
+    def find(self, phone: str) -> dict | None:
+        with self.db.get_session() as session:
+            summary = session.query(ConversationSummary).filter_by(phone=phone).first()
+            return summary.to_dict() if summary else None
+
+    def upsert(self, phone: str, summary: str, last_message_id: int) -> dict:
+        with self.db.get_session() as session:
+            conversation_summary = (
+                session.query(ConversationSummary).filter_by(phone=phone).first()
+            )
+
+            if conversation_summary:
+                conversation_summary.summary = summary
+                conversation_summary.last_message_id = last_message_id
+            else:
+                conversation_summary = ConversationSummary(
+                    phone=phone,
+                    summary=summary,
+                    last_message_id=last_message_id,
+                )
+                session.add(conversation_summary)
+
+            session.flush()
+            return conversation_summary.to_dict()
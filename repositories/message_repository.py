@@ -1,11 +1,21 @@
 import json
 from interfaces.repositories.message_repository_interface import IMessageRepository
 from database.models.message_model import Message
+from database.models.conversation_summary_model import ConversationSummary
+from database.models.conversation_activity_model import ConversationActivity
 from interfaces.clients.database_interface import IDatabase
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, not_, select, exists
 
 
+FUNCTION_CALL_ROLES = ("function_call", "function_call_output")
+
+
+def _has_function_call(role: str, content: str) -> bool:
+    # Mesmo critério do antigo ILIKE '%function_call%', agora avaliado só na inserção
+    return role in FUNCTION_CALL_ROLES or "function_call" in content.lower()
+
+
 class MessageRepository(IMessageRepository):
     def __init__(self, database_client: IDatabase):
         self.db = database_client
@@ -16,14 +26,16 @@ class MessageRepository(IMessageRepository):
             return [message for message in messages] or []
 
     def get_latest_customer_messages(
-        self, phone: int | None = None, limit: int = 20
+        self, phone: int | None = None, limit: int = 20, after_id: int | None = None
     ) -> list:
         with self.db.get_session() as session:
-            query = (
-                session.query(Message)
-                .filter_by(phone=phone)
-                .order_by(Message.id.desc())
-            )
+            query = session.query(Message).filter_by(phone=phone)
+
+            # Mensagens até after_id já estão no resumo da conversa
+            if after_id:
+                query = query.filter(Message.id > after_id)
+
+            query = query.order_by(Message.id.desc())
 
             if limit:
                 query = query.limit(limit)
@@ -32,45 +44,118 @@ class MessageRepository(IMessageRepository):
 
             return [message.to_dict() for message in messages] or []
 
-    def get_abandoned_conversation_numbers(self, until_time: datetime) -> list:
-        max_time = until_time - timedelta(hours=1)
+    def get_messages_to_summarize(
+        self, phone: str, after_id: int | None, keep_recent: int, limit: int
+    ) -> list:
+        with self.db.get_session() as session:
+            query = session.query(Message.id).filter(Message.phone == phone)
+
+            if after_id:
+                query = query.filter(Message.id > after_id)
+
+            # As keep_recent mensagens mais novas continuam fora do resumo
+            cutoff_id = (
+                query.order_by(Message.id.desc()).offset(keep_recent).limit(1).scalar()
+            )
+
+            if cutoff_id is None:
+                return []
+
+            messages_query = session.query(Message).filter(
+                Message.phone == phone, Message.id <= cutoff_id
+            )
+
+            if after_id:
+                messages_query = messages_query.filter(Message.id > after_id)
+
+            messages = messages_query.order_by(Message.id.asc()).limit(limit).all()
 
+            return [message.to_dict() for message in messages]
+
+    def get_summarization_candidates(
+        self, min_pending_messages: int, active_since: datetime
+    ) -> list:
+        # Parte de conversation_activity (índice em last_message_at), não do histórico
+        # inteiro: só conversas com mensagem desde active_since e depois do resumo
         with self.db.get_session() as session:
-            # Subquery: última mensagem assistant por número
-            last_assistant = (
+            after_id = func.coalesce(ConversationSummary.last_message_id, 0)
+            active = (
                 session.query(
-                    Message.phone,
-                    func.max(Message.created_at).label("last_assistant_time"),
+                    ConversationActivity.phone.label("phone"),
+                    after_id.label("after_id"),
+                )
+                .outerjoin(
+                    ConversationSummary,
+                    ConversationSummary.phone == ConversationActivity.phone,
+                )
+                .filter(
+                    ConversationActivity.last_message_at >= active_since,
+                    ConversationActivity.last_message_id > after_id,
                 )
-                .filter(Message.role == "assistant")
-                .group_by(Message.phone)
                 .subquery()
             )
 
-            # Subquery: números que possuem mensagens com "function_call"
-            has_function_call = (
+            # As pendentes de cada uma saem do índice (phone, id)
+            query = (
                 session.query(Message.phone)
-                .filter(Message.content.ilike("%function_call%"))
-                .distinct()
-                .subquery()
+                .join(
+                    active,
+                    and_(Message.phone == active.c.phone, Message.id > active.c.after_id),
+                )
+                .group_by(Message.phone)
+                .having(func.count(Message.id) >= min_pending_messages)
             )
 
-            # Query final: seleciona números com última mensagem de assistente entre 5h e 6h atrás e sem function_call
-            query = session.query(last_assistant.c.phone).filter(
-                last_assistant.c.last_assistant_time <= until_time,
-                last_assistant.c.last_assistant_time >= max_time,
-                ~last_assistant.c.phone.in_(select(has_function_call.c.phone)),
+            return session.execute(query).scalars().all() or []
+
+    def get_abandoned_conversation_numbers(self, until_time: datetime) -> list:
+        max_time = until_time - timedelta(hours=1)
+
+        # conversation_activity (uma linha por telefone, mantida por trigger) usa o
+        # índice parcial em last_assistant_at: o custo não cresce com o histórico
+        with self.db.get_session() as session:
+            query = session.query(ConversationActivity.phone).filter(
+                ConversationActivity.last_assistant_at <= until_time,
+                ConversationActivity.last_assistant_at >= max_time,
+                # NOT has_function_call, igual ao predicado do índice parcial: com
+                # IS false o Postgres não usa o índice e volta ao seq scan
+                not_(ConversationActivity.has_function_call),
             )
 
-            messages = session.execute(query).scalars().all()
-            return messages or []
+            phones = session.execute(query).scalars().all()
+            return phones or []
 
     def create(self, phone: str, role: str, content: str | list) -> dict:
         with self.db.get_session() as session:
+            content = content if isinstance(content, str) else json.dumps(content)
             message = Message(
                 phone=phone,
                 role=role,
-                content=content if isinstance(content, str) else json.dumps(content),
+                content=content,
+                has_function_call=_has_function_call(role, content),
             )
             session.add(message)
             return message.to_dict()
+
+    def create_many(self, messages: list[dict]) -> list[dict]:
+        # Um turno inteiro (ou um lote do write-behind) em uma sessão e um commit
+        with self.db.get_session() as session:
+            rows = []
+
+            for message in messages:
+                content = (
+                    message["content"]
+                    if isinstance(message["content"], str)
+                    else json.dumps(message["content"])
+                )
+                rows.append(
+                    Message(
+                        phone=message["phone"],
+                        role=message["role"],
+                        content=content,
+                        has_function_call=_has_function_call(message["role"], content),
+                    )
+                )
+
+            session.add_all(rows)
+            return [row.to_dict() for row in rows]
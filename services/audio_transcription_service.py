@@ -1,12 +1,19 @@
 from interfaces.clients.chat_interface import IChat
 from interfaces.clients.ai_interface import IAI
+from utils.transcription_cache import TranscriptionCache
 from utils.logger import logger, to_json_dump
 
 
 class AudioTranscriptionService:
-    def __init__(self, chat_client: IChat, ai_client: IAI):
+    def __init__(
+        self,
+        chat_client: IChat,
+        ai_client: IAI,
+        transcription_cache: TranscriptionCache | None = None,
+    ):
         self.chat = chat_client
         self.ai = ai_client
+        self.transcription_cache = transcription_cache
 
     def transcribe(self, **kwargs: dict) -> str | None:
         if not self.chat.is_audio_message(**kwargs):
@@ -14,7 +21,24 @@ class AudioTranscriptionService:
 
         try:
             audio_bytes = self.chat.get_audio_bytes(**kwargs)
-            return self.ai.transcribe_audio(audio_bytes=audio_bytes)
+
+            if not self.transcription_cache:
+                return self.ai.transcribe_audio(audio_bytes=audio_bytes)
+
+            # Áudio encaminhado ou webhook repetido: mesmos bytes, mesma transcrição
+            key = self.transcription_cache.key_for_bytes(audio_bytes)
+            cached = self.transcription_cache.get(key)
+
+            if cached is not None:
+                logger.info(
+                    "[AUDIO TRANSCRIPTION SERVICE] Transcrição encontrada no cache"
+                )
+                return cached
+
+            text = self.ai.transcribe_audio(audio_bytes=audio_bytes)
+            self.transcription_cache.set([key], text)
+
+            return text
         except Exception as e:
             logger.error(
                 f"[AUDIO TRANSCRIPTION SERVICE] Falha ao transcrever o áudio: {to_json_dump(e)}"
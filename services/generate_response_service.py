@@ -1,12 +1,23 @@
 import os
 import re
 import json
+import asyncio
 from interfaces.clients.chat_interface import IChat
 from utils.logger import logger, to_json_dump
+from utils.context_window import ContextWindowBuilder
+from utils.message_splitter import split_message
+from utils.reply_stream import ReplyStream
+from utils.reply_parser import parse_reply
+from utils.batch_writer import BatchWriter
+from utils.context_cache import ConversationContextCache
 from interfaces.repositories.message_repository_interface import IMessageRepository
+from interfaces.repositories.conversation_summary_repository_interface import (
+    IConversationSummaryRepository,
+)
 from interfaces.orchestrators.response_orchestrator_interface import (
     IResponseOrchestrator,
 )
+from services.response_orchestrator_service import AGENT_TRIGGER_PATTERN
 
 
 class GenerateResponseService:
@@ -16,10 +27,20 @@ class GenerateResponseService:
         chat_client: IChat,
         message_repository: IMessageRepository,
         response_orchestrator: IResponseOrchestrator,
+        conversation_summary_repository: IConversationSummaryRepository | None = None,
+        message_writer: BatchWriter | None = None,
+        context_cache: ConversationContextCache | None = None,
     ) -> None:
         self.chat = chat_client
         self.message_repository = message_repository
+        self.message_writer = message_writer
+        self.context_cache = context_cache
+        self.conversation_summary_repository = conversation_summary_repository
         self.response_orchestrator = response_orchestrator
+        self.context_window = ContextWindowBuilder()
+        self.stream_responses = (
+            os.getenv("OPENAI_STREAM_RESPONSES", "false").lower() == "true"
+        )
 
     def _resolve_output_content(self, outputs: list | dict) -> str:
         logger.info(
@@ -132,72 +153,180 @@ class GenerateResponseService:
                 None,
             )
 
-            self.message_repository.create(
-                phone=phone,
-                role=input.get("role"),
-                content=f"{input_text} (um {input_type} foi enviado anteriormente)",
-            )
+            content = f"{input_text} (um {input_type} foi enviado anteriormente)"
 
-        else:
-            self.message_repository.create(
-                phone=phone,
-                role=input.get("role"),
-                content=content,
-            )
+        rows = [{"phone": phone, "role": input.get("role"), "content": content}]
 
         if not outputs:
             logger.warning(
                 f"[GENERATE RESPONSE SERVICE] A resposta gerada está vazia para o telefone {phone}. Input: \n{to_json_dump(input)}"
             )
-            return
 
         # Salva a resposta gerada pela IA
-        for output in outputs:
+        for output in outputs or []:
             if output.get("type", "") in ["function_call", "function_call_output"]:
-                self.message_repository.create(
-                    phone=phone,
-                    role=output.get("type"),
-                    content=output,
-                )
+                rows.append({"phone": phone, "role": output.get("type"), "content": output})
                 continue
 
-            self.message_repository.create(
-                phone=phone,
-                role=output.get("role"),
-                content=output.get("content"),
+            rows.append(
+                {"phone": phone, "role": output.get("role"), "content": output.get("content")}
             )
 
+        # Com write-behind o turno entra no próximo lote; sem ele, vai em uma única transação
+        if self.message_writer:
+            for row in rows:
+                self.message_writer.put(row, key=phone)
+        else:
+            self.message_repository.create_many(rows)
+
+        # A janela em cache recebe o turno já salvo (pendente ou não no write-behind)
+        if self.context_cache:
+            self.context_cache.append(phone, rows)
+
         logger.info(
-            f"[GENERATE RESPONSE SERVICE] Mensagens salvas no banco de dados para o telefone: {phone}. Input: \n{to_json_dump(input)}, output: \n{to_json_dump(output)}"
+            f"[GENERATE RESPONSE SERVICE] Mensagens salvas no banco de dados para o telefone: {phone}. Input: \n{to_json_dump(input)}, output: \n{to_json_dump(outputs)}"
         )
 
-    async def execute(self, phone: str, message: str) -> None:
+    def _get_summary(self, phone: str) -> dict | None:
+        if not self.conversation_summary_repository:
+            return None
+
+        try:
+            return self.conversation_summary_repository.find(phone)
+        except Exception as e:
+            # Sem resumo, o contexto volta a ser só o histórico recente
+            logger.warning(
+                f"[GENERATE RESPONSE SERVICE] Não foi possível carregar o resumo da conversa de {phone}: {e}"
+            )
+            return None
+
+    async def _send_parts_in_order(self, phone: str, queue: asyncio.Queue) -> None:
+        # Envia os lotes de partes na ordem em que ficaram prontos, fora do loop do worker
+        while True:
+            parts = await queue.get()
+
+            if parts is None:
+                return
+
+            try:
+                await asyncio.to_thread(self.chat.send_parts, phone=phone, parts=parts)
+            except Exception as e:
+                logger.exception(
+                    f"[GENERATE RESPONSE SERVICE] ❌ Erro ao enviar partes para {phone}: \n{to_json_dump(e)}"
+                )
+
+    def _remaining_parts(self, content: str, reply_stream: ReplyStream) -> list[str] | None:
+        # Só há resposta em texto quando não foi acionada tool nem agente
+        remaining = reply_stream.finish() if content else None
+
+        if remaining is None and reply_stream.delivered:
+            # O streaming não chegou a uma resposta confiável depois de já ter enviado partes:
+            # só o que ainda não foi entregue do reply final (ou da saída do agente) é enviado
+            parsed = parse_reply(content) if content else None
+            reply = parsed.reply if parsed and parsed.is_json and parsed.reply else content
+            remaining = reply_stream.undelivered_parts(reply) if reply else []
+
+        return remaining
+
+    def _load_messages(self, phone: str, after_id: int | None) -> list:
+        """Histórico recente do telefone, do mais novo para o mais antigo."""
+        cached = self.context_cache.get(phone) if self.context_cache else None
+
+        if cached is not None:
+            # Mensagens já incorporadas ao resumo ficam de fora; as do turno recém-salvo não têm id
+            if after_id:
+                cached = [m for m in cached if not m.get("id") or m["id"] > after_id]
+
+            return cached[::-1]
+
+        # O turno anterior ainda no write-behind precisa estar no banco antes de montar o contexto
+        if self.message_writer and self.message_writer.has_pending(phone):
+            self.message_writer.flush()
+
+        # Com resumo, só as mensagens ainda não resumidas são buscadas
         messages: list = self.message_repository.get_latest_customer_messages(
-            phone=phone, limit=int(os.getenv("CONTEXT_SIZE", 80))
+            phone=phone,
+            limit=int(os.getenv("CONTEXT_SIZE", 80)),
+            after_id=after_id,
         )
 
-        context: list[dict] = self._prepare_context(
-            context=messages or [],
-            user_input=message,
+        if self.context_cache:
+            self.context_cache.fill(phone, messages[::-1])
+
+        return messages
+
+    async def execute(self, phone: str, message: str) -> None:
+        # Banco e Z-API são bloqueantes: rodam em threads para não travar as outras conversas do loop
+        summary = await asyncio.to_thread(self._get_summary, phone)
+
+        # Conversa quente vem do cache de contexto; só o miss lê o banco
+        messages: list = await asyncio.to_thread(
+            self._load_messages,
+            phone,
+            summary.get("last_message_id") if summary else None,
+        )
+
+        # CONTEXT_SIZE limita a busca no banco; o orçamento de tokens define o que vai ao modelo
+        context: list[dict] = self.context_window.build(
+            self._prepare_context(
+                context=messages or [],
+                user_input=message,
+            ),
+            summary=summary.get("summary") if summary else None,
         )
 
         logger.info(
             f"[GENERATE RESPONSE SERVICE] Gerando resposta para o número: {phone}"
         )
 
+        parts_queue: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.create_task(self._send_parts_in_order(phone, parts_queue))
+
         try:
+            # Em streaming, as primeiras partes já são enviadas enquanto o modelo gera
+            reply_stream = (
+                ReplyStream(
+                    on_parts=parts_queue.put_nowait,
+                    hold_pattern=AGENT_TRIGGER_PATTERN,
+                )
+                if self.stream_responses
+                else None
+            )
+
             full_output: list[dict] = await self.response_orchestrator.execute(
-                context=context, phone=phone
+                context=context,
+                phone=phone,
+                on_text_delta=reply_stream.feed if reply_stream else None,
             )
 
             resolved_output_content = self._resolve_output_content(full_output)
 
-            self.chat.send_message(
-                phone=phone,
-                message=resolved_output_content,
+            remaining = (
+                self._remaining_parts(resolved_output_content, reply_stream)
+                if reply_stream
+                else None
             )
 
-            self._save_messages_to_database(
+            if remaining:
+                parts_queue.put_nowait(remaining)
+
+            parts_queue.put_nowait(None)
+            await sender
+
+            if remaining is None:
+                await asyncio.to_thread(
+                    self.chat.send_message,
+                    phone=phone,
+                    message=resolved_output_content,
+                )
+
+            if reply_stream:
+                logger.info(
+                    f"[GENERATE RESPONSE SERVICE] Partes enviadas durante o streaming para {phone}: {len(reply_stream.delivered)}"
+                )
+
+            await asyncio.to_thread(
+                self._save_messages_to_database,
                 phone=phone,
                 input=context[-1],
                 outputs=full_output,
@@ -213,3 +342,9 @@ class GenerateResponseService:
             )
 
             raise e
+
+        finally:
+            # Partes já liberadas pelo streaming ainda são entregues mesmo em caso de erro
+            if not sender.done():
+                parts_queue.put_nowait(None)
+                await sender
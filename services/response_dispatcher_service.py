@@ -0,0 +1,188 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+from typing import Callable
+from services.generate_response_service import GenerateResponseService
+from interfaces.clients.cache_interface import ICache
+from utils.logger import logger, to_json_dump
+
+
+class ResponseDispatcherService:
+    """
+    Camada de despacho do queue worker.
+
+    Limita quantas respostas são geradas ao mesmo tempo (RESPONSE_WORKERS) e
+    executa cada uma como task no próprio loop do worker: as chamadas à OpenAI
+    usam o cliente assíncrono e o que ainda é bloqueante (SQLAlchemy, Z-API)
+    roda em threads via asyncio.to_thread. Quando não há vaga o worker deixa de
+    retirar telefones da fila do Redis, e eles continuam acumulando mensagens
+    até surgir uma vaga.
+
+    Vários workers (em processos ou hosts diferentes) podem compartilhar a
+    mesma fila: cada telefone é reivindicado com um lease de
+    QUEUE_LEASE_SECONDS, renovado enquanto a resposta é gerada. Se o worker
+    morrer, o lease vence e o telefone volta para a fila.
+    """
+
+    def __init__(
+        self,
+        generate_response_service_factory: Callable[[], GenerateResponseService],
+        cache_client: ICache,
+        queue_key: str | None = None,
+        max_workers: int | None = None,
+        lease_seconds: float | None = None,
+    ) -> None:
+        self.max_workers = max_workers or int(os.getenv("RESPONSE_WORKERS", 8))
+        self.queue_key = queue_key or os.getenv("QUEUE_KEY", "message_queue")
+        self.lease_seconds = lease_seconds or float(
+            os.getenv("QUEUE_LEASE_SECONDS", 60)
+        )
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.cache = cache_client
+        self._generate_response_service_factory = generate_response_service_factory
+        self._slot_released = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+        self.metrics = {
+            "running": 0,
+            "dispatched": 0,
+            "completed": 0,
+            "failed": 0,
+            "saturated": 0,
+            "leases_lost": 0,
+        }
+
+    def available_slots(self) -> int:
+        return max(self.max_workers - len(self._tasks), 0)
+
+    def dispatch_due(self) -> int:
+        """Reivindica os telefones vencidos que cabem no pool e os despacha."""
+        slots = self.available_slots()
+
+        if not slots:
+            return 0
+
+        claimed = self.cache.claim_due(
+            self.queue_key,
+            now=time.time(),
+            owner=self.worker_id,
+            lease_seconds=self.lease_seconds,
+            limit=slots,
+        )
+
+        for phone, message in claimed.items():
+            self.dispatch(phone=phone, message=message)
+
+        return len(claimed)
+
+    def dispatch(self, phone: str, message: str) -> asyncio.Task:
+        task = asyncio.create_task(self._run(phone=phone, message=message))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+        self.metrics["dispatched"] += 1
+
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slot_released.set()
+
+    async def _run(self, phone: str, message: str) -> None:
+        # dispatch_due nunca passa de available_slots(), então não há fila interna
+        self.metrics["running"] += 1
+        heartbeat = asyncio.create_task(self._heartbeat(phone))
+
+        try:
+            await self._generate_response_service_factory().execute(
+                phone=phone, message=message
+            )
+            self.metrics["completed"] += 1
+
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.exception(
+                f"[RESPONSE DISPATCHER] ❌ Erro ao gerar resposta para o número {phone}: \n{to_json_dump(e)}"
+            )
+
+        finally:
+            heartbeat.cancel()
+            self.metrics["running"] -= 1
+
+            await asyncio.to_thread(
+                self.cache.release_claim, self.queue_key, phone, self.worker_id
+            )
+
+    async def _heartbeat(self, phone: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+
+            renewed = await asyncio.to_thread(
+                self.cache.extend_claim,
+                self.queue_key,
+                phone,
+                self.worker_id,
+                self.lease_seconds,
+            )
+
+            if not renewed:
+                self.metrics["leases_lost"] += 1
+                logger.warning(
+                    f"[RESPONSE DISPATCHER] Lease do número {phone} perdido pelo worker {self.worker_id}"
+                )
+                return
+
+    async def wait_for_slot(self, timeout: float) -> bool:
+        self._slot_released.clear()
+
+        if self.available_slots():
+            return True
+
+        try:
+            await asyncio.wait_for(self._slot_released.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def record_saturation(self) -> None:
+        """Registra que havia telefones vencidos na fila sem vaga no pool."""
+        self.metrics["saturated"] += 1
+
+    def get_metrics(self, queued: int | None = None, due: int | None = None) -> dict:
+        return {
+            **self.metrics,
+            "worker_id": self.worker_id,
+            "queued": queued,
+            "due": due,
+            "max_workers": self.max_workers,
+            "available_slots": self.available_slots(),
+        }
+
+    async def shutdown(self, timeout: float | None = None) -> None:
+        """
+        Aguarda as respostas em andamento terminarem, por até timeout segundos.
+        Roda no desligamento do worker, antes de o loop cancelar as tasks no
+        meio da geração; as que não terminarem a tempo voltam para a fila
+        quando o lease vencer.
+        """
+        pending = list(self._tasks)
+
+        if not pending:
+            return
+
+        logger.info(
+            f"[RESPONSE DISPATCHER] Aguardando {len(pending)} respostas em andamento antes de desligar"
+        )
+
+        done, not_done = await asyncio.wait(
+            pending,
+            timeout=timeout
+            or float(os.getenv("RESPONSE_DRAIN_TIMEOUT_SECONDS", 30)),
+        )
+
+        if not_done:
+            logger.error(
+                f"[RESPONSE DISPATCHER] {len(not_done)} respostas não terminaram a tempo no desligamento"
+            )
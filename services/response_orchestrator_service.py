@@ -1,6 +1,9 @@
+import os
 import re
 import asyncio
 import json
+from typing import Callable
+from datetime import datetime, timezone
 from interfaces.orchestrators.response_orchestrator_interface import (
     IResponseOrchestrator,
 )
@@ -9,16 +12,29 @@ from interfaces.clients.chat_interface import IChat
 from interfaces.repositories.message_repository_interface import IMessageRepository
 from container.agents import AgentContainer
 from container.tools import ToolContainer
-from interfaces.clients.ai_interface import IAI
+from interfaces.clients.async_ai_interface import IAsyncAI
+
+# Texto do modelo que aciona um agente (ex.: "#2")
+AGENT_TRIGGER_PATTERN = re.compile(r"#\d+")
+
+
+def _dedent_prompt(text: str) -> str:
+    # Remove a indentação do literal (até 8 espaços, mantendo a relativa) e os espaços no fim das linhas
+    text = re.sub(r"^ {1,8}", "", text, flags=re.MULTILINE)
+    return re.sub(r"[ \t]+$", "", text, flags=re.MULTILINE).strip()
 
 
 class ResponseOrchestratorService(IResponseOrchestrator):
     model: str = "gpt-5-mini-2025-08-07"
     instructions: str = ""
 
+    # O prompt e as tools formam o prefixo fixo de toda requisição: sem
+    # indentação e sem variáveis por lead, idênticos byte a byte, para o cache de
+    # prompt da OpenAI reaproveitar o prefixo. Dados dinâmicos vão no final do input.
     system_prompt: dict = {
         "role": "system",
-        "content": """# 1. Identidade
+        "content": _dedent_prompt(
+            """# 1. Identidade
         - **Nome:** Eliane
         - **Função:** SDR (pré-vendas) da **Evex Imóveis**
         - **Estilo de comunicação:**
@@ -242,6 +258,7 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         }
     }
 """
+        ),
     }
     tools: list = [
         {
@@ -278,13 +295,22 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         tool_container: ToolContainer,
         chat_client: IChat,
         message_repository: IMessageRepository,
-        ai_client: IAI,
+        ai_client: IAsyncAI,
     ) -> None:
         self.agent_container = agent_container
         self.tool_container = tool_container
         self.chat = chat_client
         self.message_repository = message_repository
         self.ai = ai_client
+        self.prompt_cache_key = os.getenv(
+            "OPENAI_PROMPT_CACHE_KEY", "response-orchestrator"
+        )
+
+        self.usage_metrics = {
+            "calls": 0,
+            "input_tokens": 0,
+            "cached_tokens": 0,
+        }
 
         self._resolve_agents()
 
@@ -303,7 +329,8 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         )
 
     def _insert_system_input(self, input: list) -> list:
-        if not any(msg.get("role") == "system" for msg in input):
+        # Outras mensagens de sistema (ex.: o resumo da conversa) não substituem o prompt
+        if self.system_prompt not in input:
             input.insert(0, self.system_prompt)
 
         return input
@@ -321,8 +348,7 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         return separator.join(texts)
 
     def _extract_agent_id(self, output: list, all_outputs_in_text: str) -> list[str]:
-        pattern = r"#\d+"
-        return re.findall(pattern, all_outputs_in_text)
+        return AGENT_TRIGGER_PATTERN.findall(all_outputs_in_text)
 
     def _is_agent_trigger(
         self, output: list, all_outputs_in_text: str
@@ -330,9 +356,8 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         if not all_outputs_in_text:
             return False, []
 
-        pattern = r"#\d+"
         return (
-            bool(re.search(pattern, all_outputs_in_text)),
+            bool(AGENT_TRIGGER_PATTERN.search(all_outputs_in_text)),
             self._extract_agent_id(output, all_outputs_in_text),
         )
 
@@ -390,16 +415,71 @@ class ResponseOrchestratorService(IResponseOrchestrator):
         # Extrai todos os dicionários de cada lista devolvida por cada tool para uma única lista de dicionários
         return [item for sublist in results for item in sublist]
 
-    async def execute(self, context: list, phone: str) -> list[dict]:
+    def _dynamic_input(self, phone: str) -> dict:
+        # Vai depois do histórico para não quebrar o prefixo em cache
+        return {
+            "role": "system",
+            "content": (
+                "# Dados do atendimento\n"
+                f"- {{{{telefone}}}}: {phone}\n"
+                f"- Data atual (ISO): {datetime.now(timezone.utc).isoformat(timespec='seconds')}"
+            ),
+        }
+
+    def _record_usage(self, response: dict) -> None:
+        usage = response.get("usage") or {}
+        input_tokens = usage.get("input_tokens", 0) or 0
+        cached_tokens = (usage.get("input_tokens_details") or {}).get(
+            "cached_tokens", 0
+        ) or 0
+
+        self.usage_metrics["calls"] += 1
+        self.usage_metrics["input_tokens"] += input_tokens
+        self.usage_metrics["cached_tokens"] += cached_tokens
+
+        logger.info(
+            f"[RESPONSE ORCHESTRATOR SERVICE] Tokens de entrada: {input_tokens}, em cache: {cached_tokens} "
+            f"({(cached_tokens / input_tokens * 100) if input_tokens else 0:.0f}%)"
+        )
+
+    def get_usage_metrics(self) -> dict:
+        input_tokens = self.usage_metrics["input_tokens"]
+
+        return {
+            **self.usage_metrics,
+            "cached_ratio": (
+                round(self.usage_metrics["cached_tokens"] / input_tokens, 3)
+                if input_tokens
+                else 0.0
+            ),
+        }
+
+    async def execute(
+        self,
+        context: list,
+        phone: str,
+        on_text_delta: Callable[[str], None] | None = None,
+    ) -> list[dict]:
         context = self._insert_system_input(context)
 
-        response = self.ai.create_model_response(
+        request = dict(
             model=self.model,
-            input=context,
+            input=[*context, self._dynamic_input(phone)],
             tools=self.tools,
             instructions=self.instructions,
+            prompt_cache_key=self.prompt_cache_key,
         )
 
+        # Com on_text_delta o texto é repassado conforme o modelo gera, para o envio começar antes
+        if on_text_delta:
+            response = await self.ai.stream_model_response(
+                **request, on_text_delta=on_text_delta
+            )
+        else:
+            response = await self.ai.create_model_response(**request)
+
+        self._record_usage(response)
+
         logger.info(
             f"[RESPONSE ORCHESTRATOR SERVICE] Resposta gerada pelo orquestrador da IA: {to_json_dump(response)}"
         )
@@ -1,5 +1,5 @@
+import atexit
 import logging
-import threading
 import os
 import sys
 
@@ -13,6 +13,20 @@ from src.services.supabase_service import SupabaseService
 from src.services.whisper_service import WhisperService
 from src.services.lead_data_service import LeadDataService
 from src.services.zapi_client_service import ZAPIClientService
+from src.services.delivery_scheduler_service import DeliverySchedulerService
+from src.services.followup_scheduler_service import FollowUpSchedulerService
+from src.services.c2s_update_service import C2SUpdateService
+from utils.reply_parser import C2SUpdate
+from utils.batch_writer import BatchWriter
+from utils.context_cache import ConversationContextCache
+from utils.emoji_sanitizer import remove_emojis
+
+# Lembretes enviados pelos follow-ups agendados pela IA, por motivo (schedule.reason)
+MENSAGENS_FOLLOWUP = {
+    'no_response': "Oi! Conseguiu ver minha última mensagem? Sigo à disposição para te ajudar.",
+    'awaiting_docs': "Oi! Conseguiu separar os documentos? Qualquer dúvida, estou por aqui."
+}
+MENSAGEM_FOLLOWUP_PADRAO = MENSAGENS_FOLLOWUP['no_response']
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +35,39 @@ class MessageHandler:
         self.openai_service = OpenAIService()
         self.supabase_service = SupabaseService()
         self.zapi_client = ZAPIClientService()  # CORRIGIDO - usar service interno
-        self.whisper_service = WhisperService()
-        self.lead_data_service = LeadDataService()
+        # Um cliente Redis (e um pool de conexões) para transcrições, dados de leads e contexto
+        self.cache_client = self._build_cache_client()
+        self.whisper_service = WhisperService(cache_client=self.cache_client)
+        self.lead_data_service = LeadDataService(cache_client=self.cache_client)
+        self.delivery_delay = float(os.getenv('DELIVERY_INITIAL_DELAY_SECONDS', 10))
+        self.delivery_scheduler = DeliverySchedulerService(
+            send_fn=self.zapi_client.send_part,
+            workers=int(os.getenv('DELIVERY_WORKERS', 4))
+        )
+        # Histórico em lote fora do caminho da resposta, com spool local se o Supabase cair
+        self.message_writer = (
+            BatchWriter(
+                flush_fn=self.supabase_service.salvar_mensagens,
+                name="conversations",
+                spool_dir=os.getenv('MESSAGE_SPOOL_DIR', 'spool')
+            )
+            if os.getenv('MESSAGE_WRITE_BEHIND', 'false').lower() == 'true'
+            else None
+        )
+        if self.message_writer:
+            atexit.register(self.message_writer.close)
+        # Últimas 10 mensagens por telefone (o mesmo limite de buscar_contexto_conversa)
+        self.context_cache = ConversationContextCache(
+            cache_client=self.cache_client,
+            prefix="conversations",
+            max_messages=10
+        )
+        self.c2s_updates = C2SUpdateService()
+        self.followup_enabled = os.getenv('FOLLOWUP_ENABLED', 'false').lower() == 'true'
+        self.followup_scheduler = FollowUpSchedulerService(
+            send_fn=self._enviar_followup,
+            on_exhausted=self._encerrar_sem_resposta
+        )
     
     def processar_mensagem_texto(self, data):
         """Processa mensagem de texto recebida"""
@@ -36,38 +81,32 @@ class MessageHandler:
             
             logger.info(f"Processando mensagem de {phone}: {message[:50]}...")
             
+            # O lead respondeu: lembretes pendentes perdem o sentido
+            self.followup_scheduler.cancel(phone)
+            
             # Detecta nome na mensagem (se mencionado)
             self.lead_data_service.detectar_nome_na_mensagem(message, phone)
             
-            # Busca contexto da conversa
-            context = self.supabase_service.buscar_contexto_conversa(phone)
+            # Busca contexto da conversa (cache primeiro, Supabase no miss)
+            context = self._buscar_contexto(phone)
             
             # Obtém dados do lead para personalização
             lead_data = self.lead_data_service.get_lead_data_for_prompt(phone)
             
-            # Gera resposta da IA (retorna lista de mensagens)
+            # Gera resposta da IA; as partes são agendadas conforme ficam prontas
+            # (em streaming, a primeira antes do fim da geração)
             mensagens_resposta = self.openai_service.gerar_resposta(
-                message, phone, context, lead_data
+                message, phone, context, lead_data,
+                on_parts=lambda partes: self._enviar_mensagens_com_delay(phone, partes),
+                on_reply_data=lambda dados: self._aplicar_dados_estruturados(phone, dados, lead_data)
             )
             
-            # Salva mensagem recebida (sem emojis)
-            self.supabase_service.salvar_mensagem(
-                phone, self._remover_emojis(message), 'user'
-            )
-            
-            # Salva respostas da IA (sem emojis)
-            for msg in mensagens_resposta:
-                self.supabase_service.salvar_mensagem(
-                    phone, self._remover_emojis(msg), 'assistant'
-                )
-            
-            # Envia resposta usando ZAPIClient com delay
-            thread = threading.Thread(
-                target=self._enviar_mensagens_com_delay,
-                args=(phone, mensagens_resposta)
-            )
-            thread.daemon = True
-            thread.start()
+            # Salva a mensagem recebida e a resposta da IA (um único turno do assistente)
+            # juntas; o SupabaseService remove os emojis
+            self._salvar_mensagens(phone, [
+                {'phone': phone, 'role': 'user', 'text': message},
+                {'phone': phone, 'role': 'assistant', 'text': ' '.join(mensagens_resposta)}
+            ])
             
             logger.info(f"Resposta processada para {phone}")
             
@@ -101,13 +140,7 @@ class MessageHandler:
             else:
                 # Envia mensagem de erro
                 mensagem_erro = ["Desculpe, não consegui entender o áudio. Pode escrever sua mensagem?"]
-                
-                thread = threading.Thread(
-                    target=self._enviar_mensagens_com_delay,
-                    args=(phone, mensagem_erro)
-                )
-                thread.daemon = True
-                thread.start()
+                self._enviar_mensagens_com_delay(phone, mensagem_erro)
             
         except Exception as e:
             logger.error(f"Erro ao processar mensagem de áudio: {e}")
@@ -122,58 +155,76 @@ class MessageHandler:
             logger.error(f"Erro ao atualizar prompt: {e}")
             return False
     
-    def _enviar_mensagens_com_delay(self, phone, mensagens):
-        """Envia mensagens com delay de 10s usando ZAPIClient"""
+    def _aplicar_dados_estruturados(self, phone, dados, lead_data):
+        """Repassa o c2s da resposta ao CRM e o schedule ao agendador de follow-ups, sem bloquear"""
+        atualizacao = dados.c2s_update
+        if atualizacao:
+            nome = (lead_data or {}).get('nome') or None
+            self.c2s_updates.submit(phone, atualizacao, name=nome)
+        
+        followup = dados.follow_up
+        if followup and self.followup_enabled:
+            self.followup_scheduler.schedule(phone, followup.followup, followup.reason)
+    
+    def _enviar_followup(self, phone, motivo):
+        """Envia o lembrete de follow-up e o registra no histórico da conversa"""
+        mensagem = MENSAGENS_FOLLOWUP.get(motivo, MENSAGEM_FOLLOWUP_PADRAO)
+        self.delivery_scheduler.schedule_messages(phone, [mensagem], delay=0)
+        self._salvar_mensagens(phone, [{'phone': phone, 'role': 'assistant', 'text': mensagem}])
+        logger.info(f"Follow-up ({motivo}) agendado para {phone}")
+    
+    def _encerrar_sem_resposta(self, phone):
+        """Sem resposta aos lembretes de 30m e 2h: encerra o lead no CRM (seção 8 do prompt)"""
+        self.c2s_updates.submit(phone, C2SUpdate(
+            status="Não Responde",
+            observations="Sem resposta após os follow-ups automáticos de 30m e 2h."
+        ))
+    
+    def _build_cache_client(self):
+        """Cliente Redis compartilhado pelos caches do handler, quando o Redis está configurado"""
+        if not os.getenv('REDIS_HOST'):
+            return None
+        
         try:
-            import time
-            
-            # Delay inicial de 10 segundos
-            time.sleep(10)
-            
-            # Envia cada mensagem (ZAPIClient já quebra e filtra emojis automaticamente)
-            for mensagem in mensagens:
-                # Remove emojis manualmente também por garantia
-                mensagem_limpa = self._remover_emojis(mensagem)
-                self.zapi_client.send_message(phone, mensagem_limpa)
-                
+            from clients.redis_client import RedisClient
+            return RedisClient()
         except Exception as e:
-            logger.error(f"Erro ao enviar mensagens com delay: {e}")
+            logger.warning(f"Caches do handler sem Redis: {e}")
+            return None
     
-    def _remover_emojis(self, texto):
-        """Remove emojis do texto usando uma abordagem mais robusta"""
-        import re
-        
-        # Remove emojis usando múltiplos padrões
-        # Padrão 1: Emojis padrão
-        texto = re.sub(r'[\U0001F600-\U0001F64F]', '', texto)  # emoticons
-        texto = re.sub(r'[\U0001F300-\U0001F5FF]', '', texto)  # symbols & pictographs
-        texto = re.sub(r'[\U0001F680-\U0001F6FF]', '', texto)  # transport & map symbols
-        texto = re.sub(r'[\U0001F1E0-\U0001F1FF]', '', texto)  # flags (iOS)
-        texto = re.sub(r'[\U00002702-\U000027B0]', '', texto)
-        texto = re.sub(r'[\U000024C2-\U0001F251]', '', texto)
-        texto = re.sub(r'[\U0001F900-\U0001F9FF]', '', texto)  # Supplemental Symbols and Pictographs
-        texto = re.sub(r'[\U0001FA70-\U0001FAFF]', '', texto)  # Symbols and Pictographs Extended-A
+    def _buscar_contexto(self, phone):
+        """Últimas mensagens da conversa: do cache quando quente, senão do Supabase"""
+        context = self.context_cache.get(phone)
+        if context is not None:
+            return context
         
-        # Padrão 2: Remove símbolos específicos que podem passar
-        symbols_to_remove = ['😊', '😀', '😁', '😂', '🤣', '😃', '😄', '😅', '😆', '😉', '😊', 
-                            '😋', '😎', '😍', '😘', '🥰', '😗', '😙', '😚', '🤪', '😜', '😝',
-                            '🤑', '🤗', '🤭', '🤫', '🤔', '🤐', '🤨', '😐', '😑', '😶', '😏',
-                            '😒', '🙄', '😬', '🤥', '😔', '😪', '🤤', '😴', '😷', '🤒', '🤕',
-                            '🤢', '🤮', '🤧', '🥵', '🥶', '🥴', '😵', '🤯', '🤠', '🥳', '😎',
-                            '🧐', '😕', '😟', '🙁', '☹️', '😮', '😯', '😲', '😳', '🥺', '😦',
-                            '😧', '😨', '😰', '😥', '😢', '😭', '😱', '😖', '😣', '😞', '😓',
-                            '😩', '😫', '🥱', '😤', '😡', '😠', '🤬', '😈', '👿', '💀', '☠️',
-                            '💩', '🤡', '👹', '👺', '👻', '👽', '👾', '🤖', '🎃', '😺', '😸',
-                            '🏢', '💰', '📍', '📞', '📌', '❌', '✅', '⚠️', '📝', '💬', '🚀',
-                            '🎯', '🔥', '👨‍💻', '🏡', '💪', '🙌', '👏', '🎉', '💸', '💵', '💴',
-                            '📈', '📊', '🏠', '🏗️', '🌟', '⭐', '💯', '👍', '👎', '❤️', '💙',
-                            '💚', '🎁', '🎊', '🔔', '🔕', '📢', '📣', '📺', '📻', '📷', '📹',
-                            '🎵', '🎶', '🟢', '🟡', '🔴', '🟠', '⚡', '💡', '🔒', '🔓', '🔑',
-                            '🔐', '👥', '🔄', '▶️', '🧪', '🧹', '📱', '🤖']
+        # O turno anterior ainda no write-behind precisa estar no banco antes do contexto
+        if self.message_writer and self.message_writer.has_pending(phone):
+            self.message_writer.flush()
         
-        for symbol in symbols_to_remove:
-            texto = texto.replace(symbol, '')
+        context = self.supabase_service.buscar_contexto_conversa(phone)
+        self.context_cache.fill(phone, context)
+        return context
+    
+    def _salvar_mensagens(self, phone, mensagens):
+        """Grava no histórico: em um POST agora ou no próximo lote do write-behind"""
+        if not self.message_writer:
+            self.supabase_service.salvar_mensagens(mensagens)
+        else:
+            for mensagem in mensagens:
+                self.message_writer.put(mensagem, key=phone)
         
-        # Remove espaços extras e limpa
-        texto = re.sub(r'\s+', ' ', texto).strip()
-        return texto
\ No newline at end of file
+        # Mesmo formato de buscar_contexto_conversa: sem emojis e sem textos vazios
+        textos = [(mensagem['role'], remove_emojis(mensagem['text'] or '')) for mensagem in mensagens]
+        self.context_cache.append(phone, [
+            {'role': role, 'content': texto} for role, texto in textos if texto
+        ])
+    
+    def _enviar_mensagens_com_delay(self, phone, mensagens):
+        """Agenda o envio das partes com delay inicial (padrão 10s), sem bloquear a thread"""
+        try:
+            # As partes já vêm quebradas e sem emojis do utils.message_splitter
+            self.delivery_scheduler.schedule_messages(phone, mensagens, delay=self.delivery_delay)
+                
+        except Exception as e:
+            logger.error(f"Erro ao agendar mensagens com delay: {e}")
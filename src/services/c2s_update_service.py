@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from interfaces.clients import LeadInfo
+from utils.reply_parser import C2SUpdate
+
+logger = logging.getLogger(__name__)
+
+# Único status em que um lead ainda inexistente no CRM é criado
+STATUS_QUALIFICADO = "Novo Lead - Qualificado por IA"
+
+
+class C2SUpdateService:
+    """
+    Aplica no Contact2Sale o campo c2s das respostas da IA, fora da thread da conversa.
+
+    As atualizações entram em um pool de uma thread só, então as de um mesmo
+    telefone chegam ao CRM na ordem em que foram geradas. O modelo repete o c2s
+    a cada resposta: só o que mudou desde o último envio do telefone é aplicado
+    (o último envio fica num LRU de C2S_LAST_SENT_MAX_ENTRIES telefones).
+    Sem C2S_JWT_TOKEN o serviço fica desativado e descarta as atualizações.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.enabled = bool(os.getenv("C2S_JWT_TOKEN"))
+        self._c2s = None
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                            thread_name_prefix="c2s-update")
+        self.max_entries = int(os.getenv('C2S_LAST_SENT_MAX_ENTRIES', 5000))
+        self._last_sent: OrderedDict[str, Tuple[Optional[str], Optional[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            'submitted': 0,
+            'skipped_unchanged': 0,
+            'applied': 0,
+            'failed': 0
+        }
+
+    def _get_c2s(self):
+        # Importado sob demanda: o Contact2SaleService exige C2S_JWT_TOKEN ao ser criado
+        if self._c2s is None:
+            from services.contact2sale_service import Contact2SaleService
+            self._c2s = Contact2SaleService()
+        return self._c2s
+
+    def submit(self, phone: str, update: C2SUpdate, name: Optional[str] = None):
+        """Enfileira a atualização do lead; retorna sem esperar o CRM"""
+        if not self.enabled:
+            return
+
+        key = (update.status, update.observations)
+
+        with self._lock:
+            if self._last_sent.get(phone) == key:
+                self._last_sent.move_to_end(phone)
+                self.metrics['skipped_unchanged'] += 1
+                return
+
+            self._last_sent[phone] = key
+            self._last_sent.move_to_end(phone)
+            # Telefone esquecido só perde a deduplicação: o próximo c2s dele é reenviado
+            while len(self._last_sent) > self.max_entries:
+                self._last_sent.popitem(last=False)
+            self.metrics['submitted'] += 1
+
+        self._executor.submit(self._apply, phone, update, name)
+
+    def _apply(self, phone: str, update: C2SUpdate, name: Optional[str]):
+        try:
+            c2s = self._get_c2s()
+            lead = c2s.search_lead_by_phone(phone)
+
+            if lead:
+                result = c2s.add_interaction(lead.get("id"), self._format_interaction(update))
+            elif update.status == STATUS_QUALIFICADO:
+                result = c2s.create_lead(LeadInfo(
+                    name=name or f"Cliente {phone[-4:]}",
+                    phone=phone,
+                    message=update.observations or "",
+                    source=c2s.default_source
+                ))
+            else:
+                logger.info(f"Lead {phone} não existe no C2S - atualização '{update.status}' ignorada")
+                return
+
+            outcome = 'applied' if result.get("success") else 'failed'
+
+        except Exception as e:
+            logger.error(f"Erro ao atualizar lead {phone} no C2S: {e}")
+            outcome = 'failed'
+
+        with self._lock:
+            self.metrics[outcome] += 1
+
+            # Falhou: permite reenviar o mesmo conteúdo na próxima resposta
+            if outcome == 'failed':
+                self._last_sent.pop(phone, None)
+
+    def _format_interaction(self, update: C2SUpdate) -> str:
+        lines = []
+        if update.status:
+            lines.append(f"Status: {update.status}")
+        if update.observations:
+            lines.append(update.observations)
+        return "\n".join(lines)
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {**self.metrics, 'enabled': self.enabled, 'tracked_phones': len(self._last_sent)}
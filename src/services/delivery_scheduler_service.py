@@ -0,0 +1,119 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class DeliverySchedulerService:
+    """
+    Agendador de envios com atraso, sem threads dormindo.
+
+    Os envios pendentes ficam em um heap ordenado pelo horário de vencimento e
+    uma única thread de timer os repassa para um pool pequeno quando vencem.
+    As partes de uma resposta são enviadas em sequência por telefone: a próxima
+    parte só é agendada depois que a anterior saiu, com a pausa entre partes.
+    Respostas novas de um telefone que ainda está recebendo partes entram no
+    fim da sequência dele, mantendo a ordem.
+    """
+
+    def __init__(self, send_fn: Callable[[str, str], bool], workers: int = 4,
+                 part_interval: Tuple[float, float] = (2, 3),
+                 late_tolerance: float = 1.0):
+        self.send_fn = send_fn
+        self.part_interval = part_interval
+        self.late_tolerance = late_tolerance
+
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._sequences: Dict[str, deque] = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                            thread_name_prefix="delivery")
+
+        self.metrics = {
+            'scheduled': 0,
+            'sent': 0,
+            'failed': 0,
+            'late': 0,
+            'max_lateness_seconds': 0.0
+        }
+
+        self._timer = threading.Thread(target=self._run_timer, name="delivery-timer",
+                                       daemon=True)
+        self._timer.start()
+
+    def schedule_messages(self, phone: str, parts: List[str], delay: float = 10):
+        """Agenda o envio das partes para o telefone, começando após delay segundos"""
+        parts = [part for part in parts if part and part.strip()]
+        if not parts:
+            return
+
+        with self._condition:
+            self.metrics['scheduled'] += len(parts)
+
+            # Telefone já tem uma sequência em andamento: as partes vão para o fim dela
+            if phone in self._sequences:
+                self._sequences[phone].extend(parts)
+                return
+
+            self._sequences[phone] = deque(parts)
+            self._push(time.monotonic() + delay, phone)
+
+    def _push(self, due_at: float, phone: str):
+        heapq.heappush(self._heap, (due_at, next(self._counter), phone))
+        self._condition.notify()
+
+    def _run_timer(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+
+                due_at, _, phone = heapq.heappop(self._heap)
+
+            self._executor.submit(self._deliver, phone, due_at)
+
+    def _deliver(self, phone: str, due_at: float):
+        lateness = time.monotonic() - due_at
+
+        with self._condition:
+            part = self._sequences[phone].popleft()
+
+            if lateness > self.late_tolerance:
+                self.metrics['late'] += 1
+            self.metrics['max_lateness_seconds'] = max(
+                self.metrics['max_lateness_seconds'], round(lateness, 3)
+            )
+
+        outcome = 'sent'
+        try:
+            if not self.send_fn(phone, part):
+                outcome = 'failed'
+        except Exception as e:
+            logger.error(f"Erro ao enviar parte agendada para {phone}: {e}")
+            outcome = 'failed'
+
+        with self._condition:
+            self.metrics[outcome] += 1
+
+            # Agenda a próxima parte só depois do envio desta, preservando a ordem
+            if self._sequences[phone]:
+                self._push(time.monotonic() + random.uniform(*self.part_interval), phone)
+            else:
+                del self._sequences[phone]
+
+    def get_metrics(self) -> Dict:
+        with self._condition:
+            return {
+                **self.metrics,
+                'pending_deliveries': sum(len(parts) for parts in self._sequences.values()),
+                'phones_in_delivery': len(self._sequences),
+                'timer_entries': len(self._heap)
+            }
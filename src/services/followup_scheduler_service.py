@@ -0,0 +1,139 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Valores de schedule.followup aceitos e o atraso de cada um, em segundos
+FOLLOWUP_DELAYS = {
+    "30m": 30 * 60,
+    "2h": 2 * 60 * 60
+}
+
+# Seção 8 do prompt: sem resposta → lembrete em 30m → depois em 2h → encerra
+NEXT_FOLLOWUP = {
+    "30m": "2h"
+}
+
+
+class FollowUpSchedulerService:
+    """
+    Agenda os follow-ups pedidos pela IA no campo schedule da resposta.
+
+    Cada telefone tem no máximo um follow-up pendente: um novo pedido substitui
+    o anterior e "none" (ou uma mensagem do lead) cancela. Como no
+    DeliverySchedulerService, os pendentes ficam em um heap com uma única thread
+    de timer; entradas substituídas ou canceladas são descartadas quando vencem.
+    Depois do lembrete de 30m vem o de 2h; sem resposta também a ele,
+    on_exhausted é chamado para encerrar o lead.
+    """
+
+    def __init__(self, send_fn: Callable[[str, Optional[str]], None],
+                 on_exhausted: Optional[Callable[[str], None]] = None,
+                 workers: int = 2):
+        self.send_fn = send_fn
+        self.on_exhausted = on_exhausted
+
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._pending: Dict[str, Tuple[int, str, Optional[str]]] = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                            thread_name_prefix="followup")
+
+        self.metrics = {
+            'scheduled': 0,
+            'cancelled': 0,
+            'sent': 0,
+            'failed': 0,
+            'exhausted': 0
+        }
+
+        self._timer = threading.Thread(target=self._run_timer, name="followup-timer",
+                                       daemon=True)
+        self._timer.start()
+
+    def schedule(self, phone: str, followup: str, reason: Optional[str] = None):
+        """Agenda (ou substitui) o follow-up do telefone; "none" e valores desconhecidos cancelam"""
+        with self._condition:
+            self._schedule_locked(phone, followup, reason)
+
+    def _schedule_locked(self, phone: str, followup: str, reason: Optional[str]):
+        delay = FOLLOWUP_DELAYS.get(followup)
+        if delay is None:
+            self._cancel_locked(phone)
+            return
+
+        token = next(self._counter)
+        self._pending[phone] = (token, followup, reason)
+        self.metrics['scheduled'] += 1
+
+        heapq.heappush(self._heap, (time.monotonic() + delay, token, phone))
+        self._condition.notify()
+
+    def cancel(self, phone: str):
+        """Cancela o follow-up pendente do telefone (ex.: o lead respondeu)"""
+        with self._condition:
+            self._cancel_locked(phone)
+
+    def _cancel_locked(self, phone: str):
+        if self._pending.pop(phone, None):
+            self.metrics['cancelled'] += 1
+
+    def _run_timer(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+
+                _, token, phone = heapq.heappop(self._heap)
+                pending = self._pending.get(phone)
+
+                # Substituído ou cancelado depois de agendado
+                if not pending or pending[0] != token:
+                    continue
+
+            self._executor.submit(self._fire, phone, *pending)
+
+    def _fire(self, phone: str, token: int, followup: str, reason: Optional[str]):
+        outcome = 'sent'
+        try:
+            self.send_fn(phone, reason)
+        except Exception as e:
+            logger.error(f"Erro ao enviar follow-up para {phone}: {e}")
+            outcome = 'failed'
+
+        with self._condition:
+            self.metrics[outcome] += 1
+
+            # O lead respondeu (ou veio outro pedido) enquanto o lembrete saía
+            if self._pending.get(phone, (None,))[0] != token:
+                return
+
+            del self._pending[phone]
+            next_followup = NEXT_FOLLOWUP.get(followup)
+
+            if next_followup:
+                self._schedule_locked(phone, next_followup, reason)
+                return
+
+            self.metrics['exhausted'] += 1
+
+        if self.on_exhausted:
+            try:
+                self.on_exhausted(phone)
+            except Exception as e:
+                logger.error(f"Erro ao encerrar follow-ups de {phone}: {e}")
+
+    def get_metrics(self) -> Dict:
+        with self._condition:
+            return {
+                **self.metrics,
+                'pending_followups': len(self._pending),
+                'timer_entries': len(self._heap)
+            }
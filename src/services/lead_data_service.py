@@ -1,46 +1,157 @@
+import atexit
 import logging
 import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+from src.services.supabase_service import SupabaseService
+from utils.write_behind import WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
+# Campos do lead guardados de forma permanente (os mesmos aceitos em /set-lead-data)
+LEAD_FIELDS = ('nome', 'email', 'empreendimento', 'faixa_valor', 'id_anuncio')
+
+REDIS_KEY_PREFIX = "lead_data"
+INVALIDATION_CHANNEL = "lead_data:invalidate"
+
 class LeadDataService:
-    """Serviço para gerenciar dados de leads e variáveis dinâmicas"""
+    """
+    Serviço para gerenciar dados de leads e variáveis dinâmicas.
+
+    Leitura em três camadas: LRU local do processo, Redis compartilhado entre os
+    workers e a tabela lead_data no Supabase. Cada camada que responde preenche
+    as de cima, inclusive com "lead sem dados", para que leads desconhecidos não
+    consultem o Supabase a cada mensagem. Uma atualização grava no LRU e no
+    Redis na hora, avisa os outros workers pelo pub/sub do Redis para
+    descartarem a cópia local e vai para o Supabase em lote, pelo write-behind.
+    Sem Redis (cache_client None), cada worker fica só com o LRU local e o Supabase.
+    """
     
-    def __init__(self):
-        # Cache temporário de dados de leads (em produção, usar Redis/BD)
-        self.leads_cache = {}
+    def __init__(self, cache_client=None):
+        self.max_entries = int(os.getenv('LEAD_CACHE_MAX_ENTRIES', 5000))
+        # Rede de segurança caso uma invalidação do pub/sub se perca
+        self.local_ttl = float(os.getenv('LEAD_CACHE_TTL_SECONDS', 300))
+        self.redis_ttl = int(os.getenv('LEAD_DATA_REDIS_TTL_SECONDS', 7 * 24 * 3600))
+        
+        self.leads_cache: OrderedDict[str, tuple[Dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._instance_id = uuid.uuid4().hex
+        
+        self.supabase = SupabaseService()
+        # Cliente Redis compartilhado com os outros serviços do handler (um pool por processo)
+        self.cache = cache_client
+        self.write_behind = WriteBehindQueue(
+            flush_fn=self.supabase.salvar_dados_leads,
+            name="lead-data-write-behind"
+        )
+        atexit.register(self.write_behind.close)
+        
+        self.metrics = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'store_hits': 0,
+            'misses': 0,
+            'updates': 0,
+            'store_errors': 0,
+            'invalidations_received': 0,
+            'redis_errors': 0
+        }
+        
+        if self.cache:
+            self._redis_call(self.cache.subscribe, INVALIDATION_CHANNEL, self._on_invalidation)
     
-    def extrair_dados_lead_do_telefone(self, phone: str) -> Dict:
+    def _redis_call(self, method, *args):
+        # Falha no Redis não pode derrubar a conversa; segue com LRU local e Supabase
+        try:
+            return method(*args)
+        except Exception as e:
+            self.metrics['redis_errors'] += 1
+            logger.warning(f"Falha ao acessar o Redis (dados de leads): {e}")
+            return None
+    
+    def _redis_key(self, phone: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{phone}"
+    
+    def _on_invalidation(self, message: str):
+        origem, _, phone = message.partition(':')
+        
+        # A própria atualização já deixou o LRU deste worker em dia
+        if origem == self._instance_id:
+            return
+        
+        with self._lock:
+            self.leads_cache.pop(phone, None)
+            self.metrics['invalidations_received'] += 1
+    
+    def _get_local(self, phone: str) -> Optional[Dict]:
+        with self._lock:
+            item = self.leads_cache.get(phone)
+            
+            if item and item[1] > time.monotonic():
+                self.leads_cache.move_to_end(phone)
+                self.metrics['local_hits'] += 1
+                return item[0]
+            
+            if item:
+                del self.leads_cache[phone]
+        
+        return None
+    
+    def _set_local(self, phone: str, campos: Dict):
+        with self._lock:
+            self.leads_cache[phone] = (campos, time.monotonic() + self.local_ttl)
+            self.leads_cache.move_to_end(phone)
+            
+            while len(self.leads_cache) > self.max_entries:
+                self.leads_cache.popitem(last=False)
+    
+    def _carregar_campos(self, phone: str) -> Tuple[Dict, bool]:
         """
-        Extrai/busca dados do lead baseado no telefone
-        Em produção, isso consultaria o banco de dados ou CRM
+        Campos salvos do lead ({} se não houver), passando pelas três camadas, e se
+        eles são completos. Com o Supabase fora do ar só as alterações pendentes são
+        conhecidas: o registro parcial não pode ir para o LRU nem para o Redis.
         """
+        campos = self._get_local(phone)
+        if campos is not None:
+            return campos, True
+        
+        if self.cache:
+            raw = self._redis_call(self.cache.get, self._redis_key(phone))
+            if raw is not None:
+                campos = json.loads(raw)
+                self.metrics['redis_hits'] += 1
+                self._set_local(phone, campos)
+                return campos, True
+        
+        campos = self.supabase.buscar_dados_lead(phone, LEAD_FIELDS)
+        
+        if campos is None:
+            # Supabase fora do ar: não guarda nada para tentar de novo na próxima mensagem
+            self.metrics['misses'] += 1
+            self.metrics['store_errors'] += 1
+            return self.write_behind.get_pending(phone) or {}, False
+        
+        # Alterações ainda na fila do write-behind valem mais que o que está no banco
+        campos = {**campos, **(self.write_behind.get_pending(phone) or {})}
+        self.metrics['store_hits' if campos else 'misses'] += 1
+        
+        self._set_local(phone, campos)
+        if self.cache:
+            self._redis_call(self.cache.set, self._redis_key(phone), json.dumps(campos), self.redis_ttl)
+        
+        return campos, True
+    
+    def extrair_dados_lead_do_telefone(self, phone: str) -> Dict:
+        """Busca os dados do lead (LRU local, Redis e Supabase), completando com os padrões"""
         try:
-            # Por enquanto, retorna dados padrão
-            # No futuro, isso consultará Supabase/CRM para buscar:
-            # - Nome do lead
-            # - Email
-            # - Empreendimento de interesse
-            # - Faixa de valor
-            # - ID do anúncio original
-            
-            if phone in self.leads_cache:
-                return self.leads_cache[phone]
-            
-            # Dados padrão quando não há informações
-            default_data = {
-                'nome': '',  # Vazio para usar saudação neutra
-                'telefone': phone,
-                'email': '',
-                'empreendimento': 'nosso empreendimento',
-                'faixa_valor': 'sua faixa de interesse',
-                'id_anuncio': '',
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            return default_data
+            campos, _ = self._carregar_campos(phone)
+            return {**self._get_default_lead_data(phone), **campos}
             
         except Exception as e:
             logger.error(f"Erro ao extrair dados do lead {phone}: {e}")
@@ -59,13 +170,35 @@ class LeadDataService:
         }
     
     def atualizar_dados_lead(self, phone: str, dados: Dict):
-        """Atualiza dados do lead (ex: quando ele fala o nome)"""
+        """Atualiza dados do lead (ex: quando ele fala o nome); visível para todos os workers na hora"""
         try:
-            if phone not in self.leads_cache:
-                self.leads_cache[phone] = self._get_default_lead_data(phone)
+            dados = {k: v for k, v in dados.items() if k in LEAD_FIELDS}
+            if not dados:
+                return
+            
+            # Supabase em lote: várias atualizações do mesmo lead viram uma linha. Entra
+            # na fila antes da leitura para as leituras seguintes já enxergarem a alteração
+            self.write_behind.put(phone, dados)
+            self.metrics['updates'] += 1
+            
+            campos, completos = self._carregar_campos(phone)
+            campos = {**campos, **dados}
+            
+            if completos:
+                self._set_local(phone, campos)
+                if self.cache:
+                    self._redis_call(self.cache.set, self._redis_key(phone), json.dumps(campos), self.redis_ttl)
+            else:
+                # Sem a leitura do Supabase, o registro montado só tem as alterações pendentes:
+                # gravá-lo esconderia por dias os campos que já estão no banco. O Redis é
+                # descartado e a próxima leitura tenta o Supabase de novo (somando o pendente)
+                with self._lock:
+                    self.leads_cache.pop(phone, None)
+                if self.cache:
+                    self._redis_call(self.cache.delete, self._redis_key(phone))
             
-            # Atualiza campos específicos
-            self.leads_cache[phone].update(dados)
+            if self.cache:
+                self._redis_call(self.cache.publish, INVALIDATION_CHANNEL, f"{self._instance_id}:{phone}")
             logger.info(f"Dados do lead {phone} atualizados: {list(dados.keys())}")
             
         except Exception as e:
@@ -106,17 +239,12 @@ class LeadDataService:
             return None
     
     def salvar_dados_lead_permanente(self, phone: str):
-        """
-        Salva dados do lead permanentemente (Supabase/BD)
-        Para implementar no futuro
-        """
+        """Grava agora no Supabase as alterações pendentes (sem esperar o ciclo do write-behind)"""
         try:
-            if phone in self.leads_cache:
-                lead_data = self.leads_cache[phone]
-                # TODO: Implementar salvamento no Supabase
-                logger.info(f"Lead {phone} salvo: {lead_data}")
-                return True
-            return False
+            if self.write_behind.get_pending(phone) is None:
+                return False
+            
+            return self.write_behind.flush()
             
         except Exception as e:
             logger.error(f"Erro ao salvar lead {phone}: {e}")
@@ -142,4 +270,18 @@ class LeadDataService:
             
         except Exception as e:
             logger.error(f"Erro ao obter dados para prompt: {e}")
-            return self._get_default_lead_data(phone)
\ No newline at end of file
+            return self._get_default_lead_data(phone)
+    
+    def get_metrics(self) -> Dict:
+        hits = self.metrics['local_hits'] + self.metrics['redis_hits'] + self.metrics['store_hits']
+        
+        with self._lock:
+            entradas = len(self.leads_cache)
+        
+        return {
+            **self.metrics,
+            'local_entries': entradas,
+            'max_entries': self.max_entries,
+            'redis_enabled': self.cache is not None,
+            'write_behind': self.write_behind.get_metrics()
+        }
@@ -1,12 +1,64 @@
 import os
-import requests
 import logging
 import re
+import json
 from datetime import datetime
 from .response_processor_service import response_processor
+from utils.http_session import get_session
+from utils.message_splitter import split_message
+from utils.prompt_template import PromptTemplate
+from utils.context_window import ContextWindowBuilder
+from utils.reply_stream import ReplyStream
+from utils.reply_parser import ParsedReply, parse_reply
 
 logger = logging.getLogger(__name__)
 
+REGRA_INFORMACOES = "ATENÇÃO CRÍTICA: Use APENAS as informações exatas da seção 4. NUNCA invente detalhes sobre empreendimentos. Se não souber algo específico, seja CONSULTIVA: desperte interesse, faça perguntas sobre finalidade e orçamento."
+
+# Sufixos pré-montados uma vez, anexados ao prompt conforme o momento da conversa
+SUFIXO_REAPRESENTACAO = "\n\nIMPORTANTE: Já passou mais de 12 horas desde a última interação com este lead. OBRIGATORIAMENTE se reapresente como Eliane da Evex Imóveis de forma calorosa, como se fosse um novo contato.\n\n" + REGRA_INFORMACOES
+SUFIXO_PRIMEIRA_MENSAGEM = "\n\nIMPORTANTE: Esta é a PRIMEIRA mensagem para este lead. OBRIGATORIAMENTE se apresente como Eliane da Evex Imóveis conforme as instruções de apresentação inicial.\n\n" + REGRA_INFORMACOES
+SUFIXO_PADRAO = "\n\n" + REGRA_INFORMACOES
+
+# Saída estruturada: o JSON da seção 10 passa a ser garantido pela API em vez de pedido em texto livre
+SUFIXO_SAIDA_ESTRUTURADA = "\n\nFORMATO DE SAÍDA: responda SEMPRE no JSON da seção 10 (reply, c2s e schedule). O cliente recebe apenas o reply; c2s atualiza o CRM (use null enquanto o lead ainda está em qualificação; preencha status só quando ele for qualificado, não responder ou não tiver interesse) e schedule agenda o follow-up (use \"none\" quando não houver)."
+
+REPLY_JSON_SCHEMA = {
+    "name": "lead_reply",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["reply", "c2s", "schedule"],
+        "properties": {
+            "reply": {"type": "string"},
+            # c2s e status aceitam null: enquanto o lead ainda está em qualificação não há
+            # status a registrar, e o strict obrigaria o modelo a escolher um a cada resposta
+            "c2s": {
+                "type": ["object", "null"],
+                "additionalProperties": False,
+                "required": ["observations", "status"],
+                "properties": {
+                    "observations": {"type": "string"},
+                    "status": {
+                        "type": ["string", "null"],
+                        "enum": ["Novo Lead - Qualificado por IA", "Não Responde", "Não Interessado", None]
+                    }
+                }
+            },
+            "schedule": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["followup", "reason"],
+                "properties": {
+                    "followup": {"type": "string", "enum": ["none", "30m", "2h"]},
+                    "reason": {"type": "string", "enum": ["no_response", "awaiting_docs", "other"]}
+                }
+            }
+        }
+    }
+}
+
 class OpenAIService:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
@@ -14,6 +66,9 @@ class OpenAIService:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        self.context_window = ContextWindowBuilder()
+        self.stream_responses = os.getenv('OPENAI_STREAM_RESPONSES', 'false').lower() == 'true'
+        self.structured_output = os.getenv('OPENAI_STRUCTURED_OUTPUT', 'false').lower() == 'true'
         
         # Prompt refinado da Eliane v4.0.1 - Sem emojis e com contexto real
         self.system_prompt = """# 1. Identidade
@@ -251,14 +306,19 @@ Se você quiser incluir dados estruturados, use o seguinte formato JSON interno:
 
 IMPORTANTE: O cliente receberá APENAS o conteúdo do campo "reply". NUNCA envie o JSON completo.
 Sempre responda de forma natural, empática e mantenha mensagens curtas (máx 180 caracteres cada)."""
+        self.prompt_template = PromptTemplate(self.system_prompt)
+        
+        # Prefixo estático: prompt idêntico entre requisições e dados do lead no final
+        self.static_prefix = os.getenv('OPENAI_PROMPT_STATIC_PREFIX', 'false').lower() in ('true', '1', 'yes', 'on')
     
     def update_prompt(self, new_prompt):
-        """Atualiza o prompt do sistema"""
+        """Atualiza o prompt do sistema e recompila o template"""
+        self.prompt_template = PromptTemplate(new_prompt)
         self.system_prompt = new_prompt
         logger.info("Prompt atualizado")
     
-    def _aplicar_variaveis_prompt(self, prompt, lead_data=None):
-        """Aplica variáveis dinâmicas no prompt"""
+    def _aplicar_variaveis_prompt(self, template, lead_data=None):
+        """Aplica variáveis dinâmicas no prompt compilado"""
         try:
             if not lead_data:
                 # Valores padrão se não tiver dados do lead
@@ -272,52 +332,18 @@ Sempre responda de forma natural, empática e mantenha mensagens curtas (máx 18
                     'timestamp': datetime.now().isoformat()
                 }
             
-            # Substitui variáveis no prompt
-            prompt_personalizado = prompt
-            for key, value in lead_data.items():
-                prompt_personalizado = prompt_personalizado.replace(f'{{{{{key}}}}}', str(value))
+            if self.static_prefix:
+                return template.render_static_prefix(lead_data)
             
-            return prompt_personalizado
+            return template.render(lead_data)
             
         except Exception as e:
             logger.error(f"Erro ao aplicar variáveis no prompt: {e}")
-            return prompt
+            return template.source
     
     def _quebrar_em_mensagens(self, texto):
-        """Quebra texto em mensagens naturais baseado em pontos finais e perguntas"""
-        # Remove espaços extras
-        texto = re.sub(r'\s+', ' ', texto.strip())
-        
-        # Quebra em sentenças baseado em pontos finais e perguntas
-        # Mantém pontuação que indica fim de frase
-        sentences = re.split(r'([.!?]+\s+)', texto)
-        
-        mensagens = []
-        mensagem_atual = ""
-        
-        for i in range(0, len(sentences), 2):
-            sentence = sentences[i] if i < len(sentences) else ""
-            punctuation = sentences[i + 1] if i + 1 < len(sentences) else ""
-            
-            frase_completa = sentence + punctuation
-            
-            # Se a mensagem atual + nova frase fica muito longa, envia a atual
-            if len(mensagem_atual + frase_completa) > 200 and mensagem_atual:
-                mensagens.append(mensagem_atual.strip())
-                mensagem_atual = frase_completa
-            else:
-                mensagem_atual += frase_completa
-        
-        # Adiciona última mensagem se houver
-        if mensagem_atual.strip():
-            mensagens.append(mensagem_atual.strip())
-        
-        # Se não conseguiu quebrar, mantém original em uma mensagem
-        if not mensagens:
-            mensagens = [texto]
-        
-        logger.info(f"Texto quebrado em {len(mensagens)} mensagens")
-        return mensagens
+        """Quebra texto nas partes prontas para envio (pipeline único do utils.message_splitter)"""
+        return split_message(texto)
     
     def _verificar_reapresentacao(self, context):
         """Verifica se precisa se reapresentar após 12 horas desde última interação"""
@@ -352,8 +378,66 @@ Sempre responda de forma natural, empática e mantenha mensagens curtas (máx 18
             logger.error(f"Erro ao verificar necessidade de reapresentação: {e}")
             return False
     
-    def gerar_resposta(self, message, phone, context=None, lead_data=None):
-        """Gera resposta da IA usando GPT-4o-mini configurado para o assistant asst_C4tLHrq74kxj8NUHEUkieU65"""
+    def gerar_resposta(self, message, phone, context=None, lead_data=None, on_parts=None, on_reply_data=None):
+        """
+        Gera resposta da IA usando GPT-4o-mini configurado para o assistant asst_C4tLHrq74kxj8NUHEUkieU65
+
+        Com on_parts, todas as partes devolvidas também são entregues a on_parts;
+        em streaming (OPENAI_STREAM_RESPONSES=true) as primeiras saem enquanto o
+        modelo ainda está gerando o resto. Com on_reply_data, os campos c2s e
+        schedule da resposta em JSON são entregues como ParsedReply.
+        """
+        reply_stream = ReplyStream(on_parts) if on_parts and self.stream_responses else None
+        
+        partes, dados = self._gerar_partes(message, phone, context, lead_data, reply_stream)
+        
+        if on_parts:
+            entregues = len(reply_stream.delivered) if reply_stream else 0
+            if partes[entregues:]:
+                on_parts(partes[entregues:])
+        
+        if on_reply_data and dados.is_json:
+            try:
+                on_reply_data(dados)
+            except Exception as e:
+                logger.error(f"Erro ao processar dados estruturados da resposta: {e}")
+        
+        return partes
+    
+    def _gerar_em_streaming(self, data, reply_stream):
+        """Consome o SSE do chat completions repassando cada trecho ao reply_stream; devolve o texto completo"""
+        response = get_session().post(
+            'https://api.openai.com/v1/chat/completions',
+            headers=self.headers,
+            json={**data, "stream": True},
+            timeout=15,
+            stream=True
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Erro OpenAI API: {response.status_code} - {response.text}")
+        
+        response.encoding = 'utf-8'
+        trechos = []
+        
+        for linha in response.iter_lines(decode_unicode=True):
+            if not linha or not linha.startswith('data: '):
+                continue
+            
+            payload = linha[len('data: '):]
+            if payload == '[DONE]':
+                break
+            
+            choices = json.loads(payload).get('choices') or [{}]
+            trecho = choices[0].get('delta', {}).get('content')
+            
+            if trecho:
+                trechos.append(trecho)
+                reply_stream.feed(trecho)
+        
+        return ''.join(trechos).strip()
+    
+    def _gerar_partes(self, message, phone, context, lead_data, reply_stream):
         try:
             # Verifica se é a primeira interação (sem contexto ou contexto vazio)
             is_primeira_mensagem = not context or len(context) == 0
@@ -362,29 +446,33 @@ Sempre responda de forma natural, empática e mantenha mensagens curtas (máx 18
             precisa_reapresentar = self._verificar_reapresentacao(context)
             
             # Aplica variáveis dinâmicas no prompt
-            prompt_personalizado = self._aplicar_variaveis_prompt(self.system_prompt, lead_data)
+            prompt_personalizado = self._aplicar_variaveis_prompt(self.prompt_template, lead_data)
             
             # Se é a primeira mensagem OU precisa se reapresentar, reforça a instrução de apresentação
-            if is_primeira_mensagem or precisa_reapresentar:
-                if precisa_reapresentar:
-                    prompt_personalizado += "\n\nIMPORTANTE: Já passou mais de 12 horas desde a última interação com este lead. OBRIGATORIAMENTE se reapresente como Eliane da Evex Imóveis de forma calorosa, como se fosse um novo contato.\n\nATENÇÃO CRÍTICA: Use APENAS as informações exatas da seção 4. NUNCA invente detalhes sobre empreendimentos. Se não souber algo específico, seja CONSULTIVA: desperte interesse, faça perguntas sobre finalidade e orçamento."
-                else:
-                    prompt_personalizado += "\n\nIMPORTANTE: Esta é a PRIMEIRA mensagem para este lead. OBRIGATORIAMENTE se apresente como Eliane da Evex Imóveis conforme as instruções de apresentação inicial.\n\nATENÇÃO CRÍTICA: Use APENAS as informações exatas da seção 4. NUNCA invente detalhes sobre empreendimentos. Se não souber algo específico, seja CONSULTIVA: desperte interesse, faça perguntas sobre finalidade e orçamento."
+            if precisa_reapresentar:
+                prompt_personalizado += SUFIXO_REAPRESENTACAO
+            elif is_primeira_mensagem:
+                prompt_personalizado += SUFIXO_PRIMEIRA_MENSAGEM
             else:
-                prompt_personalizado += "\n\nATENÇÃO CRÍTICA: Use APENAS as informações exatas da seção 4. NUNCA invente detalhes sobre empreendimentos. Se não souber algo específico, seja CONSULTIVA: desperte interesse, faça perguntas sobre finalidade e orçamento."
-
+                prompt_personalizado += SUFIXO_PADRAO
+            
+            if self.structured_output:
+                prompt_personalizado += SUFIXO_SAIDA_ESTRUTURADA
+
+            # Histórico vem do Supabase com role/content; entra no limite do orçamento de tokens
+            historico = [
+                {
+                    "role": "user" if ctx.get('role') == 'user' else "assistant",
+                    "content": ctx.get('content', '')
+                }
+                for ctx in context or []
+            ]
+            
             # Payload para usar a API de chat completions com GPT-4o-mini
             messages = [
                 {"role": "system", "content": prompt_personalizado},
-                {"role": "user", "content": message}
+                *self.context_window.build([*historico, {"role": "user", "content": message}])
             ]
-            
-            # Se houver contexto, adiciona mensagens anteriores
-            if context:
-                # Adiciona contexto antes da mensagem atual
-                for ctx in context[-5:]:  # Últimas 5 mensagens
-                    role = "user" if ctx.get('sender') == 'user' else "assistant"
-                    messages.insert(-1, {"role": role, "content": ctx.get('message', '')})
 
             data = {
                 "model": "gpt-4o-mini",  # Modelo configurado para o assistant
@@ -392,44 +480,70 @@ Sempre responda de forma natural, empática e mantenha mensagens curtas (máx 18
                 "max_tokens": 300,  # Aumentado para acomodar JSON
                 "temperature": 0.7
             }
+            
+            if self.structured_output:
+                # As observações do c2s vêm em toda resposta: 300 tokens cortariam o JSON
+                data["max_tokens"] = 600
+                data["response_format"] = {"type": "json_schema", "json_schema": REPLY_JSON_SCHEMA}
 
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=self.headers,
-                json=data,
-                timeout=15
-            )
-
-            if response.status_code == 200:
+            if reply_stream:
+                texto_resposta = self._gerar_em_streaming(data, reply_stream)
+            else:
+                response = get_session().post(
+                    'https://api.openai.com/v1/chat/completions',
+                    headers=self.headers,
+                    json=data,
+                    timeout=15
+                )
+                
+                if response.status_code != 200:
+                    logger.error(f"Erro OpenAI API: {response.status_code} - {response.text}")
+                    return ["Desculpe, ocorreu um erro. Tente novamente."], ParsedReply()
+                
                 result = response.json()
                 texto_resposta = result.get('choices', [{}])[0].get('message', {}).get('content', '').strip()
+            
+            if texto_resposta:
+                # Em streaming, o reply já foi extraído e quebrado conforme chegava
+                restantes = reply_stream.finish() if reply_stream else None
+                if restantes is not None:
+                    logger.info(f"✅ Resposta em streaming: {len(reply_stream.delivered)} partes antecipadas")
+                    return reply_stream.delivered + restantes, parse_reply(texto_resposta)
                 
-                if texto_resposta:
-                    # 🔥 NOVO: PROCESSAMENTO COM RESPONSE PROCESSOR
-                    logger.info("Processando resposta com Response Processor...")
-                    contexto_processamento = {
-                        'is_primeira_mensagem': is_primeira_mensagem,
-                        'precisa_reapresentar': precisa_reapresentar,
-                        'phone': phone,
-                        'lead_data': lead_data
-                    }
-                    
-                    # Delega todo o processamento para o Response Processor
-                    mensagens_processadas = response_processor.processar_resposta(
-                        texto_resposta, 
-                        contexto_processamento
-                    )
-                    
-                    logger.info(f"✅ Resposta processada com sucesso: {len(mensagens_processadas)} mensagens")
-                    return mensagens_processadas
-                else:
-                    return ["Olá! Obrigada pela mensagem. Nossa equipe retornará em breve."]
+                # 🔥 NOVO: PROCESSAMENTO COM RESPONSE PROCESSOR
+                logger.info("Processando resposta com Response Processor...")
+                contexto_processamento = {
+                    'is_primeira_mensagem': is_primeira_mensagem,
+                    'precisa_reapresentar': precisa_reapresentar,
+                    'phone': phone,
+                    'lead_data': lead_data
+                }
+                
+                # Delega todo o processamento para o Response Processor
+                mensagens_processadas, dados = response_processor.processar_resposta_estruturada(
+                    texto_resposta, 
+                    contexto_processamento
+                )
+                
+                logger.info(f"✅ Resposta processada com sucesso: {len(mensagens_processadas)} mensagens")
+                
+                if reply_stream and reply_stream.delivered:
+                    # Partes já entregues durante o streaming não são repetidas; a comparação
+                    # é pelo texto, já que a primeira parte antecipada não segue o agrupamento final
+                    restantes = reply_stream.undelivered_parts(' '.join(mensagens_processadas))
+                    return reply_stream.delivered + restantes, dados
+                
+                return mensagens_processadas, dados
             else:
-                logger.error(f"Erro OpenAI API: {response.status_code} - {response.text}")
-                return ["Desculpe, ocorreu um erro. Tente novamente."]
+                return ["Olá! Obrigada pela mensagem. Nossa equipe retornará em breve."], ParsedReply()
         except Exception as e:
             logger.error(f"Erro na geração de resposta: {e}")
-            return ["Olá! Obrigada pela mensagem. Nossa equipe retornará em breve."]
+            
+            # Falha no meio do streaming: o lead já recebeu as partes entregues
+            if reply_stream and reply_stream.delivered:
+                return list(reply_stream.delivered), ParsedReply()
+            
+            return ["Olá! Obrigada pela mensagem. Nossa equipe retornará em breve."], ParsedReply()
     
     def get_processor_stats(self):
         """Retorna estatísticas do Response Processor"""
@@ -0,0 +1,117 @@
+import logging
+import threading
+import zlib
+from queue import Queue
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class PhoneQueueService:
+    """
+    Pool fixo de workers com filas particionadas por telefone.
+
+    Cada telefone é sempre roteado para o mesmo shard (crc32 do número), e cada
+    shard é consumido por uma única thread, o que mantém a ordem das mensagens
+    por telefone. O número de threads não depende da quantidade de telefones, e
+    o contador de pendências de um telefone é removido assim que a fila dele
+    esvazia, então picos de campanha não deixam memória para trás.
+    """
+
+    def __init__(self, processor: Callable[[Dict], None], pool_size: int = 8,
+                 max_pending_per_phone: int = 10):
+        self.processor = processor
+        self.pool_size = max(pool_size, 1)
+        self.max_pending_per_phone = max_pending_per_phone
+
+        self._shards = [Queue() for _ in range(self.pool_size)]
+        self._pending: Dict[str, int] = {}
+        self._active: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+        self.metrics = {
+            'enqueued': 0,
+            'processed': 0,
+            'failed': 0,
+            'rejected': 0
+        }
+
+        for index, shard in enumerate(self._shards):
+            thread = threading.Thread(
+                target=self._consume, args=(index, shard),
+                name=f"phone-queue-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Pool de filas iniciado com {self.pool_size} workers")
+
+    def _shard_for(self, phone: str) -> int:
+        # crc32 é estável entre processos, ao contrário do hash() do Python
+        return zlib.crc32(phone.encode('utf-8')) % self.pool_size
+
+    def enqueue(self, phone: str, message_data: Dict) -> bool:
+        """Enfileira a mensagem no shard do telefone. Retorna False se o limite do telefone foi atingido"""
+        with self._lock:
+            pending = self._pending.get(phone, 0)
+
+            if pending >= self.max_pending_per_phone:
+                self.metrics['rejected'] += 1
+                return False
+
+            self._pending[phone] = pending + 1
+            self.metrics['enqueued'] += 1
+
+        self._shards[self._shard_for(phone)].put((phone, message_data))
+        return True
+
+    def _consume(self, index: int, shard: Queue):
+        while True:
+            phone, message_data = shard.get()
+
+            with self._lock:
+                self._active[index] = phone
+
+            outcome = 'processed'
+            try:
+                self.processor(message_data)
+            except Exception as e:
+                logger.error(f"Erro no processamento da fila de {phone}: {e}")
+                outcome = 'failed'
+            finally:
+                with self._lock:
+                    self.metrics[outcome] += 1
+                    self._active.pop(index, None)
+
+                    # Telefone ocioso sai do mapa para não crescer indefinidamente
+                    remaining = self._pending.get(phone, 1) - 1
+                    if remaining > 0:
+                        self._pending[phone] = remaining
+                    else:
+                        self._pending.pop(phone, None)
+
+                shard.task_done()
+
+    def pending_for(self, phone: str) -> int:
+        with self._lock:
+            return self._pending.get(phone, 0)
+
+    def get_metrics(self, include_details: bool = False) -> Dict:
+        """Métricas do pool; include_details adiciona as pendências por telefone"""
+        with self._lock:
+            pending = dict(self._pending)
+            active = len(self._active)
+
+        result = {
+            **self.metrics,
+            'pool_size': self.pool_size,
+            'active_processors': active,
+            'total_phones': len(pending),
+            'queued_messages': sum(pending.values()),
+            'shard_sizes': [shard.qsize() for shard in self._shards]
+        }
+
+        if include_details:
+            result['queue_details'] = pending
+
+        return result
@@ -8,20 +8,24 @@ Serviço dedicado para processar e limpar respostas da IA
 garantindo 100% de assertividade antes do envio para Z-API.
 
 Funcionalidades:
-- Detecção automática de JSON
-- Múltiplas camadas de extração
+- Detecção e extração de JSON em uma passada (utils.reply_parser)
+- Campos estruturados (reply, c2s, schedule)
 - Validação de conteúdo
 - Fallbacks robustos
 - Logging detalhado
 """
 
 import re
-import json
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from utils.message_splitter import split_message
+from utils.reply_parser import ParsedReply, parse_reply
 
 logger = logging.getLogger(__name__)
 
+# Campos do JSON que, soltos no texto, indicam uma resposta estruturada mal formada
+JSON_MARKERS = ('"reply":', '"c2s":', '"schedule":')
+
 class ResponseProcessorService:
     """
     Serviço para processar respostas da IA e garantir que apenas
@@ -35,7 +39,8 @@ class ResponseProcessorService:
             "json_extracted": 0,
             "fallback_used": 0,
             "clean_responses": 0,
-            "failed_extractions": 0
+            "failed_extractions": 0,
+            "truncated": 0
         }
     
     def processar_resposta(self, resposta_bruta: str, contexto: Dict[str, Any] = None) -> List[str]:
@@ -49,36 +54,51 @@ class ResponseProcessorService:
         Returns:
             Lista de mensagens limpas prontas para envio
         """
+        mensagens, _ = self.processar_resposta_estruturada(resposta_bruta, contexto)
+        return mensagens
+    
+    def processar_resposta_estruturada(
+        self, resposta_bruta: str, contexto: Dict[str, Any] = None
+    ) -> Tuple[List[str], ParsedReply]:
+        """
+        Igual a processar_resposta, devolvendo também os campos do JSON
+        (reply, c2s e schedule) lidos da resposta.
+        """
+        parsed = ParsedReply()
+        
         try:
             self.stats["total_processed"] += 1
             
             if not resposta_bruta or not resposta_bruta.strip():
                 logger.warning("Resposta vazia recebida")
-                return self._get_resposta_padrao()
+                return self._get_resposta_padrao(), parsed
             
             resposta_bruta = resposta_bruta.strip()
             
-            # ETAPA 1: Detecção de JSON
-            if self._detectar_json(resposta_bruta):
+            # ETAPA 1 e 2: detecção e extração em uma passada (tolera escapes e JSON cortado)
+            parsed = parse_reply(resposta_bruta)
+            
+            if parsed.is_json or any(marcador in resposta_bruta for marcador in JSON_MARKERS):
                 self.stats["json_detected"] += 1
-                logger.info("JSON detectado na resposta - iniciando extração...")
-                
-                # ETAPA 2: Extração primária
-                conteudo_extraido = self._extrair_reply_json(resposta_bruta)
                 
-                if conteudo_extraido:
+                if parsed.is_json and parsed.reply:
                     self.stats["json_extracted"] += 1
-                    logger.info(f"✅ JSON extraído com sucesso: {conteudo_extraido[:50]}...")
-                    return self._quebrar_em_mensagens(conteudo_extraido)
+                    reply = parsed.reply
+                    if parsed.truncated:
+                        self.stats["truncated"] += 1
+                        logger.warning("JSON da resposta veio cortado - usando o reply parcial")
+                        reply = self._aparar_frase_cortada(reply)
+                    logger.info(f"✅ JSON extraído com sucesso: {reply[:50]}...")
+                    return self._quebrar_em_mensagens(reply), parsed
                 
                 # ETAPA 3: Fallbacks progressivos
-                logger.warning("Extração primária falhou - tentando fallbacks...")
+                logger.warning("JSON sem reply utilizável - tentando fallbacks...")
                 conteudo_fallback = self._tentar_fallbacks(resposta_bruta)
                 
                 if conteudo_fallback:
                     self.stats["fallback_used"] += 1
                     logger.info(f"✅ Fallback bem-sucedido: {conteudo_fallback[:50]}...")
-                    return self._quebrar_em_mensagens(conteudo_fallback)
+                    return self._quebrar_em_mensagens(conteudo_fallback), parsed
                 
                 # ETAPA 4: Última tentativa - limpeza agressiva
                 logger.error("Todos os fallbacks falharam - tentando limpeza agressiva...")
@@ -86,79 +106,27 @@ class ResponseProcessorService:
                 
                 if conteudo_limpo:
                     logger.info(f"✅ Limpeza agressiva funcionou: {conteudo_limpo[:50]}...")
-                    return self._quebrar_em_mensagens(conteudo_limpo)
+                    return self._quebrar_em_mensagens(conteudo_limpo), parsed
                 
                 # ETAPA 5: Falha total - resposta de emergência
                 self.stats["failed_extractions"] += 1
                 logger.error("❌ FALHA TOTAL na extração - usando resposta de emergência")
-                return self._get_resposta_emergencia(contexto)
+                return self._get_resposta_emergencia(contexto), parsed
             
             else:
                 # Resposta já está limpa
                 self.stats["clean_responses"] += 1
                 logger.info("Resposta já está limpa (sem JSON)")
-                return self._quebrar_em_mensagens(resposta_bruta)
+                return self._quebrar_em_mensagens(resposta_bruta), parsed
                 
         except Exception as e:
             logger.error(f"Erro crítico no processamento: {e}")
-            return self._get_resposta_emergencia(contexto)
+            return self._get_resposta_emergencia(contexto), parsed
     
-    def _detectar_json(self, texto: str) -> bool:
-        """Detecta se o texto contém estruturas JSON"""
-        indicadores_json = [
-            '{ "reply"',
-            '{"reply"',
-            '"reply":',
-            '"c2s":',
-            '"schedule":',
-            '}",'
-        ]
-        
-        texto_lower = texto.lower()
-        return any(indicador.lower() in texto_lower for indicador in indicadores_json)
-    
-    def _extrair_reply_json(self, texto: str) -> Optional[str]:
-        """Extração primária de reply do JSON"""
-        try:
-            # Limpa texto
-            texto_limpo = re.sub(r'\s+', ' ', texto.strip())
-            
-            # Procura início do JSON
-            start_patterns = ['{ "reply"', '{"reply"']
-            start_pos = -1
-            
-            for pattern in start_patterns:
-                pos = texto_limpo.find(pattern)
-                if pos != -1:
-                    start_pos = pos
-                    break
-            
-            if start_pos == -1:
-                return None
-            
-            # Encontra fim do JSON balanceando chaves
-            bracket_count = 0
-            end_pos = start_pos
-            
-            for i, char in enumerate(texto_limpo[start_pos:], start_pos):
-                if char == '{':
-                    bracket_count += 1
-                elif char == '}':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        end_pos = i + 1
-                        break
-            
-            # Extrai e parseia JSON
-            json_text = texto_limpo[start_pos:end_pos]
-            json_obj = json.loads(json_text)
-            
-            reply = json_obj.get('reply', '').strip()
-            return reply if reply else None
-            
-        except (json.JSONDecodeError, Exception) as e:
-            logger.warning(f"Falha na extração primária: {e}")
-            return None
+    def _aparar_frase_cortada(self, texto: str) -> str:
+        """Descarta a frase incompleta no fim de um reply cortado, se houver frase completa antes"""
+        fim = max(texto.rfind(sinal) for sinal in '.!?')
+        return texto[:fim + 1] if fim > 0 else texto
     
     def _tentar_fallbacks(self, texto: str) -> Optional[str]:
         """Múltiplos métodos de fallback para extração"""
@@ -249,32 +217,8 @@ class ResponseProcessorService:
         return letras >= 5
     
     def _quebrar_em_mensagens(self, texto: str) -> List[str]:
-        """Quebra texto em mensagens naturais"""
-        # Remove espaços extras
-        texto = re.sub(r'\s+', ' ', texto.strip())
-        
-        # Quebra por pontos finais e perguntas
-        sentences = re.split(r'([.!?]+\s+)', texto)
-        
-        mensagens = []
-        mensagem_atual = ""
-        
-        for i in range(0, len(sentences), 2):
-            sentence = sentences[i] if i < len(sentences) else ""
-            punctuation = sentences[i + 1] if i + 1 < len(sentences) else ""
-            
-            frase_completa = sentence + punctuation
-            
-            if len(mensagem_atual + frase_completa) > 200 and mensagem_atual:
-                mensagens.append(mensagem_atual.strip())
-                mensagem_atual = frase_completa
-            else:
-                mensagem_atual += frase_completa
-        
-        if mensagem_atual.strip():
-            mensagens.append(mensagem_atual.strip())
-        
-        return mensagens if mensagens else [texto]
+        """Quebra texto nas partes prontas para envio (pipeline único do utils.message_splitter)"""
+        return split_message(texto)
     
     def _get_resposta_padrao(self) -> List[str]:
         """Resposta padrão para casos de resposta vazia"""
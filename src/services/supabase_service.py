@@ -1,6 +1,8 @@
 import os
-import requests
 import logging
+from datetime import datetime, timezone
+from utils.http_session import get_session
+from utils.emoji_sanitizer import remove_emojis
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +26,7 @@ class SupabaseService:
                 'limit': '10'
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = get_session().get(url, headers=self.headers, params=params)
             if response.status_code == 200:
                 mensagens = response.json()
                 contexto = []
@@ -43,20 +45,73 @@ class SupabaseService:
 
     def salvar_mensagem(self, phone, message, role):
         """Salva mensagem no Supabase"""
+        return self.salvar_mensagens([{'phone': phone, 'role': role, 'text': message}])
+
+    def salvar_mensagens(self, mensagens):
+        """Salva várias mensagens ({phone, role, text}) em um único POST"""
         try:
             url = f"{self.url}/rest/v1/conversations"
-            data = {
-                'phone': phone,
-                'role': role,  # 'user' ou 'assistant'
-                'text': message
-            }
+            data = [
+                {
+                    'phone': mensagem['phone'],
+                    'role': mensagem['role'],  # 'user' ou 'assistant'
+                    'text': remove_emojis(mensagem['text'])
+                }
+                for mensagem in mensagens
+            ]
+            headers = {**self.headers, 'Prefer': 'return=minimal'}
             
-            response = requests.post(url, headers=self.headers, json=data)
+            response = get_session().post(url, headers=headers, json=data)
             if response.status_code == 201:
-                logger.info(f"Mensagem salva: {role} - {phone}")
+                logger.info(f"{len(data)} mensagens salvas")
                 return True
             logger.error(f"Erro Supabase: {response.status_code}")
             return False
         except Exception as e:
-            logger.error(f"Erro ao salvar mensagem: {e}")
-            return False
\ No newline at end of file
+            logger.error(f"Erro ao salvar mensagens: {e}")
+            return False
+
+    def buscar_dados_lead(self, phone, campos):
+        """Busca os dados salvos do lead; {} se não houver, None em caso de erro"""
+        try:
+            url = f"{self.url}/rest/v1/lead_data"
+            params = {
+                'phone': f'eq.{phone}',
+                'select': ','.join(campos),
+                'limit': '1'
+            }
+            
+            response = get_session().get(url, headers=self.headers, params=params)
+            if response.status_code == 200:
+                linhas = response.json()
+                return {k: v for k, v in linhas[0].items() if v is not None} if linhas else {}
+            logger.error(f"Erro Supabase ao buscar lead: {response.status_code}")
+            return None
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados do lead: {e}")
+            return None
+
+    def salvar_dados_leads(self, leads):
+        """Upsert em lote dos dados de leads ({telefone: campos alterados}) em uma requisição por conjunto de campos"""
+        # O PostgREST usa as colunas do primeiro objeto para o lote inteiro: linhas com
+        # campos diferentes vão em lotes separados para não apagar o que não mudou
+        agora = datetime.now(timezone.utc).isoformat()
+        lotes = {}
+        for phone, campos in leads.items():
+            lotes.setdefault(tuple(sorted(campos)), []).append({'phone': phone, **campos, 'updated_at': agora})
+        
+        url = f"{self.url}/rest/v1/lead_data"
+        headers = {**self.headers, 'Prefer': 'resolution=merge-duplicates,return=minimal'}
+        
+        try:
+            for linhas in lotes.values():
+                response = get_session().post(url, headers=headers, params={'on_conflict': 'phone'}, json=linhas)
+                if response.status_code not in (200, 201, 204):
+                    logger.error(f"Erro Supabase ao salvar leads: {response.status_code} - {response.text}")
+                    return False
+            
+            logger.info(f"Dados de {len(leads)} leads salvos em {len(lotes)} requisições")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar dados de leads: {e}")
+            return False
@@ -1,9 +1,11 @@
 import os
-import requests
-import tempfile
+import uuid
 import logging
+import threading
 from functools import wraps
 import time
+from utils.http_session import get_session
+from utils.transcription_cache import TranscriptionCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +25,97 @@ def log_performance(func):
             raise
     return wrapper
 
+class _MultipartAudioBody:
+    """
+    Corpo multipart/form-data lido direto do buffer do áudio.
+
+    Em vez de montar o corpo inteiro em memória (como o files= do requests faz),
+    entrega o preâmbulo, fatias do memoryview do áudio e o epílogo conforme o
+    http.client lê, então o upload não cria uma segunda cópia do arquivo.
+    """
+
+    def __init__(self, audio: bytearray, filename: str, fields: dict):
+        self.boundary = uuid.uuid4().hex
+
+        preamble = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        preamble += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+
+        self._parts = [memoryview(preamble), memoryview(audio), memoryview(f"\r\n--{self.boundary}--\r\n".encode())]
+        self._length = sum(len(part) for part in self._parts)
+        self._position = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        # Permite ao requests/urllib3 rebobinar o corpo antes de uma nova tentativa
+        base = {0: 0, 1: self._position, 2: self._length}[whence]
+        self._position = min(max(base + offset, 0), self._length)
+        return self._position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length - self._position
+
+        chunks = []
+        offset = self._position
+
+        for part in self._parts:
+            if size <= 0:
+                break
+            if offset >= len(part):
+                offset -= len(part)
+                continue
+
+            chunk = part[offset:offset + size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            offset = 0
+
+        data = b"".join(chunks)
+        self._position += len(data)
+        return data
+
 class WhisperService:
-    def __init__(self):
+    # Limita quantos áudios ficam em memória ao mesmo tempo (um buffer por transcrição)
+    _transcription_slots = threading.BoundedSemaphore(
+        int(os.getenv('WHISPER_MAX_CONCURRENT', 4))
+    )
+
+    def __init__(self, cache_client=None):
         self.api_key = os.getenv('OPENAI_API_KEY')
         self.max_size = int(os.getenv('OPENAI_MAX_AUDIO_TRANSCRIBE_MB', 25)) * 1024 * 1024
+        # Camada Redis do cache de transcrições, quando o handler tem Redis configurado
+        self.cache = TranscriptionCache(cache_client=cache_client)
     
     @log_performance
     def transcribe_audio(self, audio_url):
         """Transcreve áudio usando OpenAI Whisper"""
+        # Mesma URL (webhook repetido, entrega duplicada) não precisa nem baixar o áudio
+        url_key = self.cache.key_for_url(audio_url) if audio_url else None
+        if url_key:
+            cached = self.cache.get(url_key)
+            if cached is not None:
+                logger.info("Transcrição encontrada no cache (URL)")
+                return cached
+        
+        with self._transcription_slots:
+            return self._transcribe_audio(audio_url, url_key)
+
+    def _transcribe_audio(self, audio_url, url_key):
         try:
             logger.info(f"Iniciando transcrição de áudio: {audio_url[:50]}...")
             
@@ -40,7 +125,7 @@ class WhisperService:
                 return None
             
             # Baixa o áudio com validação de tamanho
-            response = requests.get(audio_url, timeout=30, stream=True)
+            response = get_session().get(audio_url, timeout=30, stream=True)
             if response.status_code != 200:
                 logger.error(f"Falha ao baixar áudio: {response.status_code}")
                 return None
@@ -49,46 +134,49 @@ class WhisperService:
             content_length = response.headers.get('content-length')
             if content_length and int(content_length) > self.max_size:
                 logger.warning(f"Arquivo muito grande: {content_length} bytes")
+                response.close()
                 return None
             
-            # Salva temporariamente com validação
-            audio_data = b""
-            for chunk in response.iter_content(chunk_size=8192):
-                audio_data += chunk
-                if len(audio_data) > self.max_size:
+            # Acumula em um único bytearray (crescimento amortizado, sem recópia a cada chunk)
+            audio_data = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if len(audio_data) + len(chunk) > self.max_size:
                     logger.warning(f"Arquivo excede limite de {self.max_size} bytes")
+                    response.close()
                     return None
+                audio_data += chunk
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
+            # Áudio encaminhado chega com outra URL, mas com os mesmos bytes
+            content_key = self.cache.key_for_bytes(audio_data)
+            cached = self.cache.get(content_key)
+            if cached is not None:
+                logger.info("Transcrição encontrada no cache (conteúdo)")
+                self.cache.set([url_key], cached)
+                return cached
             
-            # Transcreve com Whisper
+            # Transcreve com Whisper, enviando o buffer direto no multipart (sem arquivo temporário)
+            body = _MultipartAudioBody(
+                audio_data,
+                filename='audio.ogg',
+                fields={'model': 'whisper-1', 'language': 'pt'}
+            )
             headers = {
-                'Authorization': f'Bearer {self.api_key}'
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': body.content_type
             }
             
-            with open(temp_file_path, 'rb') as audio_file:
-                files = {
-                    'file': audio_file,
-                    'model': (None, 'whisper-1'),
-                    'language': (None, 'pt')
-                }
-                
-                response = requests.post(
-                    'https://api.openai.com/v1/audio/transcriptions',
-                    headers=headers,
-                    files=files,
-                    timeout=30
-                )
-            
-            # Remove arquivo temporário
-            os.unlink(temp_file_path)
+            response = get_session().post(
+                'https://api.openai.com/v1/audio/transcriptions',
+                headers=headers,
+                data=body,
+                timeout=30
+            )
             
             if response.status_code == 200:
                 result = response.json()
                 text = result.get('text', '').strip()
                 logger.info(f"Áudio transcrito com sucesso: {len(text)} caracteres")
+                self.cache.set([url_key, content_key], text)
                 return text
             else:
                 logger.error(f"Erro Whisper: {response.status_code}")
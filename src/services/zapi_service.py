@@ -1,9 +1,9 @@
-import requests
 import time
 import logging
 import os
 import re
 from typing import List
+from utils.http_session import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +43,7 @@ class ZAPIService:
                 "Client-Token": self.client_token
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            response = get_session().post(url, json=data, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 logger.info(f"Typing indicator enviado para {phone}")
@@ -69,7 +69,7 @@ class ZAPIService:
                 "Client-Token": self.client_token
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            response = get_session().post(url, json=data, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 logger.info(f"Typing indicator parado para {phone}")
@@ -100,7 +100,7 @@ class ZAPIService:
                 "Client-Token": self.client_token
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=15)
+            response = get_session().post(url, json=data, headers=headers, timeout=15)
             
             if response.status_code == 200:
                 logger.info(f"Mensagem enviada para {phone}")
@@ -0,0 +1,29 @@
+import os
+import json
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "data")
+
+
+def load_data(name: str) -> list:
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """RedisClient com os scripts Lua rodando no fakeredis (precisa de fakeredis[lua])."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    from clients import redis_client as module
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(module.redis, "ConnectionPool", lambda **kwargs: server)
+    monkeypatch.setattr(
+        module.redis,
+        "Redis",
+        lambda connection_pool: fakeredis.FakeRedis(server=connection_pool, decode_responses=True),
+    )
+
+    return module.RedisClient()
@@ -0,0 +1,157 @@
+import os
+import json
+import pytest
+from utils.batch_writer import BatchWriter
+
+
+class FlushRecorder:
+    """flush_fn que grava em memória e pode ser colocado para falhar."""
+
+    def __init__(self):
+        self.rows = []
+        self.fail = False
+
+    def __call__(self, rows):
+        if self.fail:
+            raise ConnectionError("banco fora do ar")
+        self.rows.extend(rows)
+
+
+@pytest.fixture
+def recorder():
+    return FlushRecorder()
+
+
+@pytest.fixture
+def writer(recorder, tmp_path):
+    # Intervalo longo: os testes chamam flush() diretamente
+    writer = BatchWriter(recorder, name="messages", spool_dir=str(tmp_path), flush_interval=3600)
+    yield writer
+    recorder.fail = False
+    writer.close()
+
+
+def write_spool(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def test_flush_writes_rows_in_arrival_order(writer, recorder):
+    writer.put({"id": 1}, key="5511")
+    writer.put({"id": 2}, key="5522")
+
+    assert writer.has_pending("5511")
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}, {"id": 2}]
+    assert not writer.has_pending("5511")
+
+
+def test_failed_flush_without_spool_keeps_the_batch_in_memory(recorder):
+    writer = BatchWriter(recorder, name="messages", flush_interval=3600)
+    recorder.fail = True
+    writer.put({"id": 1}, key="5511")
+
+    assert not writer.flush()
+    assert writer.has_pending("5511")
+
+    writer.put({"id": 2}, key="5511")
+    recorder.fail = False
+
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}, {"id": 2}]
+    writer.close()
+
+
+def test_failed_flush_goes_to_the_spool_and_is_replayed_first(writer, recorder, tmp_path):
+    recorder.fail = True
+    writer.put({"id": 1})
+
+    assert not writer.flush()
+    assert os.listdir(tmp_path) == [f"messages-{os.getpid()}.jsonl"]
+
+    recorder.fail = False
+    writer.put({"id": 2})
+
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}, {"id": 2}]
+    assert os.listdir(tmp_path) == []
+    assert writer.get_metrics()["replayed_rows"] == 1
+
+
+def test_new_batches_queue_behind_a_spool_that_still_fails(writer, recorder, tmp_path):
+    recorder.fail = True
+    writer.put({"id": 1})
+    writer.flush()
+    writer.put({"id": 2})
+
+    assert not writer.flush()
+
+    recorder.fail = False
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}, {"id": 2}]
+    assert os.listdir(tmp_path) == []
+
+
+def test_replays_spools_left_by_other_processes(writer, recorder, tmp_path):
+    write_spool(tmp_path / "messages-999999.jsonl", [{"id": 1}])
+    write_spool(tmp_path / "outro-999999.jsonl", [{"id": 9}])
+
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}]
+    assert os.listdir(tmp_path) == ["outro-999999.jsonl"]
+
+
+def test_does_not_replay_a_file_claimed_by_a_running_process(writer, recorder, tmp_path):
+    # pid 1 sempre existe: o arquivo está sendo regravado por outro processo
+    claimed = tmp_path / "messages-999999.jsonl.1.replay"
+    write_spool(claimed, [{"id": 1}])
+
+    assert writer.flush()
+    assert recorder.rows == []
+    assert claimed.exists()
+
+
+def test_takes_over_a_file_claimed_by_a_process_that_died(writer, recorder, tmp_path):
+    write_spool(tmp_path / "messages-999998.jsonl.999999.replay", [{"id": 1}])
+
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}]
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_replay_keeps_the_file_claimed_by_this_process(writer, recorder, tmp_path):
+    write_spool(tmp_path / "messages-999999.jsonl", [{"id": 1}])
+    recorder.fail = True
+
+    assert not writer.flush()
+    [claimed] = os.listdir(tmp_path)
+    assert claimed.startswith(f"messages-999999.jsonl.{os.getpid()}.")
+
+    # O dono do spool original volta a gravar no mesmo nome: nada é sobrescrito
+    write_spool(tmp_path / "messages-999999.jsonl", [{"id": 2}])
+    recorder.fail = False
+
+    assert writer.flush()
+    assert recorder.rows == [{"id": 1}, {"id": 2}]
+    assert os.listdir(tmp_path) == []
+
+
+def test_two_writers_never_replay_the_same_rows(recorder, tmp_path):
+    write_spool(tmp_path / "messages-999999.jsonl", [{"id": n} for n in range(5)])
+    first = BatchWriter(recorder, name="messages", spool_dir=str(tmp_path), flush_interval=3600)
+    second = BatchWriter(recorder, name="messages", spool_dir=str(tmp_path), flush_interval=3600)
+
+    assert first.flush() and second.flush()
+    assert recorder.rows == [{"id": n} for n in range(5)]
+
+    first.close()
+    second.close()
+
+
+def test_close_flushes_pending_rows(recorder, tmp_path):
+    writer = BatchWriter(recorder, name="messages", spool_dir=str(tmp_path), flush_interval=3600)
+    writer.put({"id": 1})
+    writer.close()
+
+    assert recorder.rows == [{"id": 1}]
@@ -0,0 +1,123 @@
+import time
+import threading
+import pytest
+from src.services import followup_scheduler_service as module
+from src.services.followup_scheduler_service import FollowUpSchedulerService
+
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch):
+    monkeypatch.setitem(module.FOLLOWUP_DELAYS, "30m", 0.05)
+    monkeypatch.setitem(module.FOLLOWUP_DELAYS, "2h", 0.1)
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+        self.exhausted = []
+        self.done = threading.Event()
+
+    def send(self, phone, reason):
+        self.sent.append((phone, reason))
+
+    def on_exhausted(self, phone):
+        self.exhausted.append(phone)
+        self.done.set()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_30m_is_followed_by_2h_and_then_exhausted():
+    recorder = Recorder()
+    scheduler = FollowUpSchedulerService(recorder.send, on_exhausted=recorder.on_exhausted)
+
+    scheduler.schedule("5511", "30m", "no_response")
+
+    assert recorder.done.wait(2)
+    assert recorder.sent == [("5511", "no_response"), ("5511", "no_response")]
+    assert recorder.exhausted == ["5511"]
+    assert scheduler.get_metrics()["pending_followups"] == 0
+
+
+def test_cancel_drops_the_pending_followup():
+    recorder = Recorder()
+    scheduler = FollowUpSchedulerService(recorder.send, on_exhausted=recorder.on_exhausted)
+
+    scheduler.schedule("5511", "30m")
+    scheduler.cancel("5511")
+    time.sleep(0.2)
+
+    assert recorder.sent == []
+    assert scheduler.get_metrics()["cancelled"] == 1
+
+
+def test_none_cancels_like_a_lead_reply():
+    recorder = Recorder()
+    scheduler = FollowUpSchedulerService(recorder.send)
+
+    scheduler.schedule("5511", "30m")
+    scheduler.schedule("5511", "none")
+    time.sleep(0.2)
+
+    assert recorder.sent == []
+
+
+def test_new_request_replaces_the_pending_one():
+    recorder = Recorder()
+    scheduler = FollowUpSchedulerService(recorder.send, on_exhausted=recorder.on_exhausted)
+
+    scheduler.schedule("5511", "30m", "no_response")
+    scheduler.schedule("5511", "2h", "awaiting_docs")
+
+    # A entrada antiga do heap vence primeiro e é descartada pelo token
+    assert recorder.done.wait(2)
+    assert recorder.sent == [("5511", "awaiting_docs")]
+    assert recorder.exhausted == ["5511"]
+
+
+def test_lead_reply_while_sending_stops_the_chain():
+    recorder = Recorder()
+    release = threading.Event()
+    sending = threading.Event()
+
+    def send(phone, reason):
+        sending.set()
+        release.wait(2)
+        recorder.send(phone, reason)
+
+    scheduler = FollowUpSchedulerService(send, on_exhausted=recorder.on_exhausted)
+    scheduler.schedule("5511", "30m")
+
+    assert sending.wait(2)
+    scheduler.cancel("5511")
+    release.set()
+
+    assert wait_until(lambda: scheduler.get_metrics()["sent"] == 1)
+    time.sleep(0.2)
+    assert recorder.sent == [("5511", None)]
+    assert recorder.exhausted == []
+    assert scheduler.get_metrics()["pending_followups"] == 0
+
+
+def test_send_failure_is_counted_and_the_chain_continues():
+    recorder = Recorder()
+    calls = []
+
+    def send(phone, reason):
+        calls.append(phone)
+        if len(calls) == 1:
+            raise ConnectionError("Z-API fora do ar")
+
+    scheduler = FollowUpSchedulerService(send, on_exhausted=recorder.on_exhausted)
+    scheduler.schedule("5511", "30m")
+
+    assert recorder.done.wait(2)
+    assert len(calls) == 2
+    assert scheduler.get_metrics()["failed"] == 1
@@ -0,0 +1,11 @@
+import pytest
+from conftest import load_data
+from utils.message_splitter import split_message
+
+GOLDEN = load_data("message_splitter_golden.json")
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=lambda case: case["input"][:30])
+def test_split_message_matches_golden(case):
+    # Regravar com: python benchmarks/message_splitter_benchmark.py --update
+    assert split_message(case["input"]) == case["expected"]
@@ -0,0 +1,114 @@
+import json
+import time
+
+QUEUE = "message_queue"
+LEASE = 60
+
+
+def test_enqueue_appends_and_keeps_first_deadline_in_the_queue(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    redis_client.add_to_queue(QUEUE, "5511", "tudo bem?", append=True)
+
+    item = json.loads(redis_client.get_queue(QUEUE)["5511"])
+
+    assert item["value"] == "oi tudo bem?"
+    assert redis_client.queue_size(QUEUE) == 1
+    assert redis_client.get_next_deadline(QUEUE) == item["expired_at"]
+
+
+def test_enqueue_without_append_replaces_the_value(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    redis_client.add_to_queue(QUEUE, "5511", "novo")
+
+    assert json.loads(redis_client.get_queue(QUEUE)["5511"])["value"] == "novo"
+
+
+def test_enqueue_signals_the_worker_only_for_a_new_phone(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    assert redis_client.wait_for_queue(QUEUE, 0.01)
+
+    redis_client.add_to_queue(QUEUE, "5511", "de novo", append=True)
+    assert not redis_client.wait_for_queue(QUEUE, 0.01)
+
+
+def test_claim_due_only_returns_expired_phones_up_to_the_limit(redis_client):
+    for phone in ("1", "2", "3"):
+        redis_client.add_to_queue(QUEUE, phone, f"msg {phone}")
+
+    now = time.time()
+    assert redis_client.claim_due(QUEUE, now=now, owner="a", lease_seconds=LEASE) == {}
+
+    later = now + redis_client.debounce_seconds + 1
+    claimed = redis_client.claim_due(QUEUE, now=later, owner="a", lease_seconds=LEASE, limit=2)
+
+    assert len(claimed) == 2
+    assert redis_client.queue_size(QUEUE) == 1
+    assert set(claimed) | set(redis_client.get_queue(QUEUE)) == {"1", "2", "3"}
+
+
+def test_claimed_phone_is_not_claimed_by_another_worker(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    later = time.time() + redis_client.debounce_seconds + 1
+
+    assert redis_client.claim_due(QUEUE, now=later, owner="a", lease_seconds=LEASE) == {"5511": "oi"}
+
+    # Mensagem nova durante o processamento fica na fila, sem ser reivindicada
+    redis_client.add_to_queue(QUEUE, "5511", "mais uma", append=True)
+    assert redis_client.claim_due(QUEUE, now=later + 10, owner="b", lease_seconds=LEASE) == {}
+    assert "5511" in redis_client.get_queue(QUEUE)
+
+
+def test_release_requeues_messages_that_arrived_during_the_claim(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    later = time.time() + redis_client.debounce_seconds + 1
+    redis_client.claim_due(QUEUE, now=later, owner="a", lease_seconds=LEASE)
+    redis_client.add_to_queue(QUEUE, "5511", "mais uma", append=True)
+    deadline = json.loads(redis_client.get_queue(QUEUE)["5511"])["expired_at"]
+
+    assert not redis_client.release_claim(QUEUE, "5511", "b")
+    assert redis_client.release_claim(QUEUE, "5511", "a")
+    assert redis_client.get_next_deadline(QUEUE) == deadline
+
+    claimed = redis_client.claim_due(QUEUE, now=deadline + 1, owner="b", lease_seconds=LEASE)
+    assert claimed == {"5511": "mais uma"}
+
+
+def test_expired_lease_requeues_the_claimed_value_before_new_messages(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "primeira")
+    later = time.time() + redis_client.debounce_seconds + 1
+    redis_client.claim_due(QUEUE, now=later, owner="a", lease_seconds=LEASE)
+    redis_client.add_to_queue(QUEUE, "5511", "segunda", append=True)
+
+    # O worker "a" morreu: depois do lease, "b" recebe as duas, na ordem
+    claimed = redis_client.claim_due(QUEUE, now=later + LEASE + 1, owner="b", lease_seconds=LEASE)
+
+    assert claimed == {"5511": "primeira segunda"}
+    assert not redis_client.release_claim(QUEUE, "5511", "a")
+    assert redis_client.release_claim(QUEUE, "5511", "b")
+
+
+def test_extend_claim_only_for_the_owner(redis_client):
+    redis_client.add_to_queue(QUEUE, "5511", "oi")
+    later = time.time() + redis_client.debounce_seconds + 1
+    redis_client.claim_due(QUEUE, now=later, owner="a", lease_seconds=LEASE)
+
+    assert redis_client.extend_claim(QUEUE, "5511", "a", LEASE)
+    assert not redis_client.extend_claim(QUEUE, "5511", "b", LEASE)
+    assert not redis_client.extend_claim(QUEUE, "9999", "a", LEASE)
+
+
+def test_sync_deadlines_indexes_items_written_before_the_sorted_set(redis_client):
+    redis_client._redis.hset(QUEUE, "5511", json.dumps({"value": "oi", "expired_at": 100.0}))
+
+    assert redis_client.sync_deadlines(QUEUE) == 1
+    assert redis_client.get_next_deadline(QUEUE) == 100.0
+    assert redis_client.sync_deadlines(QUEUE) == 0
+
+
+def test_list_append_never_creates_a_window(redis_client):
+    assert not redis_client.list_append("context:5511", ["a"], max_len=3, ttl_seconds=60)
+    assert redis_client.list_range("context:5511") is None
+
+    redis_client.list_replace("context:5511", ["a", "b"], ttl_seconds=60)
+    assert redis_client.list_append("context:5511", ["c", "d"], max_len=3, ttl_seconds=60)
+    assert redis_client.list_range("context:5511") == ["b", "c", "d"]
@@ -0,0 +1,68 @@
+import json
+import random
+import pytest
+from conftest import load_data
+from utils.reply_parser import parse_reply
+
+CORPUS = load_data("reply_parser_corpus.json")
+
+
+def loads(text):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) and "reply" in value else None
+
+
+JSON_CASES = [case for case in CORPUS if loads(case["input"])]
+FUZZ_ALPHABET = '{}[]",:\\ \nu0'
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda case: case["name"])
+def test_parse_reply_matches_corpus(case):
+    assert parse_reply(case["input"]).reply == case["expected_reply"]
+
+
+@pytest.mark.parametrize("case", JSON_CASES, ids=lambda case: case["name"])
+def test_valid_json_round_trips(case):
+    assert parse_reply(case["input"]).fields == loads(case["input"])
+
+
+@pytest.mark.parametrize("case", JSON_CASES, ids=lambda case: case["name"])
+def test_every_cut_yields_a_prefix_of_the_reply(case):
+    text = case["input"]
+    original = loads(text)["reply"]
+
+    for end in range(len(text) + 1):
+        parsed = parse_reply(text[:end])
+        partial = parsed.fields.get("reply")
+
+        if not isinstance(partial, str):
+            continue
+
+        if parsed.is_json:
+            assert original.startswith(partial), text[:end]
+
+        # Emojis escapados em par (\ud83d\ude00) não saem em metades soltas
+        partial.encode("utf-8")
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda case: case["name"])
+def test_mutated_input_never_raises(case):
+    rng = random.Random(case["name"])
+
+    for _ in range(200):
+        chars = list(case["input"])
+
+        for _ in range(rng.randint(1, 5)):
+            position = rng.randint(0, len(chars))
+            operation = rng.random()
+            if operation < 0.4 and chars:
+                del chars[min(position, len(chars) - 1)]
+            elif operation < 0.8:
+                chars.insert(position, rng.choice(FUZZ_ALPHABET))
+            else:
+                chars = chars[:position]
+
+        parse_reply("".join(chars))
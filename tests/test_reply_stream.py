@@ -0,0 +1,111 @@
+import re
+import json
+import random
+import pytest
+from conftest import load_data
+from utils.message_splitter import iter_sentences, split_message
+from utils.reply_parser import parse_reply
+from utils.reply_stream import ReplyStream
+
+# Mesmo padrão do services.response_orchestrator_service
+AGENT_TRIGGER_PATTERN = re.compile(r"#\d+")
+GOLDEN = [case["input"] for case in load_data("message_splitter_golden.json") if case["input"].strip()]
+
+
+def sentences(parts):
+    # A pontuação final de uma frase cortada pode variar ("E qual o." x "E qual o?"): só o texto conta
+    return [" ".join(s.split()).rstrip(".?!") for part in parts for s in iter_sentences(part)]
+
+
+def run_stream(raw, hold_at=None, rng=None, chunk_size=7):
+    stream = ReplyStream(on_parts=lambda parts: None, hold_pattern=AGENT_TRIGGER_PATTERN)
+    pos = 0
+
+    while pos < len(raw):
+        size = rng.randint(1, 12) if rng else chunk_size
+
+        if hold_at is not None and pos <= hold_at < pos + size:
+            stream.feed(raw[pos:hold_at])
+            stream.hold()
+            pos, hold_at = hold_at, None
+            continue
+
+        stream.feed(raw[pos:pos + size])
+        pos += size
+
+    return stream
+
+
+def final_reply(raw):
+    parsed = parse_reply(raw)
+    return parsed.reply if parsed.is_json and parsed.reply else raw
+
+
+def assert_covers(stream, reply):
+    """O entregue no streaming mais o restante cobre o reply final, sem perder nem repetir."""
+    expected = sentences(split_message(reply))
+    rest = stream.finish()
+
+    if rest is None:
+        rest = stream.undelivered_parts(reply)
+
+    sent = sentences(stream.delivered)
+
+    # O que já saiu e não faz parte do reply final (texto antes do gatilho de agente) não tem como ser desfeito
+    if expected[:len(sent)] != sent:
+        assert sentences(rest) == expected
+    else:
+        assert sentences(stream.delivered + rest) == expected
+
+
+def test_truncated_json_after_the_first_part():
+    raw = '{"reply": "Oi João, aqui é a Eliane da Evex. Temos apartamentos de dois quartos no centro. Os valores começam em 300 mil'
+    stream = run_stream(raw)
+
+    assert stream.delivered
+    assert_covers(stream, final_reply(raw))
+
+
+def test_hold_after_the_first_part():
+    raw = '{"reply": "Oi! Sou a Eliane. O Moradas do Lago tem unidades de 2 e 3 quartos. A entrada é facilitada. Qual a sua faixa de valor?", "c2s": null}'
+    stream = run_stream(raw, hold_at=60)
+
+    assert stream.finish() is None
+    assert_covers(stream, final_reply(raw))
+
+
+def test_agent_trigger_sends_the_agent_reply_whole():
+    stream = run_stream("Oi! Vou te passar para um especialista. #2")
+    reply = "Olá, aqui é o especialista financeiro. Posso simular o seu financiamento agora. Qual a sua renda mensal?"
+
+    assert stream.undelivered_parts(reply) == split_message(reply)
+    assert_covers(stream, reply)
+
+
+def test_json_in_the_middle_of_plain_text_is_held():
+    raw = 'Claro. Segue a resposta. {"reply": "Temos unidades disponíveis. Quer agendar uma visita?"}'
+    stream = run_stream(raw)
+
+    assert stream.finish() is None
+    assert_covers(stream, final_reply(raw))
+
+
+def test_complete_stream_delivers_exactly_split_message():
+    for text in GOLDEN:
+        stream = run_stream(json.dumps({"reply": text}, ensure_ascii=False))
+        assert sentences(stream.delivered + stream.finish()) == sentences(split_message(text))
+
+
+@pytest.mark.parametrize("as_json", [False, True], ids=["texto", "json"])
+def test_random_cuts_and_holds_never_lose_or_repeat_text(as_json):
+    rng = random.Random(42)
+
+    for text in GOLDEN:
+        raw = json.dumps({"reply": text, "c2s": None}, ensure_ascii=False) if as_json else text
+
+        for _ in range(20):
+            cut = raw[:rng.randint(len(raw) // 2, len(raw))]
+            hold_at = rng.randint(0, len(cut)) if rng.random() < 0.3 else None
+            stream = run_stream(cut, hold_at=hold_at, rng=rng)
+
+            assert_covers(stream, final_reply(cut))
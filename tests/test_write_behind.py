@@ -0,0 +1,73 @@
+import pytest
+from utils.write_behind import WriteBehindQueue
+
+
+class FlushRecorder:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, batch):
+        if self.fail:
+            raise ConnectionError("banco fora do ar")
+        self.batches.append(batch)
+        return True
+
+
+@pytest.fixture
+def recorder():
+    return FlushRecorder()
+
+
+@pytest.fixture
+def queue(recorder):
+    queue = WriteBehindQueue(recorder, name="leads", flush_interval=3600)
+    yield queue
+    recorder.fail = False
+    queue.close()
+
+
+def test_updates_of_the_same_key_are_coalesced(queue, recorder):
+    queue.put("5511", {"nome": "Ana", "renda": 3000})
+    queue.put("5511", {"renda": 5000})
+    queue.put("5522", {"nome": "Bia"})
+
+    assert queue.get_pending("5511") == {"nome": "Ana", "renda": 5000}
+    assert queue.flush()
+    assert recorder.batches == [
+        {"5511": {"nome": "Ana", "renda": 5000}, "5522": {"nome": "Bia"}}
+    ]
+    assert queue.get_metrics()["coalesced"] == 1
+    assert queue.get_pending("5511") is None
+
+
+def test_failed_batch_is_requeued_under_newer_changes(queue, recorder):
+    queue.put("5511", {"nome": "Ana", "renda": 3000})
+    recorder.fail = True
+
+    assert not queue.flush()
+    assert queue.get_pending("5511") == {"nome": "Ana", "renda": 3000}
+
+    queue.put("5511", {"renda": 5000})
+    recorder.fail = False
+
+    assert queue.flush()
+    assert recorder.batches == [{"5511": {"nome": "Ana", "renda": 5000}}]
+    assert queue.get_metrics()["failed_flushes"] == 1
+
+
+def test_flush_fn_returning_false_counts_as_failure(recorder):
+    queue = WriteBehindQueue(lambda batch: False, name="leads", flush_interval=3600)
+    queue.put("5511", {"nome": "Ana"})
+
+    assert not queue.flush()
+    assert queue.get_pending("5511") == {"nome": "Ana"}
+
+
+def test_full_batch_wakes_the_flush_thread(recorder):
+    queue = WriteBehindQueue(recorder, name="leads", flush_interval=3600, max_batch=2)
+    queue.put("5511", {"nome": "Ana"})
+    queue.put("5522", {"nome": "Bia"})
+    queue.close()
+
+    assert sum(len(batch) for batch in recorder.batches) == 2
@@ -1,14 +1,19 @@
 import os
-import time
-from threading import Thread
+import asyncio
 from interfaces.tools.tool_interface import ITool
-from interfaces.clients.ai_interface import IAI
+from interfaces.clients.async_ai_interface import IAsyncAI
 from interfaces.clients.database_interface import IDatabase
 from interfaces.clients.chat_interface import IChat
 from utils.logger import logger, to_json_dump
 
 
 class CRMTool(ITool):
+    # Mensagens de vendedor agendadas, compartilhadas entre instâncias: um reload
+    # das tools não pode deixar tasks pendentes sem referência
+    _seller_messages: set[asyncio.Task] = set()
+    # Sinalizado no desligamento do worker: as mensagens em espera saem na hora
+    _shutdown = asyncio.Event()
+
     name = "crm"
     model = "gpt-4o-mini"
     _function_call_input = "Avise que em breve time de desenvolvimento entrará em contato para explicar como implementar e valores. Não diga olá, apenas responda como se a conversa estivesse continuando. Seja simpático e se deixe a disposição se houver alguma dúvida."
@@ -44,7 +49,7 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
 
     def __init__(
         self,
-        ai_client: IAI,
+        ai_client: IAsyncAI,
         database_client: IDatabase,
         chat_client: IChat,
     ):
@@ -96,50 +101,91 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
                 "message": f"Erro ao salvar: {str(e)}"
             }
 
-    def _send_message_from_seller_to_customer(
+    async def _send_message_from_seller_to_customer(
         self, phone: str, lead_name: str, motivation: str
     ) -> None:
-        response = self.ai.create_model_response(
-            model=self.model,
-            input=[
-                {
-                    "role": "user",
-                    "content": self._seller_prompt.format(
-                        name=lead_name,
-                        motivation=motivation,
-                    ),
-                }
-            ],
-        )
+        try:
+            response = await self.ai.create_model_response(
+                model=self.model,
+                input=[
+                    {
+                        "role": "user",
+                        "content": self._seller_prompt.format(
+                            name=lead_name,
+                            motivation=motivation,
+                        ),
+                    }
+                ],
+            )
+
+            logger.info(
+                f"[CRM TOOL] Resposta gerada pela IA que será enviada do vendedor para o telefone {phone}: {to_json_dump(response)}"
+            )
+
+            messages = [
+                o.get("text", "")
+                for message in response.get("output", [])
+                if message.get("status", "") == "completed"
+                for o in message.get("content", [])
+                if o.get("type") == "output_text"
+            ]
+            message = ". ".join(messages).strip()
+
+            seller_message_waiting_time_in_seconds = int(
+                os.getenv("SELLER_MESSAGE_WAITING_TIME_IN_SECONDS", 180)
+            )
+
+            # Espera o tempo configurado, ou menos se o worker estiver desligando
+            try:
+                await asyncio.wait_for(
+                    self._shutdown.wait(), timeout=seller_message_waiting_time_in_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            await asyncio.to_thread(
+                self.chat.send_message,
+                phone=phone,
+                message=message,
+            )
+
+            logger.info(
+                f"[CRM TOOL] Mensagem de vendedor enviada para o telefone {phone}: {message}"
+            )
 
-        logger.info(
-            f"[CRM TOOL] Resposta gerada pela IA que será enviada do vendedor para o telefone {phone}: {to_json_dump(response)}"
-        )
+        except Exception as e:
+            logger.exception(
+                f"[CRM TOOL] ❌ Erro ao enviar a mensagem de vendedor para o telefone {phone}: \n{to_json_dump(e)}"
+            )
 
-        messages = [
-            o.get("text", "")
-            for message in response.get("output", [])
-            if message.get("status", "") == "completed"
-            for o in message.get("content", [])
-            if o.get("type") == "output_text"
-        ]
-        message = ". ".join(messages).strip()
+    @classmethod
+    async def drain(cls, timeout: float | None = None) -> None:
+        """
+        Envia já as mensagens de vendedor ainda agendadas. Roda no desligamento
+        do worker, antes de fechar o cliente assíncrono da OpenAI.
+        """
+        pending = list(cls._seller_messages)
 
-        seller_message_waiting_time_in_seconds = int(
-            os.getenv("SELLER_MESSAGE_WAITING_TIME_IN_SECONDS", 180)
-        )
+        if not pending:
+            return
 
-        time.sleep(seller_message_waiting_time_in_seconds)
-        self.chat.send_message(
-            phone=phone,
-            message=message,
+        logger.info(
+            f"[CRM TOOL] Enviando {len(pending)} mensagens de vendedor pendentes antes de desligar"
         )
 
-        logger.info(
-            f"[CRM TOOL] Mensagem de vendedor enviada para o telefone {phone}: {message}"
+        cls._shutdown.set()
+        done, not_done = await asyncio.wait(
+            pending,
+            timeout=timeout
+            or float(os.getenv("SELLER_MESSAGE_DRAIN_TIMEOUT_SECONDS", 30)),
         )
 
-    def _function_call_output(
+        if not_done:
+            logger.error(
+                f"[CRM TOOL] {len(not_done)} mensagens de vendedor não foram enviadas a tempo no desligamento"
+            )
+
+    async def _function_call_output(
         self,
         function_call_id: str,
         call_id: str,
@@ -147,7 +193,7 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
         output: str,
         arguments: dict,
     ) -> tuple[list, str, str]:
-        fc_input, response = self.ai.function_call_output(
+        fc_input, response = await self.ai.function_call_output(
             function_call_id=function_call_id,
             call_id=call_id,
             call_name=call_name,
@@ -186,7 +232,8 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
         )
 
         # Salva lead no banco de dados (Supabase) ao invés de CRM externo
-        lead_result = self._save_lead_to_database(
+        lead_result = await asyncio.to_thread(
+            self._save_lead_to_database,
             company_name=company_name,
             lead_name=lead_name,
             phone=phone,
@@ -195,7 +242,7 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
 
         logger.info(f"[CRM TOOL] Resultado do salvamento: {to_json_dump(lead_result)}")
 
-        fc_input, fc_msg_id, function_call_output = self._function_call_output(
+        fc_input, fc_msg_id, function_call_output = await self._function_call_output(
             function_call_id=function_call_id,
             call_id=call_id,
             call_name=call_name,
@@ -207,12 +254,12 @@ Só altere as variáveis, o resto da mensagem deve ser o mesmo do modelo."""
             f"[CRM TOOL] Resposta da ferramenta '{self.name}' com o function_call_id: {function_call_id}, call_id: {call_id}, call_name: {call_name}: {to_json_dump(function_call_output)}"
         )
 
-        # Inicia thread para enviar mensagem do vendedor (mantida funcionalidade)
-        Thread(
-            target=self._send_message_from_seller_to_customer,
-            args=(phone, lead_name, motivation),
-            daemon=False,
-        ).start()
+        # Agenda a mensagem do vendedor no loop do worker, sem segurar a resposta atual
+        task = asyncio.create_task(
+            self._send_message_from_seller_to_customer(phone, lead_name, motivation)
+        )
+        self._seller_messages.add(task)
+        task.add_done_callback(self._seller_messages.discard)
 
         return [
             *fc_input,
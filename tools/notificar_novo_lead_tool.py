@@ -4,9 +4,10 @@ Ferramenta para notificar e registrar novos leads com integração Contact2Sale
 
 import os
 import re
+import asyncio
 import logging
 from interfaces.tools.tool_interface import ITool
-from interfaces.clients.ai_interface import IAI
+from interfaces.clients.async_ai_interface import IAsyncAI
 from interfaces.clients.chat_interface import IChat
 from services.contact2sale_service import Contact2SaleService
 from interfaces.clients import LeadInfo
@@ -18,7 +19,7 @@ class NotificarNovoLeadTool(ITool):
     
     def __init__(
         self,
-        ai_client: IAI,
+        ai_client: IAsyncAI,
         chat_client: IChat,
     ):
         self.ai = ai_client
@@ -170,7 +171,7 @@ class NotificarNovoLeadTool(ITool):
         except Exception as e:
             logger.error(f"❌ Erro ao enviar notificação: {str(e)}")
     
-    def _function_call_output(
+    async def _function_call_output(
         self,
         function_call_id: str,
         call_id: str,
@@ -179,7 +180,7 @@ class NotificarNovoLeadTool(ITool):
         arguments: dict,
     ) -> tuple[list, str, str]:
         """Processa saída da function call"""
-        fc_input, response = self.ai.function_call_output(
+        fc_input, response = await self.ai.function_call_output(
             function_call_id=function_call_id,
             call_id=call_id,
             call_name=call_name,
@@ -221,13 +222,13 @@ class NotificarNovoLeadTool(ITool):
             
             logger.info(f"[NOTIFICAR LEAD] Lead info criado: {to_json_dump(lead_info.__dict__)}")
             
-            # Envia para Contact2Sale
-            c2s_result = self._send_to_contact2sale(lead_info)
+            # Envia para Contact2Sale (HTTP bloqueante fora do loop do worker)
+            c2s_result = await asyncio.to_thread(self._send_to_contact2sale, lead_info)
             
             logger.info(f"[NOTIFICAR LEAD] Resultado C2S: {to_json_dump(c2s_result)}")
             
             # Envia notificação para equipe
-            self._send_notification_to_team(lead_info, c2s_result)
+            await asyncio.to_thread(self._send_notification_to_team, lead_info, c2s_result)
             
             # Monta resposta para o usuário
             if c2s_result.get("success"):
@@ -247,7 +248,7 @@ class NotificarNovoLeadTool(ITool):
                 )
             
             # Processa function call output
-            fc_input, fc_msg_id, final_output = self._function_call_output(
+            fc_input, fc_msg_id, final_output = await self._function_call_output(
                 function_call_id=function_call_id,
                 call_id=call_id,
                 call_name=call_name,
@@ -281,7 +282,7 @@ class NotificarNovoLeadTool(ITool):
                 "✅ Sua solicitação foi registrada! Nossa equipe entrará em contato em breve."
             )
             
-            fc_input, fc_msg_id, final_output = self._function_call_output(
+            fc_input, fc_msg_id, final_output = await self._function_call_output(
                 function_call_id=function_call_id,
                 call_id=call_id,
                 call_name=call_name,
@@ -0,0 +1,273 @@
+import os
+import re
+import glob
+import json
+import fcntl
+import time
+import threading
+from collections import Counter
+from typing import Any, Callable
+from utils.logger import logger, to_json_dump
+
+# <spool>.<pid>.<ns>.replay: arquivo de spool reivindicado pelo processo pid no instante ns
+REPLAY_PATTERN = re.compile(r"^(.*\.jsonl)\.(\d+)(?:\.(\d+))?\.replay$")
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # O processo existe, mas é de outro usuário
+        return True
+
+    return True
+
+
+class BatchWriter:
+    """
+    Gravação em lote, fora do caminho da resposta, para linhas só de inserção.
+
+    put() guarda a linha em memória e retorna; uma thread grava as pendentes em
+    uma única chamada de flush_fn a cada flush_interval segundos, ou antes quando
+    o lote chega a max_batch linhas. Diferente do WriteBehindQueue, nada é
+    mesclado: cada linha é gravada, na ordem de chegada.
+
+    Com spool_dir, um lote que falha (banco fora do ar) vai para um arquivo JSONL
+    local, por processo, em vez de ficar só na memória. Enquanto houver spool,
+    os lotes novos entram atrás dele, e cada flush tenta primeiro regravar os
+    arquivos de spool de qualquer processo. Um arquivo é reivindicado com rename
+    para <spool>.<pid>.<ns>.replay, então dois processos não regravam o mesmo
+    arquivo; um .replay só é retomado por outro processo quando o pid do nome
+    já não está rodando.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[list[dict]], Any],
+        name: str,
+        spool_dir: str | None = None,
+        flush_interval: float | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        self.flush_fn = flush_fn
+        self.name = name
+        self.spool_dir = spool_dir
+        self.flush_interval = flush_interval or float(
+            os.getenv("WRITE_BEHIND_FLUSH_SECONDS", 2)
+        )
+        self.max_batch = max_batch or int(os.getenv("WRITE_BEHIND_MAX_BATCH", 100))
+
+        self._pending: list[tuple[str | None, dict]] = []
+        self._pending_keys: Counter = Counter()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        self.metrics = {
+            "rows": 0,
+            "flushes": 0,
+            "flushed_rows": 0,
+            "failed_flushes": 0,
+            "spooled_rows": 0,
+            "replayed_rows": 0,
+        }
+
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, row: dict, key: str | None = None) -> None:
+        with self._condition:
+            self._pending.append((key, row))
+            self.metrics["rows"] += 1
+
+            if key is not None:
+                self._pending_keys[key] += 1
+
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def has_pending(self, key: str) -> bool:
+        """Se a chave (ex.: telefone) tem linhas ainda não gravadas."""
+        with self._condition:
+            return self._pending_keys[key] > 0
+
+    def _write(self, rows: list[dict]) -> bool:
+        try:
+            return self.flush_fn(rows) is not False
+        except Exception as e:
+            logger.exception(
+                f"[BATCH WRITER] Erro ao gravar lote de {self.name}: \n{to_json_dump(e)}"
+            )
+            return False
+
+    def _spool_path(self) -> str:
+        return os.path.join(self.spool_dir, f"{self.name}-{os.getpid()}.jsonl")
+
+    def _spool(self, rows: list[dict]) -> None:
+        path = self._spool_path()
+
+        while True:
+            with open(path, "a", encoding="utf-8") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+                # Outro processo pode ter reivindicado o arquivo entre o open e o lock:
+                # as linhas iriam para o arquivo já lido por ele, então abre de novo
+                try:
+                    current = os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+                except FileNotFoundError:
+                    current = False
+
+                if not current:
+                    continue
+
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+                f.flush()
+                os.fsync(f.fileno())
+                break
+
+        self.metrics["spooled_rows"] += len(rows)
+
+    def _claim(self, path: str, spool: str) -> str | None:
+        # O instante no nome evita que dois arquivos reivindicados pelo mesmo
+        # processo (uma retentativa e um spool novo com o mesmo nome) colidam
+        target = f"{spool}.{os.getpid()}.{time.time_ns()}.replay"
+
+        try:
+            os.rename(path, target)
+            return target
+        except FileNotFoundError:
+            # Outro processo reivindicou o arquivo primeiro
+            return None
+
+    def _claim_spools(self) -> list[str]:
+        """Reivindica os spools vivos e os .replay abandonados, os mais antigos primeiro."""
+        pid = os.getpid()
+        leftovers = []
+
+        # .replay que sobrou de um processo que morreu no meio da regravação (ou deste mesmo
+        # processo numa tentativa que falhou); de um processo vivo, a regravação está em andamento
+        for path in glob.glob(os.path.join(self.spool_dir, f"{self.name}-*.jsonl.*.replay")):
+            match = REPLAY_PATTERN.search(path)
+
+            if not match:
+                continue
+
+            owner, claimed_at = int(match.group(2)), int(match.group(3) or 0)
+
+            if owner == pid:
+                leftovers.append((claimed_at, path))
+            elif not _pid_running(owner):
+                claimed = self._claim(path, match.group(1))
+
+                if claimed:
+                    leftovers.append((claimed_at, claimed))
+
+        claimed = [path for _, path in sorted(leftovers)]
+
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, f"{self.name}-*.jsonl"))):
+            target = self._claim(path, path)
+
+            if target:
+                claimed.append(target)
+
+        return claimed
+
+    def _replay_spool(self) -> bool:
+        """Regrava os arquivos de spool; False se algum ainda não pôde ser gravado."""
+        if not self.spool_dir:
+            return True
+
+        for claimed in self._claim_spools():
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    # Espera um _spool que tenha aberto o arquivo antes do rename terminar de escrever
+                    fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                continue
+
+            if rows and not self._write(rows):
+                # O arquivo continua reivindicado por este processo e volta na próxima tentativa
+                return False
+
+            try:
+                os.remove(claimed)
+            except FileNotFoundError:
+                pass
+
+            self.metrics["replayed_rows"] += len(rows)
+
+            logger.info(
+                f"[BATCH WRITER] {len(rows)} linhas de {self.name} regravadas a partir do spool"
+            )
+
+        return True
+
+    def flush(self) -> bool:
+        # Um flush por vez: lotes e spool são gravados na ordem em que chegaram
+        with self._flush_lock:
+            spool_clear = self._replay_spool()
+
+            with self._condition:
+                batch, self._pending = self._pending, []
+                keys, self._pending_keys = self._pending_keys, Counter()
+
+            if not batch:
+                return spool_clear
+
+            rows = [row for _, row in batch]
+
+            if spool_clear and self._write(rows):
+                with self._condition:
+                    self.metrics["flushes"] += 1
+                    self.metrics["flushed_rows"] += len(rows)
+                return True
+
+            with self._condition:
+                self.metrics["failed_flushes"] += 1
+
+                if not self.spool_dir:
+                    # Sem spool, o lote volta para a frente da fila em memória
+                    self._pending = batch + self._pending
+                    self._pending_keys += keys
+                    return False
+
+            self._spool(rows)
+            logger.warning(
+                f"[BATCH WRITER] {len(rows)} linhas de {self.name} guardadas no spool local"
+            )
+            return False
+
+    def _run(self) -> None:
+        failed = False
+
+        while True:
+            with self._condition:
+                # Depois de uma falha espera o intervalo mesmo com o lote cheio
+                if not self._closed and (failed or len(self._pending) < self.max_batch):
+                    self._condition.wait(self.flush_interval)
+
+                if self._closed:
+                    return
+
+            failed = not self.flush()
+
+    def close(self) -> None:
+        """Para a thread e grava (ou guarda no spool) o que estiver pendente."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def get_metrics(self) -> dict:
+        with self._condition:
+            return {**self.metrics, "pending": len(self._pending)}
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from interfaces.clients.cache_interface import ICache
+from utils.logger import logger, to_json_dump
+
+
+class ConversationContextCache:
+    """
+    Janela recente de mensagens por telefone, na frente da consulta ao banco.
+
+    Guarda as últimas max_messages mensagens de cada conversa em ordem
+    cronológica: numa lista do Redis quando um ICache é informado (compartilhada
+    entre processos e workers) ou num LRU local do processo. A janela é
+    preenchida inteira a partir do banco em um miss (fill) e, depois, só recebe
+    as mensagens novas de cada turno (append), então um turno de conversa
+    quente não lê o banco. append nunca cria uma janela: sem fill antes, a
+    mensagem fica só no banco e o próximo turno faz o miss. Quem grava
+    mensagens por fora do fluxo normal deve chamar invalidate(); o TTL cobre o
+    resto.
+    """
+
+    def __init__(
+        self,
+        cache_client: ICache | None = None,
+        prefix: str = "context",
+        max_messages: int | None = None,
+        ttl_seconds: int | None = None,
+        max_phones: int | None = None,
+    ) -> None:
+        self.cache = cache_client
+        self.prefix = prefix
+        self.max_messages = max_messages or int(os.getenv("CONTEXT_SIZE", 80))
+        self.ttl_seconds = ttl_seconds or int(
+            os.getenv("CONTEXT_CACHE_TTL_SECONDS", 1800)
+        )
+        self.max_phones = max_phones or int(
+            os.getenv("CONTEXT_CACHE_MAX_PHONES", 2000)
+        )
+        self._local: OrderedDict[str, tuple[deque, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "fills": 0,
+            "appends": 0,
+            "invalidations": 0,
+            "redis_errors": 0,
+        }
+
+    def _key(self, phone: str) -> str:
+        return f"{self.prefix}:{phone}"
+
+    def _redis_call(self, method, *args):
+        # Falha no Redis vira miss: o contexto volta a vir do banco
+        try:
+            return method(*args), True
+        except Exception as e:
+            self.metrics["redis_errors"] += 1
+            logger.warning(
+                f"[CONTEXT CACHE] Falha ao acessar o Redis: \n{to_json_dump(e)}"
+            )
+            return None, False
+
+    def get(self, phone: str) -> list[dict] | None:
+        """Mensagens em cache da conversa, da mais antiga para a mais nova, ou None."""
+        if self.cache:
+            values, _ = self._redis_call(self.cache.list_range, self._key(phone))
+            messages = [json.loads(value) for value in values] if values else None
+        else:
+            with self._lock:
+                item = self._local.get(phone)
+
+                if item and item[1] <= time.time():
+                    del self._local[phone]
+                    item = None
+
+                if item:
+                    self._local.move_to_end(phone)
+
+                messages = list(item[0]) if item else None
+
+        self.metrics["hits" if messages is not None else "misses"] += 1
+        return messages
+
+    def fill(self, phone: str, messages: list[dict]) -> None:
+        """Substitui a janela da conversa pelo que veio do banco (ordem cronológica)."""
+        # Conversa sem histórico (ou leitura que falhou) não vira janela: não há lista vazia no Redis
+        if not messages:
+            return
+
+        messages = messages[-self.max_messages:]
+        self.metrics["fills"] += 1
+
+        if self.cache:
+            self._redis_call(
+                self.cache.list_replace,
+                self._key(phone),
+                [json.dumps(m, ensure_ascii=False, default=str) for m in messages],
+                self.ttl_seconds,
+            )
+            return
+
+        with self._lock:
+            self._local[phone] = (
+                deque(messages, maxlen=self.max_messages),
+                time.time() + self.ttl_seconds,
+            )
+            self._local.move_to_end(phone)
+
+            while len(self._local) > self.max_phones:
+                self._local.popitem(last=False)
+
+    def append(self, phone: str, messages: list[dict]) -> None:
+        """Acrescenta as mensagens novas à janela, se ela estiver em cache."""
+        if not messages:
+            return
+
+        if self.cache:
+            appended, ok = self._redis_call(
+                self.cache.list_append,
+                self._key(phone),
+                [json.dumps(m, ensure_ascii=False, default=str) for m in messages],
+                self.max_messages,
+                self.ttl_seconds,
+            )
+
+            if not ok:
+                # Não sabemos se a lista foi alterada: descarta para não servir janela errada
+                self.invalidate(phone)
+        else:
+            with self._lock:
+                item = self._local.get(phone)
+                appended = bool(item)
+
+                if item:
+                    item[0].extend(messages)
+                    self._local[phone] = (item[0], time.time() + self.ttl_seconds)
+
+        if appended:
+            self.metrics["appends"] += 1
+
+    def invalidate(self, phone: str) -> None:
+        self.metrics["invalidations"] += 1
+
+        if self.cache:
+            self._redis_call(self.cache.delete, self._key(phone))
+            return
+
+        with self._lock:
+            self._local.pop(phone, None)
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+
+        with self._lock:
+            entries = len(self._local)
+
+        return {
+            **self.metrics,
+            "hit_ratio": round(self.metrics["hits"] / lookups, 3) if lookups else 0.0,
+            "backend": "redis" if self.cache else "local",
+            "local_entries": entries,
+        }
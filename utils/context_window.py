@@ -0,0 +1,214 @@
+import os
+import json
+from utils.logger import logger
+
+try:
+    import tiktoken
+except ImportError:  # dependência opcional; sem ela a contagem é aproximada
+    tiktoken = None
+
+TOOL_ITEM_TYPES = ("function_call", "function_call_output")
+
+# Custo fixo por item (papel, separadores) e por imagem/arquivo anexado
+ITEM_OVERHEAD_TOKENS = 4
+ATTACHMENT_TOKENS = 85
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"[CONTEXT WINDOW] Tokenizer indisponível, usando estimativa: {e}")
+            return None
+
+    return _encoding
+
+
+def count_text_tokens(text: str) -> int:
+    """Conta tokens com o tiktoken quando instalado; senão estima ~4 caracteres por token."""
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return (len(text) + 3) // 4
+
+
+def count_item_tokens(item: dict) -> int:
+    """Tokens de um item do input (mensagem, chamada de tool ou saída de tool)."""
+    if item.get("type") == "function_call":
+        return ITEM_OVERHEAD_TOKENS + count_text_tokens(
+            f"{item.get('name', '')}{item.get('arguments', '')}"
+        )
+
+    if item.get("type") == "function_call_output":
+        output = item.get("output", "")
+        return ITEM_OVERHEAD_TOKENS + count_text_tokens(
+            output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        )
+
+    content = item.get("content", "")
+    if isinstance(content, list):
+        tokens = ITEM_OVERHEAD_TOKENS
+        for part in content:
+            if part.get("type") in ("input_text", "output_text", "text"):
+                tokens += count_text_tokens(part.get("text", ""))
+            else:
+                tokens += ATTACHMENT_TOKENS
+        return tokens
+
+    return ITEM_OVERHEAD_TOKENS + count_text_tokens(str(content))
+
+
+class ContextWindowBuilder:
+    """
+    Monta a janela de contexto enviada ao modelo dentro de um orçamento de tokens.
+
+    O histórico é agrupado em unidades: cada mensagem sozinha e cada
+    function_call junto das suas function_call_output (mesmo call_id), para
+    nunca enviar uma saída de tool sem a chamada correspondente. As unidades
+    mais recentes vão na íntegra; nas mais antigas os payloads de tool são
+    compactados. A partir da unidade mais nova, o histórico é incluído até o
+    orçamento acabar e o restante (mais antigo) é descartado. O último item, a
+    mensagem atual do usuário, é sempre mantido, assim como o resumo da
+    conversa quando informado.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        recent_items: int | None = None,
+        tool_output_max_chars: int | None = None,
+    ) -> None:
+        self.max_tokens = max_tokens or int(os.getenv("CONTEXT_MAX_TOKENS", 6000))
+        self.recent_items = recent_items or int(os.getenv("CONTEXT_RECENT_MESSAGES", 10))
+        self.tool_output_max_chars = tool_output_max_chars or int(
+            os.getenv("CONTEXT_TOOL_OUTPUT_MAX_CHARS", 300)
+        )
+
+    def _group_units(self, items: list[dict]) -> list[list[dict]]:
+        units: list[list[dict]] = []
+        calls: dict[str, list[dict]] = {}
+
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+
+            item_type = item.get("type")
+            call_id = item.get("call_id")
+
+            if item_type == "function_call_output" and call_id in calls:
+                calls[call_id].append(item)
+                continue
+
+            if item_type == "function_call_output":
+                # Saída sem a chamada correspondente é rejeitada pela API
+                continue
+
+            unit = [item]
+            if item_type == "function_call" and call_id:
+                calls[call_id] = unit
+
+            units.append(unit)
+
+        # Chamada sem saída também é rejeitada pela API
+        return [
+            unit
+            for unit in units
+            if unit[0].get("type") != "function_call" or len(unit) > 1
+        ]
+
+    def _compact(self, item: dict) -> dict:
+        item_type = item.get("type")
+
+        if item_type == "function_call":
+            return {
+                "type": "function_call",
+                "call_id": item.get("call_id"),
+                "name": item.get("name"),
+                "arguments": item.get("arguments", "{}"),
+            }
+
+        if item_type == "function_call_output":
+            output = item.get("output", "")
+            if not isinstance(output, str):
+                output = json.dumps(output, ensure_ascii=False)
+
+            if len(output) > self.tool_output_max_chars:
+                output = output[: self.tool_output_max_chars] + "... [resumido]"
+
+            return {
+                "type": "function_call_output",
+                "call_id": item.get("call_id"),
+                "output": output,
+            }
+
+        return item
+
+    def summary_item(self, summary: str) -> dict:
+        return {
+            "role": "system",
+            "content": f"# Resumo da conversa até aqui\n{summary}",
+        }
+
+    def build(self, items: list[dict], summary: str | None = None) -> list[dict]:
+        """
+        Recebe o histórico em ordem cronológica com a mensagem atual no final.
+
+        Quando há um resumo das mensagens antigas, ele abre a janela e tem o
+        espaço reservado no orçamento antes da cauda recente.
+        """
+        if not items:
+            return []
+
+        *history, current = items
+        summary_items = [self.summary_item(summary)] if summary else []
+        budget = self.max_tokens - sum(
+            count_item_tokens(item) for item in [current, *summary_items]
+        )
+
+        units = self._group_units(history)
+        selected: list[list[dict]] = []
+        recent = 0
+        compacted = 0
+
+        for unit in reversed(units):
+            has_tool_items = any(item.get("type") in TOOL_ITEM_TYPES for item in unit)
+            verbatim = recent < self.recent_items
+            recent += len(unit)
+
+            if not verbatim and has_tool_items:
+                unit = [self._compact(item) for item in unit]
+                compacted += 1
+
+            cost = sum(count_item_tokens(item) for item in unit)
+
+            # Uma saída de tool recente muito grande ainda cabe compactada
+            if cost > budget and verbatim and has_tool_items:
+                unit = [self._compact(item) for item in unit]
+                compacted += 1
+                cost = sum(count_item_tokens(item) for item in unit)
+
+            if cost > budget:
+                break
+
+            budget -= cost
+            selected.append(unit)
+
+        window = [*summary_items, *(item for unit in reversed(selected) for item in unit)]
+        window.append(current)
+
+        logger.info(
+            f"[CONTEXT WINDOW] {len(window)}/{len(items)} itens no contexto, "
+            f"{compacted} chamadas de tool compactadas, "
+            f"~{self.max_tokens - budget} de {self.max_tokens} tokens"
+        )
+
+        return window
@@ -0,0 +1,45 @@
+import re
+
+# Uma única classe de caracteres, compilada uma vez na importação, cobre todos
+# os intervalos que os remetentes removiam em várias passadas de re.sub e
+# str.replace. Além dos blocos de emoji, inclui os modificadores que sobravam
+# soltos depois da remoção: ZWJ (sequências como 👨‍💻), seletores de variação
+# (☹️, ⚠️), keycap (1️⃣), tons de pele e tags de bandeiras regionais.
+EMOJI_PATTERN = re.compile(
+    "["
+    "\u200d"  # zero width joiner
+    "\u20e3"  # combining enclosing keycap
+    "\ufe0e\ufe0f"  # seletores de variação (texto/emoji)
+    "\u24c2-\U0001f251"  # enclosed, dingbats, símbolos diversos, bandeiras regionais
+    "\U0001f300-\U0001f6ff"  # pictogramas, emoticons, transporte, tons de pele
+    "\U0001f700-\U0001f7ff"  # símbolos alquímicos e formas geométricas (🟢 🟡)
+    "\U0001f900-\U0001f9ff"  # supplemental symbols and pictographs
+    "\U0001fa70-\U0001faff"  # symbols and pictographs extended-A
+    "\U000e0020-\U000e007f"  # tags (bandeiras de subdivisões)
+    "]+"
+)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+INLINE_WHITESPACE_PATTERN = re.compile(r"[ \t]+")
+
+
+def remove_emojis(text: str, collapse_whitespace: bool = True) -> str:
+    """
+    Remove emojis e símbolos pictográficos do texto em uma única passada.
+
+    Por padrão também junta qualquer sequência de espaços (inclusive quebras de
+    linha) em um espaço só, como os remetentes já faziam. Com
+    collapse_whitespace=False as quebras de linha são preservadas e só os
+    espaços repetidos deixados pela remoção são unidos.
+    """
+    if not text:
+        return text
+
+    text = EMOJI_PATTERN.sub("", text)
+
+    if collapse_whitespace:
+        return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+    return "\n".join(
+        INLINE_WHITESPACE_PATTERN.sub(" ", line).strip() for line in text.split("\n")
+    ).strip()
@@ -0,0 +1,115 @@
+import os
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Camada HTTP compartilhada: uma requests.Session por processo, com pool de
+# conexões keep-alive por host. Sem ela, cada requests.post abre uma conexão
+# TCP+TLS nova para cada parte de mensagem enviada.
+#
+# Configuração (variáveis de ambiente):
+#   HTTP_POOL_CONNECTIONS  quantidade de hosts com pool mantido (padrão 10)
+#   HTTP_POOL_MAXSIZE      conexões keep-alive por host (padrão 20)
+#   HTTP_MAX_RETRIES       tentativas em falha de conexão/5xx/429 (padrão 3)
+#   HTTP_BACKOFF_FACTOR    backoff exponencial entre tentativas (padrão 0.5)
+#   HTTP_TIMEOUT_SECONDS   timeout padrão quando a chamada não informa (padrão 30)
+#   HTTP_HOST_TIMEOUTS     timeouts por host, ex: "api.z-api.io=15,api.openai.com=60"
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions: dict[str, requests.Session] = {}
+_pid: int | None = None
+_lock = threading.Lock()
+
+
+def _parse_host_timeouts(raw: str) -> dict[str, float]:
+    timeouts = {}
+
+    for item in raw.split(","):
+        host, _, seconds = item.partition("=")
+
+        if host.strip() and seconds.strip():
+            timeouts[host.strip().lower()] = float(seconds)
+
+    return timeouts
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica um timeout padrão (ou por host) quando a chamada não informa um"""
+
+    def __init__(
+        self,
+        default_timeout: float,
+        host_timeouts: dict[str, float] | None = None,
+        **kwargs,
+    ):
+        self.default_timeout = default_timeout
+        self.host_timeouts = host_timeouts or {}
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            host = (urlparse(request.url).hostname or "").lower()
+            kwargs["timeout"] = self.host_timeouts.get(host, self.default_timeout)
+
+        return super().send(request, **kwargs)
+
+
+def _build_session() -> requests.Session:
+    # Falhas de conexão são repetidas em qualquer método; status 5xx/429 só nos
+    # métodos idempotentes, para não duplicar mensagens enviadas via POST
+    retry = Retry(
+        total=int(os.getenv("HTTP_MAX_RETRIES", 3)),
+        backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5)),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    adapter = TimeoutHTTPAdapter(
+        default_timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", 30)),
+        host_timeouts=_parse_host_timeouts(os.getenv("HTTP_HOST_TIMEOUTS", "")),
+        pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", 10)),
+        pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 20)),
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def get_session(name: str = "default") -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada do processo.
+
+    Os clientes devem chamar get_session() no momento da requisição em vez de
+    guardar a sessão em um atributo, para continuarem seguros com deepcopy e
+    para o pool ser recriado no processo filho após um fork.
+    """
+    global _sessions, _pid
+
+    with _lock:
+        if _pid != os.getpid():
+            _sessions = {}
+            _pid = os.getpid()
+
+        if name not in _sessions:
+            _sessions[name] = _build_session()
+
+        return _sessions[name]
+
+
+def close_sessions() -> None:
+    global _sessions
+
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+
+        _sessions = {}
@@ -0,0 +1,202 @@
+import re
+from typing import Iterator
+from utils.emoji_sanitizer import remove_emojis
+
+# Pipeline único de quebra de respostas em partes para o WhatsApp, antes
+# duplicado em ZAPIClient, ZAPIClientService, OpenAIService e
+# ResponseProcessorService. Todas as expressões são compiladas uma vez na
+# importação e a resposta passa pelo pipeline uma única vez.
+
+MAX_PART_LENGTH = 180  # ~3 linhas no WhatsApp
+EMPTY_REPLY_FALLBACK = "Olá! Como posso ajudar você?"
+
+# Confirmações corriqueiras removidas do início das frases. São aplicadas em
+# sequência, como antes, porque remover uma pode revelar a seguinte.
+CONFIRMATION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"Perfeito!\s*",
+        r"Excelente!\s*",
+        r"Ótimo!\s*",
+        r"Entendi[,.]?\s*",
+        r"Certo[,.]?\s*",
+        r"Tudo bem[,.]?\s*",
+        r"Obrigad[ao] pela informação[,.]?\s*",
+        r"Vou te passar\s*",
+        r"Deixe-me\s*",
+        r"Vamos\s+verificar\s*",
+        r"perfeitamente!\s*",
+    )
+]
+
+QUESTION_WORDS = (
+    "como", "quando", "onde", "qual", "quais", "quanto", "quantos", "quantas",
+    "você", "vocês", "gostaria", "gostam", "pretende", "pretendem",
+    "tem ", "têm", "possui", "possuem", "aceita", "aceitam",
+    "quer", "querem", "deseja", "desejam", "pode", "podem",
+    "seria", "teria", "haveria", "estaria",
+)
+
+# Palavra de pergunta no início ou depois de um espaço, seguida de espaço ou
+# vírgula. Uma busca só, em vez de quatro testes de substring por palavra.
+QUESTION_PATTERN = re.compile(
+    r"(?:^| )(?:" + "|".join(re.escape(word) for word in QUESTION_WORDS) + r")[ ,]"
+)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+LEADING_PUNCTUATION_PATTERN = re.compile(r"^[,.\s]+")
+SENTENCE_END_PATTERN = re.compile(r"\.(?:\s+|$)")
+QUESTION_END_PATTERN = re.compile(r"\?(?:\s+|$)")
+
+
+def is_question(sentence: str) -> bool:
+    """Identifica se uma sentença é uma pergunta."""
+    if sentence.strip().endswith("?"):
+        return True
+
+    return QUESTION_PATTERN.search(sentence.lower()) is not None
+
+
+def clean_confirmations(message: str) -> str:
+    """Remove confirmações corriqueiras e palavras desnecessárias."""
+    for pattern in CONFIRMATION_PATTERNS:
+        message = pattern.sub("", message)
+
+    message = WHITESPACE_PATTERN.sub(" ", message).strip()
+    return LEADING_PUNCTUATION_PATTERN.sub("", message)
+
+
+def iter_sentences(message: str) -> Iterator[str]:
+    """Quebra o texto em sentenças por pontos finais e interrogações."""
+    for part in SENTENCE_END_PATTERN.split(message):
+        part = part.strip()
+
+        if not part:
+            continue
+
+        if "?" in part:
+            for subpart in QUESTION_END_PATTERN.split(part):
+                subpart = subpart.strip()
+
+                if subpart:
+                    yield subpart + "?" if is_question(subpart) else subpart
+        else:
+            yield part if part.endswith((".", "!", "?")) else part + "."
+
+
+def iter_parts(message: str) -> Iterator[str]:
+    """
+    Gera as partes prontas para envio, na ordem, conforme as sentenças são lidas.
+
+    Perguntas saem sozinhas; as demais sentenças são agrupadas até
+    MAX_PART_LENGTH caracteres. Emojis são removidos de cada parte.
+    """
+    message = clean_confirmations(message)
+
+    if not message.strip():
+        yield EMPTY_REPLY_FALLBACK
+        return
+
+    group: list[str] = []
+    length = 0
+
+    def flush(sentences: list[str]) -> Iterator[str]:
+        part = remove_emojis(" ".join(sentences))
+        if part.strip():
+            yield part
+
+    for sentence in iter_sentences(message):
+        if is_question(sentence):
+            if group:
+                yield from flush(group)
+                group, length = [], 0
+
+            yield from flush([sentence])
+        elif length + len(sentence) > MAX_PART_LENGTH and group:
+            yield from flush(group)
+            group, length = [sentence], len(sentence)
+        else:
+            group.append(sentence)
+            length += len(sentence)
+
+    if group:
+        yield from flush(group)
+
+
+def split_message(message: str) -> list[str]:
+    """Quebra a resposta completa nas partes que serão enviadas ao lead."""
+    return list(iter_parts(message))
+
+
+# Fim de sentença já estável no texto parcial: ponto ou interrogação seguidos
+# de espaço, os mesmos cortes usados em iter_sentences
+STABLE_BOUNDARY_PATTERN = re.compile(r"[.?]\s")
+
+
+class StreamingSplitter:
+    """
+    Quebra em partes uma resposta que chega aos pedaços (streaming do modelo).
+
+    feed() devolve só as partes que não mudam mais com o texto que ainda vai
+    chegar: o texto é cortado no último fim de sentença seguido de espaço e,
+    como o agrupamento é feito da esquerda para a direita, todas as partes
+    menos a última (que ainda pode receber sentenças) já são definitivas.
+    A primeira sentença estável é liberada sozinha, para o lead receber a
+    primeira mensagem sem esperar o resto da geração. finish() devolve o que
+    faltou quando o texto termina.
+    """
+
+    def __init__(self, early_first: bool = True) -> None:
+        self.early_first = early_first
+        self._buffer = ""
+        self._start = 0
+        self._emitted = 0
+        self._delivered_any = False
+
+    def _stable_parts(self, text: str) -> list[str]:
+        if not clean_confirmations(text).strip():
+            return []
+
+        return list(iter_parts(text))
+
+    def feed(self, delta: str) -> list[str]:
+        self._buffer += delta
+
+        boundary = None
+        for match in STABLE_BOUNDARY_PATTERN.finditer(self._buffer, self._start):
+            boundary = match.start() + 1
+
+        if boundary is None:
+            return []
+
+        stable = self._buffer[self._start:boundary]
+        parts = self._stable_parts(stable)
+
+        if not parts:
+            return []
+
+        if self.early_first and not self._delivered_any:
+            # Tudo que já está estável sai agora e o restante recomeça daqui
+            self._start = boundary
+            self._emitted = 0
+            self._delivered_any = True
+            return parts
+
+        final = parts if stable.rstrip().endswith("?") else parts[:-1]
+        new_parts = final[self._emitted:]
+        self._emitted = max(self._emitted, len(final))
+
+        if new_parts:
+            self._delivered_any = True
+
+        return new_parts
+
+    def finish(self) -> list[str]:
+        parts = self._stable_parts(self._buffer[self._start:])
+        remaining = parts[self._emitted:]
+
+        if not remaining and not self._delivered_any:
+            return [EMPTY_REPLY_FALLBACK]
+
+        self._emitted = len(parts)
+        return remaining
@@ -0,0 +1,62 @@
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class PromptTemplate:
+    """
+    Prompt com marcadores {{chave}} compilado uma única vez.
+
+    O texto é quebrado em segmentos estáticos e nomes de variáveis quando o
+    prompt é definido; render() só junta os segmentos com os valores, em vez de
+    varrer o prompt inteiro com str.replace para cada variável. Marcadores sem
+    valor continuam literais no texto, como antes.
+
+    Em render_static_prefix() o prompt vai sem substituições, idêntico byte a
+    byte entre requisições, e os valores das variáveis seguem em um bloco no
+    final. Assim o prefixo estável pode ser reaproveitado pelo cache de prompt
+    da OpenAI.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._segments: list[str] = []
+        self._keys: list[str] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self._segments.append(source[position:match.start()])
+            self._keys.append(match.group(1))
+            position = match.end()
+
+        self._segments.append(source[position:])
+        self.keys = tuple(dict.fromkeys(self._keys))
+
+    def render(self, values: dict | None = None) -> str:
+        """Substitui os marcadores pelos valores; chaves ausentes ficam literais."""
+        if not values or not self._keys:
+            return self.source
+
+        parts = [self._segments[0]]
+
+        for key, segment in zip(self._keys, self._segments[1:]):
+            parts.append(str(values[key]) if key in values else f"{{{{{key}}}}}")
+            parts.append(segment)
+
+        return "".join(parts)
+
+    def render_static_prefix(
+        self, values: dict | None = None, title: str = "Variáveis do lead"
+    ) -> str:
+        """Mantém o prompt intacto como prefixo e anexa os valores das variáveis no final."""
+        used = [key for key in self.keys if values and key in values]
+
+        if not used:
+            return self.source
+
+        lines = "\n".join(f"- {{{{{key}}}}}: {values[key]}" for key in used)
+
+        return (
+            f"{self.source}\n\n# {title}\n"
+            f"Nos marcadores {{{{chave}}}} acima, use os valores abaixo:\n{lines}"
+        )
@@ -0,0 +1,384 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+# Campos do JSON de resposta do modelo: {"reply": "...", "c2s": {...}, "schedule": {...}}
+REPLY_FIELDS = ("reply", "c2s", "schedule")
+
+JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+LITERALS = {"true": True, "false": False, "null": None}
+WHITESPACE = " \t\r\n"
+VALUE_END = ",}] \t\r\n"
+
+
+def is_high_surrogate(code: int) -> bool:
+    return 0xD800 <= code <= 0xDBFF
+
+
+def surrogate_escape(text: str) -> int | None:
+    """Código de um escape \\uDC00-\\uDFFF (segunda metade de um par), ou None."""
+    if len(text) != 6 or not text.startswith("\\u"):
+        return None
+
+    try:
+        code = int(text[2:], 16)
+    except ValueError:
+        return None
+
+    return code if 0xDC00 <= code <= 0xDFFF else None
+
+
+def combine_surrogates(high: int, low: int) -> int:
+    return 0x10000 + ((high - 0xD800) << 10) + (low - 0xDC00)
+
+
+@dataclass
+class C2SUpdate:
+    """Atualização do lead no Contact2Sale pedida pelo modelo (campo c2s)."""
+
+    status: str | None = None
+    observations: str | None = None
+
+
+@dataclass
+class FollowUp:
+    """Follow-up pedido pelo modelo (campo schedule): "none", "30m" ou "2h"."""
+
+    followup: str
+    reason: str | None = None
+
+
+def _text(value: Any) -> str | None:
+    return value.strip() or None if isinstance(value, str) else None
+
+
+@dataclass
+class ParsedReply:
+    """Resultado da leitura de uma resposta do modelo."""
+
+    reply: str | None = None
+    c2s: Any = None
+    schedule: Any = None
+    is_json: bool = False
+    truncated: bool = False
+    fields: dict = field(default_factory=dict)
+
+    @property
+    def c2s_update(self) -> C2SUpdate | None:
+        # Em saída cortada as observações podem estar pela metade: não vão para o CRM
+        if self.truncated or not isinstance(self.c2s, dict):
+            return None
+
+        update = C2SUpdate(
+            status=_text(self.c2s.get("status")),
+            observations=_text(self.c2s.get("observations")),
+        )
+        return update if update.status or update.observations else None
+
+    @property
+    def follow_up(self) -> FollowUp | None:
+        if not isinstance(self.schedule, dict):
+            return None
+
+        followup = _text(self.schedule.get("followup"))
+        if not followup:
+            return None
+
+        return FollowUp(followup=followup, reason=_text(self.schedule.get("reason")))
+
+
+class _Truncated(Exception):
+    pass
+
+
+class _Scanner:
+    """
+    Leitor tolerante de JSON em uma única passada pelo texto.
+
+    Aceita o que os modelos costumam produzir de errado: quebras de linha cruas
+    dentro de strings, escapes inválidos, vírgulas sobrando e saída cortada no
+    meio. Quando o texto acaba antes do fim, devolve o que já foi lido.
+    """
+
+    def __init__(self, text: str, start: int) -> None:
+        self.text = text
+        self.pos = start
+        self.length = len(text)
+        self.truncated = False
+
+    def _skip_whitespace(self) -> None:
+        while self.pos < self.length and self.text[self.pos] in WHITESPACE:
+            self.pos += 1
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+
+        if self.pos >= self.length:
+            raise _Truncated()
+
+        return self.text[self.pos]
+
+    def parse_object(self) -> dict:
+        # self.text[self.pos] == "{"
+        self.pos += 1
+        result: dict = {}
+
+        try:
+            while True:
+                char = self._peek()
+
+                if char == "}":
+                    self.pos += 1
+                    return result
+
+                if char == ",":
+                    self.pos += 1
+                    continue
+
+                if char != '"':
+                    # Chave sem aspas ou lixo: pula até o próximo separador
+                    self.pos += 1
+                    continue
+
+                key = self.parse_string()
+
+                if self._peek() != ":":
+                    continue
+
+                self.pos += 1
+                self._peek()
+
+                try:
+                    result[key] = self.parse_value()
+                except _Truncated as e:
+                    # Valor cortado: guarda o que foi lido (ex.: reply parcial)
+                    if e.args:
+                        result[key] = e.args[0]
+                    raise
+
+        except _Truncated:
+            self.truncated = True
+            raise _Truncated(result)
+
+    def parse_array(self) -> list:
+        self.pos += 1
+        result: list = []
+
+        try:
+            while True:
+                char = self._peek()
+
+                if char == "]":
+                    self.pos += 1
+                    return result
+
+                if char == "}":
+                    # Colchete não fechado: o "}" pertence ao objeto de fora
+                    return result
+
+                if char == ",":
+                    self.pos += 1
+                    continue
+
+                try:
+                    result.append(self.parse_value())
+                except _Truncated as e:
+                    if e.args:
+                        result.append(e.args[0])
+                    raise
+
+        except _Truncated:
+            self.truncated = True
+            raise _Truncated(result)
+
+    def parse_string(self) -> str:
+        # self.text[self.pos] == '"'
+        self.pos += 1
+        chunks: list[str] = []
+        start = self.pos
+        text = self.text
+
+        while self.pos < self.length:
+            char = text[self.pos]
+
+            if char == '"':
+                chunks.append(text[start:self.pos])
+                self.pos += 1
+                return "".join(chunks)
+
+            if char != "\\":
+                self.pos += 1
+                continue
+
+            chunks.append(text[start:self.pos])
+            escape = text[self.pos + 1:self.pos + 2]
+
+            if not escape:
+                # Escape cortado no fim: descarta a barra solta
+                start = self.pos = self.length
+                break
+
+            if escape == "u":
+                digits = text[self.pos + 2:self.pos + 6]
+
+                if len(digits) < 4:
+                    start = self.pos = self.length
+                    break
+
+                try:
+                    code = int(digits, 16)
+                except ValueError:
+                    chunks.append(digits)
+                    self.pos += 6
+                    start = self.pos
+                    continue
+
+                self.pos += 6
+
+                if is_high_surrogate(code):
+                    # Caracteres fora do BMP (emojis) vêm como par \ud83d\ude00: junta os dois
+                    low = text[self.pos:self.pos + 6]
+
+                    if len(low) < 6 and "\\u"[:len(low)] == low[:2]:
+                        # Par cortado no fim: a metade solta não é texto válido
+                        start = self.pos = self.length
+                        break
+
+                    low_code = surrogate_escape(low)
+
+                    if low_code is not None:
+                        code = combine_surrogates(code, low_code)
+                        self.pos += 6
+
+                chunks.append(chr(code))
+            else:
+                chunks.append(JSON_ESCAPES.get(escape, escape))
+                self.pos += 2
+
+            start = self.pos
+
+        chunks.append(text[start:self.pos])
+        self.truncated = True
+        raise _Truncated("".join(chunks))
+
+    def parse_value(self) -> Any:
+        char = self._peek()
+
+        if char == '"':
+            return self.parse_string()
+
+        if char == "{":
+            return self.parse_object()
+
+        if char == "[":
+            return self.parse_array()
+
+        # Número ou literal (true/false/null); tokens desconhecidos viram texto
+        start = self.pos
+        while self.pos < self.length and self.text[self.pos] not in VALUE_END:
+            self.pos += 1
+
+        token = self.text[start:self.pos]
+
+        if not token:
+            # Valor ausente (ex.: "chave": }); quem chamou trata o separador
+            return None
+
+        if token in LITERALS:
+            return LITERALS[token]
+
+        try:
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        except ValueError:
+            return token
+
+
+def _find_reply_object(value: Any) -> dict | None:
+    """Objeto com os campos de resposta, no topo ou aninhado (ex.: {"response": {...}})."""
+    if isinstance(value, dict):
+        if any(key in value for key in REPLY_FIELDS):
+            return value
+
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+
+    for child in children:
+        found = _find_reply_object(child)
+        if found is not None:
+            return found
+
+    return None
+
+
+def _fill(parsed: ParsedReply, fields: dict, truncated: bool) -> ParsedReply:
+    parsed.is_json = True
+    parsed.truncated = truncated
+    parsed.fields = fields
+
+    reply = fields.get("reply")
+    if isinstance(reply, str) and reply.strip():
+        parsed.reply = reply.strip()
+
+    parsed.c2s = fields.get("c2s")
+    parsed.schedule = fields.get("schedule")
+    return parsed
+
+
+def parse_reply(text: str) -> ParsedReply:
+    """
+    Encontra e decodifica os campos reply, c2s e schedule em uma passada.
+
+    Objetos no texto são lidos na ordem em que aparecem (texto antes do JSON e
+    blocos ```json são ignorados) até achar um com "reply". Sem nenhum objeto
+    JSON, o texto inteiro é tratado como a própria resposta.
+    """
+    parsed = ParsedReply()
+
+    if not text:
+        return parsed
+
+    position = text.find("{")
+
+    while position != -1:
+        scanner = _Scanner(text, position)
+
+        try:
+            fields = scanner.parse_object()
+        except _Truncated as e:
+            fields = e.args[0] if e.args else {}
+
+        reply_object = _find_reply_object(fields)
+        if reply_object is not None:
+            return _fill(parsed, reply_object, scanner.truncated)
+
+        # Objeto sem os campos esperados: segue a partir do fim dele
+        position = text.find("{", max(scanner.pos, position + 1))
+
+    # Campo solto, sem o objeto em volta (ex.: '"reply": "Olá"')
+    key_position = text.find('"reply"')
+    if key_position != -1:
+        scanner = _Scanner(text, key_position)
+        scanner.parse_string()
+
+        try:
+            if scanner._peek() == ":":
+                scanner.pos += 1
+                fields = {"reply": scanner.parse_value()}
+                return _fill(parsed, fields, scanner.truncated)
+        except _Truncated as e:
+            return _fill(parsed, {"reply": e.args[0] if e.args else None}, True)
+
+    parsed.reply = text.strip() or None
+    return parsed
@@ -0,0 +1,246 @@
+import re
+from typing import Callable
+from utils.emoji_sanitizer import remove_emojis
+from utils.message_splitter import (
+    StreamingSplitter,
+    WHITESPACE_PATTERN,
+    clean_confirmations,
+    iter_sentences,
+    split_message,
+)
+from utils.reply_parser import (
+    JSON_ESCAPES,
+    combine_surrogates,
+    is_high_surrogate,
+    surrogate_escape,
+)
+
+REPLY_KEY_PATTERN = re.compile(r'"reply"\s*:\s*"')
+
+
+class ReplyFieldExtractor:
+    """
+    Extrai incrementalmente o texto da resposta enquanto o modelo gera.
+
+    O modelo responde em texto puro ou em JSON ({"reply": "...", "c2s": ...},
+    às vezes dentro de um bloco ```json). No JSON, só o valor de "reply" é
+    devolvido, com os escapes decodificados conforme os caracteres chegam;
+    em texto puro, os deltas passam direto.
+    """
+
+    def __init__(self) -> None:
+        self.mode: str | None = None  # None, "text" ou "json"
+        self.done = False
+        self.raw = ""
+        self._pending = ""
+        self._escape = ""
+        self._high: int | None = None
+        self._in_reply = False
+
+    @property
+    def found_reply(self) -> bool:
+        return self.mode == "text" or (self.mode == "json" and self.done)
+
+    def feed(self, delta: str) -> str:
+        self.raw += delta
+
+        if self.done:
+            return ""
+
+        if self.mode is None:
+            return self._detect(delta)
+
+        if self.mode == "json":
+            return self._feed_json(delta)
+
+        return delta
+
+    def _detect(self, delta: str) -> str:
+        self._pending += delta
+        head = self._pending.lstrip()
+
+        if not head:
+            return ""
+
+        if head[0] not in "{`":
+            self.mode = "text"
+            self._pending = ""
+            return head
+
+        if "{" not in head:
+            # Ainda no cabeçalho do bloco ```json
+            return ""
+
+        self.mode = "json"
+        self._pending = head[head.index("{"):]
+        return self._feed_json("")
+
+    def _feed_json(self, delta: str) -> str:
+        if not self._in_reply:
+            self._pending += delta
+            match = REPLY_KEY_PATTERN.search(self._pending)
+
+            if not match:
+                return ""
+
+            self._in_reply = True
+            delta = self._pending[match.end():]
+            self._pending = ""
+
+        return self._decode(delta)
+
+    def _decode(self, chunk: str) -> str:
+        decoded = []
+
+        for char in chunk:
+            if self._escape:
+                self._escape += char
+
+                if self._escape[1] != "u":
+                    self._flush_high(decoded)
+                    decoded.append(JSON_ESCAPES.get(char, char))
+                    self._escape = ""
+                elif len(self._escape) == 6:
+                    self._decode_unicode(self._escape, decoded)
+                    self._escape = ""
+                continue
+
+            if char == "\\":
+                self._escape = char
+                continue
+
+            self._flush_high(decoded)
+
+            if char == '"':
+                self.done = True
+                break
+
+            decoded.append(char)
+
+        return "".join(decoded)
+
+    def _decode_unicode(self, escape: str, decoded: list[str]) -> None:
+        try:
+            code = int(escape[2:], 16)
+        except ValueError:
+            return
+
+        if self._high is not None:
+            low = surrogate_escape(escape)
+            high, self._high = self._high, None
+
+            if low is not None:
+                # Emojis vêm como par \ud83d\ude00: os dois viram um caractere só
+                decoded.append(chr(combine_surrogates(high, low)))
+                return
+
+            decoded.append(chr(high))
+
+        if is_high_surrogate(code):
+            # Primeira metade de um par: espera a segunda chegar
+            self._high = code
+        else:
+            decoded.append(chr(code))
+
+    def _flush_high(self, decoded: list[str]) -> None:
+        # Metade de par sem a segunda: sai como veio, igual ao json.loads
+        if self._high is not None:
+            decoded.append(chr(self._high))
+            self._high = None
+
+
+class ReplyStream:
+    """
+    Liga o streaming do modelo ao envio: extrai o texto da resposta, quebra em
+    partes estáveis e entrega cada lote a on_parts assim que fica pronto.
+
+    hold() interrompe as entregas antecipadas (ex.: o modelo chamou uma tool
+    ou acionou um agente) e hold_pattern faz o mesmo automaticamente quando o
+    texto bruto casa com o padrão. O que não foi entregue fica para finish().
+    """
+
+    def __init__(
+        self,
+        on_parts: Callable[[list[str]], None],
+        hold_pattern: re.Pattern | None = None,
+    ) -> None:
+        self.on_parts = on_parts
+        self.hold_pattern = hold_pattern
+        self.extractor = ReplyFieldExtractor()
+        self.splitter = StreamingSplitter()
+        self.delivered: list[str] = []
+        self.held = False
+
+    def hold(self) -> None:
+        self.held = True
+
+    def feed(self, delta: str) -> None:
+        if not delta:
+            return
+
+        text = self.extractor.feed(delta)
+
+        if self.hold_pattern and self.hold_pattern.search(self.extractor.raw):
+            self.held = True
+
+        # Texto puro que passa a ter JSON no meio é tratado só no final
+        if self.extractor.mode == "text" and "{" in self.extractor.raw:
+            self.held = True
+
+        if self.held or not text:
+            return
+
+        parts = self.splitter.feed(text)
+
+        if parts:
+            self.delivered.extend(parts)
+            self.on_parts(parts)
+
+    def finish(self) -> list[str] | None:
+        """
+        Partes da resposta que ainda não foram entregues (não chama on_parts).
+
+        Devolve None quando o streaming não chegou a uma resposta confiável
+        (entregas retidas ou "reply" não encontrado): quem chamou obtém o texto
+        final da resposta e usa undelivered_parts().
+        """
+        if self.held or not self.extractor.found_reply:
+            return None
+
+        return self.splitter.finish()
+
+    def undelivered_parts(self, reply: str) -> list[str]:
+        """
+        Partes do texto final da resposta que ainda não foram entregues.
+
+        A comparação é pelo conteúdo, não pela quantidade de partes: a primeira
+        parte antecipada não segue o agrupamento de split_message. As sentenças
+        iniciais de reply iguais às já entregues são puladas e só o restante é
+        quebrado de novo; se reply não começa pelo que foi entregue (ex.: um
+        agente respondeu no lugar), ele vai inteiro.
+        """
+        if not self.delivered:
+            return split_message(reply)
+
+        delivered = [
+            _normalize(sentence)
+            for part in self.delivered
+            for sentence in iter_sentences(part)
+        ]
+        sentences = list(iter_sentences(clean_confirmations(reply)))
+
+        skip = 0
+        while (
+            skip < len(sentences)
+            and skip < len(delivered)
+            and _normalize(sentences[skip]) == delivered[skip]
+        ):
+            skip += 1
+
+        remaining = " ".join(sentences[skip:])
+        return split_message(remaining) if remaining.strip() else []
+
+
+def _normalize(sentence: str) -> str:
+    # Pontuação final fora: a parte entregue pode ter "..", "." ou "?" onde o texto final difere
+    return WHITESPACE_PATTERN.sub(" ", remove_emojis(sentence)).strip().rstrip(".!?")
@@ -0,0 +1,127 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from interfaces.clients.cache_interface import ICache
+from utils.logger import logger, to_json_dump
+
+
+class TranscriptionCache:
+    """
+    Cache de transcrições de áudio endereçado por conteúdo.
+
+    As chaves são o sha256 dos bytes do áudio ou da URL, então áudios
+    encaminhados, webhooks repetidos e entregas duplicadas da Z-API não passam
+    pelo Whisper de novo. Há um LRU local por processo e, quando um ICache é
+    informado, uma camada no Redis compartilhada entre processos. As duas
+    camadas expiram após TRANSCRIPTION_CACHE_TTL_SECONDS.
+    """
+
+    prefix = "transcription"
+
+    def __init__(
+        self,
+        cache_client: ICache | None = None,
+        max_entries: int | None = None,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        self.cache = cache_client
+        self.max_entries = max_entries or int(
+            os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", 1024)
+        )
+        self.ttl_seconds = ttl_seconds or int(
+            os.getenv("TRANSCRIPTION_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+        )
+        self._local: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "redis_errors": 0,
+        }
+
+    def key_for_url(self, url: str) -> str:
+        return f"{self.prefix}:url:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+    def key_for_bytes(self, audio_bytes: bytes) -> str:
+        return f"{self.prefix}:sha256:{hashlib.sha256(audio_bytes).hexdigest()}"
+
+    def get(self, *keys: str) -> str | None:
+        """Retorna a transcrição da primeira chave encontrada (LRU local e depois Redis)."""
+        now = time.time()
+
+        with self._lock:
+            for key in keys:
+                item = self._local.get(key)
+
+                if item and item[1] > now:
+                    self._local.move_to_end(key)
+                    self.metrics["local_hits"] += 1
+                    return item[0]
+
+                if item:
+                    del self._local[key]
+
+        if self.cache:
+            for key in keys:
+                text = self._redis_call(self.cache.get, key)
+
+                if text is not None:
+                    self._store_local([key], text)
+                    self.metrics["redis_hits"] += 1
+                    return text
+
+        self.metrics["misses"] += 1
+        return None
+
+    def set(self, keys: list[str], text: str) -> None:
+        if not text:
+            return
+
+        self._store_local(keys, text)
+        self.metrics["stores"] += 1
+
+        if self.cache:
+            for key in keys:
+                self._redis_call(self.cache.set, key, text, self.ttl_seconds)
+
+    def _store_local(self, keys: list[str], text: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+
+        with self._lock:
+            for key in keys:
+                self._local[key] = (text, expires_at)
+                self._local.move_to_end(key)
+
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _redis_call(self, method, *args):
+        # Falha no Redis não pode impedir a transcrição; segue só com o LRU local
+        try:
+            return method(*args)
+        except Exception as e:
+            self.metrics["redis_errors"] += 1
+            logger.warning(
+                f"[TRANSCRIPTION CACHE] Falha ao acessar o Redis: \n{to_json_dump(e)}"
+            )
+            return None
+
+    def get_metrics(self) -> dict:
+        hits = self.metrics["local_hits"] + self.metrics["redis_hits"]
+        lookups = hits + self.metrics["misses"]
+
+        with self._lock:
+            entries = len(self._local)
+
+        return {
+            **self.metrics,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "local_entries": entries,
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,124 @@
+import os
+import threading
+from typing import Callable
+from utils.logger import logger, to_json_dump
+
+
+class WriteBehindQueue:
+    """
+    Fila de gravação adiada com coalescência por chave.
+
+    put() só registra a alteração em memória e retorna; uma thread grava os
+    pendentes em lote a cada flush_interval segundos, ou antes quando o lote
+    chega a max_batch chaves. Alterações da mesma chave entre dois flushes são
+    mescladas (a mais recente vence campo a campo), então dez atualizações de um
+    lead viram uma linha. Se flush_fn falhar, o lote volta para a fila, por baixo
+    das alterações que chegaram nesse meio tempo, e é tentado no próximo ciclo.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[dict[str, dict]], bool],
+        name: str = "write-behind",
+        flush_interval: float | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        self.flush_fn = flush_fn
+        self.name = name
+        self.flush_interval = flush_interval or float(
+            os.getenv("WRITE_BEHIND_FLUSH_SECONDS", 2)
+        )
+        self.max_batch = max_batch or int(os.getenv("WRITE_BEHIND_MAX_BATCH", 100))
+
+        self._pending: dict[str, dict] = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        self.metrics = {
+            "puts": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "flushed_items": 0,
+            "failed_flushes": 0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, key: str, values: dict) -> None:
+        with self._condition:
+            self.metrics["puts"] += 1
+
+            if key in self._pending:
+                self.metrics["coalesced"] += 1
+                self._pending[key].update(values)
+            else:
+                self._pending[key] = dict(values)
+
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def get_pending(self, key: str) -> dict | None:
+        """Alterações da chave ainda não gravadas (para leituras não verem dado velho)."""
+        with self._condition:
+            pending = self._pending.get(key)
+            return dict(pending) if pending else None
+
+    def flush(self) -> bool:
+        # Um flush por vez: a retentativa de um lote não pode passar na frente do seguinte
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+
+            if not batch:
+                return True
+
+            try:
+                ok = self.flush_fn(batch)
+            except Exception as e:
+                logger.exception(
+                    f"[WRITE BEHIND] Erro ao gravar lote de {self.name}: \n{to_json_dump(e)}"
+                )
+                ok = False
+
+            with self._condition:
+                if ok:
+                    self.metrics["flushes"] += 1
+                    self.metrics["flushed_items"] += len(batch)
+                    return True
+
+                self.metrics["failed_flushes"] += 1
+
+                # Devolve o lote por baixo do que chegou durante a tentativa
+                for key, values in batch.items():
+                    self._pending[key] = {**values, **self._pending.get(key, {})}
+
+            return False
+
+    def _run(self) -> None:
+        failed = False
+
+        while True:
+            with self._condition:
+                # Depois de uma falha espera o intervalo mesmo com o lote cheio
+                if not self._closed and (failed or len(self._pending) < self.max_batch):
+                    self._condition.wait(self.flush_interval)
+
+                if self._closed:
+                    return
+
+            failed = not self.flush()
+
+    def close(self) -> None:
+        """Para a thread e grava o que estiver pendente."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def get_metrics(self) -> dict:
+        with self._condition:
+            return {**self.metrics, "pending": len(self._pending)}
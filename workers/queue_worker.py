@@ -1,7 +1,7 @@
 import time
 import os
-import json
 import asyncio
+import signal
 from utils.logger import logger, to_json_dump
 from dotenv import load_dotenv
 from exceptions.handler import handle_errors, setup_error_handler
@@ -11,40 +11,71 @@ from container.container import Container
 
 DEBOUNCE_SECONDS = os.getenv("DEBOUNCE_SECONDS", 5)
 QUEUE_KEY = os.getenv("QUEUE_KEY", "message_queue")
+MAX_IDLE_SECONDS = float(os.getenv("QUEUE_WORKER_MAX_IDLE_SECONDS", 30))
+METRICS_INTERVAL_SECONDS = float(os.getenv("QUEUE_WORKER_METRICS_INTERVAL_SECONDS", 60))
 
 container = Container()
 setup_error_handler(container)
 redis = container.clients.cache
 
 
+def reload_container():
+    container.reload()
+    logger.info("[QUEUE WORKER] Serviços, agentes e tools recarregados (SIGHUP)")
+
+
 @handle_errors("QUEUE_WORKER")
-async def run_queue_worker():
+async def run_queue_worker(dispatcher):
     logger.info(
         f'[QUEUE WORKER] Starting in the queue "{QUEUE_KEY}" with debounce {DEBOUNCE_SECONDS} seconds.'
     )
 
+    # Itens gravados antes do sorted set de deadlines precisam ser indexados uma vez
+    redis.sync_deadlines(QUEUE_KEY)
+
+    # kill -HUP <pid> descarta os serviços em cache sem derrubar o worker
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_container)
+
+    logger.info(f"[QUEUE WORKER] Worker id: {dispatcher.worker_id}")
+    last_metrics_at = time.time()
+
     while True:
         try:
-            now = int(time.time())
-            queue = redis.get_queue(QUEUE_KEY)
-            keys_to_delete = []
+            # Só reivindica a quantidade de telefones que o pool consegue atender
+            dispatcher.dispatch_due()
 
-            for phone, raw_data in queue.items():
-                data = json.loads(raw_data)
+            if time.time() - last_metrics_at >= METRICS_INTERVAL_SECONDS:
+                last_metrics_at = time.time()
+                metrics = dispatcher.get_metrics(
+                    queued=redis.queue_size(QUEUE_KEY),
+                    due=redis.count_due(QUEUE_KEY, last_metrics_at),
+                )
+                logger.info(f"[QUEUE WORKER] Métricas do despacho: \n{to_json_dump(metrics)}")
 
-                if data["expired_at"] > now:
-                    continue
+            next_deadline = redis.get_next_deadline(QUEUE_KEY)
 
-                asyncio.create_task(
-                    container.services.generate_response_service.execute(
-                        phone=phone, message=data["value"]
-                    )
-                )
+            # Pool saturado: os telefones vencidos continuam na fila até uma vaga liberar
+            if (
+                not dispatcher.available_slots()
+                and next_deadline is not None
+                and next_deadline <= time.time()
+            ):
+                dispatcher.record_saturation()
+                await dispatcher.wait_for_slot(timeout=MAX_IDLE_SECONDS)
+                continue
 
-                keys_to_delete.append(phone)
+            # Dorme até o próximo prazo vencer ou até um novo telefone entrar na fila
+            timeout = (
+                MAX_IDLE_SECONDS
+                if next_deadline is None
+                else min(max(next_deadline - time.time(), 0), MAX_IDLE_SECONDS)
+            )
 
-            if keys_to_delete:
-                redis.delete_queue(QUEUE_KEY, keys_to_delete)
+            if timeout > 0:
+                await asyncio.to_thread(redis.wait_for_queue, QUEUE_KEY, timeout)
+            else:
+                await asyncio.sleep(0)
 
         except Exception as e:
             logger.exception(
@@ -52,8 +83,24 @@ async def run_queue_worker():
             )
             raise e
 
-        await asyncio.sleep(1)
+
+async def main():
+    # A propriedade cria um dispatcher novo a cada acesso: o shutdown precisa ser o que o loop usou
+    dispatcher = container.services.response_dispatcher_service
+
+    try:
+        await run_queue_worker(dispatcher)
+    finally:
+        # Respostas em geração terminam antes do loop acabar, sem partes enviadas pela metade
+        await dispatcher.shutdown()
+        # Mensagens de vendedor agendadas saem antes do loop acabar (asyncio.run cancelaria as tasks)
+        await container.tools.drain()
+        # O cliente assíncrono da OpenAI precisa ser fechado no mesmo loop em que foi usado
+        await container.clients.aclose()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_queue_worker())
+    try:
+        asyncio.run(main())
+    finally:
+        container.close()